@@ -0,0 +1,78 @@
+"""Aho-Corasick automaton for matching many literal strings in a single pass."""
+
+from collections import deque
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+
+class AhoCorasick:
+    """Automaton that finds every occurrence of a set of literal strings.
+
+    The text is scanned once regardless of how many needles there are; each
+    character costs one transition plus any failure links followed.
+    """
+
+    def __init__(self, needles: Sequence[str]):
+        """Build the automaton.
+
+        Args:
+            needles: Non-empty literal strings to search for
+        """
+        self.needles = list(needles)
+        self._lengths = [len(needle) for needle in self.needles]
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[int, ...]] = [()]
+
+        # Build the trie of all needles
+        for idx, needle in enumerate(self.needles):
+            if not needle:
+                raise ValueError("Aho-Corasick needles must not be empty")
+            state = 0
+            for char in needle:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                    self._goto[state][char] = next_state
+                state = next_state
+            self._out[state] += (idx,)
+
+        # Breadth-first pass to add failure links and merge outputs
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                self._out[next_state] += self._out[self._fail[next_state]]
+
+    def finditer(self, text: str) -> Iterator[Tuple[int, int, int]]:
+        """Find all, possibly overlapping, needle occurrences in text.
+
+        Yields:
+            Tuples of start offset, end offset and needle index
+        """
+        goto = self._goto
+        fail = self._fail
+        out = self._out
+        lengths = self._lengths
+        state = 0
+        for pos, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if out[state]:
+                end = pos + 1
+                for idx in out[state]:
+                    yield end - lengths[idx], end, idx
+
+    def search(self, text: str) -> bool:
+        """Check whether any needle occurs in text."""
+        for _ in self.finditer(text):
+            return True
+        return False
@@ -0,0 +1,253 @@
+"""Searches with wall-clock budgets, run in a worker process that can be killed."""
+
+import multiprocessing
+import time
+from collections import deque
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Generator, List, Optional, Union
+
+if TYPE_CHECKING:
+    from mcp_grep.core import MCPGrep
+    from mcp_grep.trigram_index import TrigramIndex
+
+# Files sent to the worker ahead of the one it is searching, so it never
+# waits for the next path; small enough that the paths fit in a pipe buffer
+_QUEUED_FILES = 32
+
+# Seconds between checks of the searcher's stop event while waiting on the worker
+_STOP_POLL = 0.05
+
+# Match records the worker sends at a time, so results reach the caller while
+# a file is still being searched
+_RECORD_CHUNK = 64
+
+
+def _bounded_worker(grep: "MCPGrep", paths, records) -> None:
+    """Search the files received on one connection, reporting on the other.
+
+    Each file is reported as chunks of ``(records, done, error)``; the last
+    chunk for a file has ``done`` set.
+    """
+    while True:
+        try:
+            file_path = paths.recv()
+        except EOFError:
+            return
+        if file_path is None:
+            return
+        found = []
+        error = None
+        try:
+            for result in grep._scan_file(Path(file_path)):
+                found.append(grep._compact_result(result))
+                if len(found) == _RECORD_CHUNK:
+                    records.send((found, False, None))
+                    found = []
+        except Exception as e:
+            error = str(e)
+        records.send((found, True, error))
+
+
+class BoundedSearch:
+    """Runs a searcher's matching in a worker process under time budgets.
+
+    The ``re`` module cannot be interrupted once a match is running, so a
+    pattern that backtracks catastrophically would hold the server until it
+    finished. Here files are searched in a separate process: when a file
+    takes longer than ``file_timeout`` the worker is killed, the file is
+    skipped and a fresh worker carries on with the rest; when the whole call
+    takes longer than ``timeout`` the search stops. Results found before a
+    budget ran out are still yielded, and ``timed_out`` and
+    ``timed_out_files`` record what was cut short.
+    """
+
+    def __init__(self, grep: "MCPGrep", timeout: Optional[float] = None, file_timeout: Optional[float] = None):
+        """Set the budgets; the call budget starts now.
+
+        Args:
+            grep: Searcher to run
+            timeout: Seconds for the whole call, or None for no limit
+            file_timeout: Seconds for any one file, or None for no limit
+        """
+        self.grep = grep
+        self.file_timeout = file_timeout
+        self.deadline = time.monotonic() + timeout if timeout is not None else None
+        self.timed_out = False
+        self.timed_out_files: List[str] = []
+        self._worker = None
+        self._paths = None
+        self._records = None
+        # Seconds spent waiting on the file being searched
+        self._file_waited = 0.0
+
+    def __enter__(self) -> "BoundedSearch":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _start(self) -> None:
+        context = multiprocessing.get_context()
+        paths_in, paths_out = context.Pipe(duplex=False)
+        records_in, records_out = context.Pipe(duplex=False)
+        self._worker = context.Process(
+            target=_bounded_worker, args=(self.grep, paths_in, records_out), daemon=True
+        )
+        self._worker.start()
+        paths_in.close()
+        records_out.close()
+        self._paths = paths_out
+        self._records = records_in
+
+    def _kill(self) -> None:
+        if self._worker is None:
+            return
+        self._worker.kill()
+        self._worker.join()
+        self._paths.close()
+        self._records.close()
+        self._worker = None
+
+    def _restart(self, queued: deque) -> None:
+        """Replace the worker and hand it the files still queued."""
+        self._kill()
+        self._file_waited = 0.0
+        if queued:
+            self._start()
+            for file_path in queued:
+                self._paths.send(file_path)
+
+    def close(self) -> None:
+        """Stop the worker process, even in the middle of a file."""
+        self._kill()
+
+    def _wait(self) -> Optional[float]:
+        """Seconds to wait for the file being searched, or None for no limit."""
+        limits = []
+        if self.file_timeout is not None:
+            limits.append(self.file_timeout - self._file_waited)
+        if self.deadline is not None:
+            limits.append(self.deadline - time.monotonic())
+        return max(min(limits), 0) if limits else None
+
+    def _poll_records(self) -> bool:
+        """Wait for the worker to report on a file, within the budgets.
+
+        Time spent here counts towards the file's budget, so a file is not
+        charged for the caller's handling of the results it has already
+        reported.
+
+        Returns:
+            Whether a report arrived; False when a budget ran out or the
+            searcher's stop event was set
+        """
+        started = time.monotonic()
+        try:
+            return self._poll_within(self._wait())
+        finally:
+            self._file_waited += time.monotonic() - started
+
+    def _poll_within(self, wait: Optional[float]) -> bool:
+        stop = self.grep.stop
+        if stop is None:
+            return self._records.poll(wait)
+        until = time.monotonic() + wait if wait is not None else None
+        while not stop.is_set():
+            step = _STOP_POLL if until is None else min(_STOP_POLL, max(until - time.monotonic(), 0))
+            if self._records.poll(step):
+                return True
+            if until is not None and time.monotonic() >= until:
+                return False
+        return False
+
+    def search_files(
+        self,
+        file_paths: List[Union[str, Path]],
+        recursive: bool = False,
+        file_pattern: Optional[str] = None,
+        no_ignore: bool = False,
+        include: Optional[List[str]] = None,
+        exclude: Optional[List[str]] = None,
+        types: Optional[List[str]] = None,
+        type_not: Optional[List[str]] = None,
+        type_add: Optional[List[str]] = None,
+        index: Optional["TrigramIndex"] = None
+    ) -> Generator[Dict, None, None]:
+        """Search files like MCPGrep.search_files, within the budgets.
+
+        Files are listed in this process and searched by the worker, one
+        at a time and in order; results are yielded while their file is
+        still being searched. max_count applies across all files. Once the
+        searcher's stop event is set the worker is killed, even in the
+        middle of a file.
+
+        Yields:
+            Dict containing file path, line number, matched line, and match spans
+        """
+        grep = self.grep
+        files = grep._iter_files(
+            file_paths, recursive, file_pattern, no_ignore, include, exclude, types, type_not, type_add
+        )
+        if index is not None:
+            files = index.candidates(files, grep.literal_alternatives(), grep.ignore_case)
+
+        total_matches = 0
+        queued = deque()
+        files = iter(files)
+        exhausted = False
+        stop = grep.stop
+        while True:
+            if stop is not None and stop.is_set():
+                self._kill()
+                return
+            if self.deadline is not None and time.monotonic() >= self.deadline:
+                self.timed_out = True
+                self._kill()
+                return
+            # Keep the worker supplied with upcoming files
+            while not exhausted and len(queued) < _QUEUED_FILES:
+                file_path = next(files, None)
+                if file_path is None:
+                    exhausted = True
+                    break
+                if self._worker is None:
+                    self._start()
+                self._paths.send(str(file_path))
+                queued.append(str(file_path))
+            if not queued:
+                return
+
+            if not self._poll_records():
+                if stop is not None and stop.is_set():
+                    self._kill()
+                    return
+                file_path = queued.popleft()
+                if self.deadline is not None and time.monotonic() >= self.deadline:
+                    self.timed_out = True
+                    self._kill()
+                    return
+                # The worker is stuck on this file: replace it and requeue the rest
+                self.timed_out_files.append(file_path)
+                self._restart(queued)
+                continue
+
+            file_path = queued[0]
+            try:
+                records, done, error = self._records.recv()
+            except EOFError:
+                # The worker died, for instance from running out of memory
+                records, done, error = [], True, "search worker exited"
+                queued.popleft()
+                self._restart(queued)
+            else:
+                if done:
+                    queued.popleft()
+                    self._file_waited = 0.0
+            if error is not None:
+                print(f"Error searching {file_path}: {error}")
+            file_name = str(Path(file_path))
+            for record in records:
+                yield grep._expand_record(file_name, record)
+                total_matches += 1
+                if grep.max_count > 0 and total_matches >= grep.max_count:
+                    return
@@ -2,9 +2,440 @@
 
 import re
 import os
+import copy
+import mmap
 import fnmatch
+import queue
+import threading
+from bisect import bisect_right
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from itertools import accumulate
 from pathlib import Path
-from typing import Dict, Generator, List, Pattern, Union, Optional, Tuple
+from typing import TYPE_CHECKING, Callable, Dict, Generator, Iterable, Iterator, List, Pattern, Union, Optional, Tuple
+
+from mcp_grep.aho_corasick import AhoCorasick
+from mcp_grep.walker import FileWalker
+
+if TYPE_CHECKING:
+    from mcp_grep.trigram_index import TrigramIndex
+
+try:
+    from re import _parser as sre_parse  # Python 3.11+
+except ImportError:
+    import sre_parse
+
+# Available strategies for reading and scanning a single file
+SCAN_MODES = ("lines", "stream", "buffer", "mmap")
+
+# Per-file summaries summarize_files reports instead of lines, as grep -c, -l and -L
+FILE_MODES = ("count", "files_with_matches", "files_without_match")
+
+# Regex syntax whose meaning changes when run over a whole buffer instead of a
+# single line (string anchors and lookarounds that can see past a newline)
+_LINE_ONLY_SYNTAX = re.compile(r"\\[AZ]|\(\?<?[=!]")
+
+# Repeat opcodes whose body must match at least ``min`` times
+_REPEAT_OPS = tuple(
+    op for op in (
+        sre_parse.MAX_REPEAT,
+        sre_parse.MIN_REPEAT,
+        getattr(sre_parse, "POSSESSIVE_REPEAT", None),
+    ) if op is not None
+)
+
+# Non-ASCII characters that case-fold onto an ASCII letter. U+0130 is always
+# included because lowering it changes the length of the text.
+_FOLD_HAZARDS = {"i": "\u0130\u0131", "k": "\u212a", "s": "\u017f"}
+_BYTES_FOLD_HAZARDS = [hazard.encode('utf-8') for hazard in "".join(_FOLD_HAZARDS.values())]
+
+# Size of the slices used when counting newlines in a memory-mapped file
+_NEWLINE_CHUNK = 1 << 20
+
+# Characters read at once when the "lines" scan mode looks for a case-folded literal
+_FOLD_CHUNK = 1 << 20
+
+# Where search_page resumes: file index, byte offset and line number to read
+# from, first line that may match and matches on earlier pages
+PagePosition = Tuple[int, int, int, int, int]
+
+# Ways search_files can spread files over workers
+EXECUTORS = ("thread", "process")
+
+# Upper bounds on the work sent to a worker process in one batch
+_BATCH_BYTES = 8 << 20
+_BATCH_FILES = 256
+
+# Seconds between checks of the stop event while waiting on a worker
+_STOP_POLL = 0.05
+
+# Results a worker thread may get ahead of the consumer on each file
+_QUEUED_RESULTS = 1024
+
+# Put on a worker thread's queue once its file is searched
+_FILE_DONE = object()
+
+# Searcher installed in each worker process by _init_process_worker
+_worker_grep = None
+
+
+def _init_process_worker(grep: "MCPGrep") -> None:
+    """Install the searcher used by this worker process."""
+    global _worker_grep
+    _worker_grep = grep
+
+
+def _search_process_batch(file_paths: List[str], limit: int = 0) -> List[Tuple[str, List[tuple], Optional[str]]]:
+    """Search a batch of files in a worker process.
+
+    Args:
+        file_paths: Files to search, in order
+        limit: Stop once this many records are collected over the batch, when positive
+
+    Returns:
+        Per file: its path, compact match records and an error message or None
+    """
+    outcomes = []
+    collected = 0
+    for file_path in file_paths:
+        records = []
+        error = None
+        try:
+            for result in _worker_grep._scan_file(Path(file_path)):
+                records.append(_worker_grep._compact_result(result))
+                collected += 1
+                if limit and collected >= limit:
+                    break
+        except Exception as e:
+            error = str(e)
+        outcomes.append((file_path, records, error))
+        if limit and collected >= limit:
+            break
+    return outcomes
+
+
+def _wait_unless_stopped(future: Future, stop: Optional[threading.Event]) -> bool:
+    """Wait for a worker's future, returning False as soon as stop is set."""
+    if stop is None:
+        return True
+    while not stop.is_set():
+        if wait((future,), timeout=_STOP_POLL).done:
+            return True
+    return False
+
+
+def _count_newlines(buf: mmap.mmap, start: int, end: int) -> int:
+    """Count newlines in buf[start:end] without copying more than one chunk at a time."""
+    count = 0
+    while start < end:
+        stop = min(end, start + _NEWLINE_CHUNK)
+        count += buf[start:stop].count(b'\n')
+        start = stop
+    return count
+
+
+def _contains_any(buf: mmap.mmap, needles: List[bytes]) -> bool:
+    """Check a mapped file for any of several multi-byte sequences."""
+    # Single-byte searches are much faster, so rule out each lead byte first
+    return any(buf.find(needle[:1]) >= 0 and buf.find(needle) >= 0 for needle in needles)
+
+
+def _find_folded(buf: mmap.mmap, needle: bytes) -> Iterator[int]:
+    """Find an ASCII-lowercase needle in a mapped file, ignoring ASCII case.
+
+    The mapping is lowered one chunk at a time, with enough overlap that
+    occurrences straddling a chunk boundary are still found.
+
+    Yields:
+        Offsets of each occurrence, in order
+    """
+    size = len(buf)
+    start = 0
+    while start < size:
+        stop = min(size, start + _NEWLINE_CHUNK)
+        chunk = buf[start:stop + len(needle) - 1].lower()
+        limit = stop - start
+        pos = chunk.find(needle)
+        while 0 <= pos < limit:
+            yield start + pos
+            pos = chunk.find(needle, pos + 1)
+        start = stop
+
+
+def _literal_runs(parsed, ignore_case: bool = False) -> List[str]:
+    """Collect literal strings that every match of a parsed pattern contains."""
+    runs = []
+    current = []
+    for op, av in parsed:
+        if op is sre_parse.LITERAL:
+            current.append(chr(av))
+            continue
+        if op is sre_parse.AT:
+            # Zero-width anchors keep the literals around them adjacent
+            continue
+        if current:
+            runs.append("".join(current))
+            current = []
+        if op is sre_parse.SUBPATTERN:
+            # Groups that switch on case folding cannot be checked verbatim
+            if ignore_case or not av[1] & re.IGNORECASE:
+                runs.extend(_literal_runs(av[-1], ignore_case))
+        elif op in _REPEAT_OPS and av[0] >= 1:
+            runs.extend(_literal_runs(av[2], ignore_case))
+        elif op is getattr(sre_parse, "ATOMIC_GROUP", None):
+            runs.extend(_literal_runs(av, ignore_case))
+    if current:
+        runs.append("".join(current))
+    return runs
+
+
+def required_literal(pattern: Pattern) -> Optional[str]:
+    """Find the longest literal that must appear in any match of a compiled pattern.
+
+    Args:
+        pattern: Compiled regular expression
+
+    Returns:
+        The literal, or None if the pattern has no required literal. For
+        case-insensitive patterns the literal must be compared case-folded.
+    """
+    ignore_case = bool(pattern.flags & re.IGNORECASE)
+    try:
+        runs = _literal_runs(sre_parse.parse(pattern.pattern, pattern.flags), ignore_case)
+    except Exception:
+        # The parser is internal to the re module; never fail a search over it
+        return None
+    return max(runs, key=len) if runs else None
+
+
+def required_literal_sets(pattern: Pattern) -> Optional[List[List[str]]]:
+    """Find literals required by a compiled pattern, one set per top-level alternative.
+
+    Args:
+        pattern: Compiled regular expression
+
+    Returns:
+        For each alternative, the literals all of its matches contain, or
+        None if some alternative requires no literal at all
+    """
+    ignore_case = bool(pattern.flags & re.IGNORECASE)
+    try:
+        parsed = list(sre_parse.parse(pattern.pattern, pattern.flags))
+    except Exception:
+        return None
+    branches = [parsed]
+    if len(parsed) == 1 and parsed[0][0] is sre_parse.BRANCH:
+        branches = parsed[0][1][1]
+    alternatives = []
+    for branch in branches:
+        runs = _literal_runs(branch, ignore_case)
+        if not runs:
+            return None
+        alternatives.append(runs)
+    return alternatives
+
+
+def _nested_repeat(parsed, inside: bool = False) -> bool:
+    """Look for a variable-length repeat inside an unbounded one in a parsed pattern."""
+    for op, av in parsed:
+        if op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT):
+            if inside and av[0] != av[1]:
+                return True
+            unbounded = av[1] == sre_parse.MAXREPEAT
+            if _nested_repeat(av[2], inside or unbounded):
+                return True
+        elif op is sre_parse.SUBPATTERN:
+            if _nested_repeat(av[-1], inside):
+                return True
+        elif op is sre_parse.BRANCH:
+            if any(_nested_repeat(branch, inside) for branch in av[1]):
+                return True
+        # Atomic groups and possessive repeats never backtrack into their body
+    return False
+
+
+# Anchors that mean the same over UTF-8 bytes as over text; word boundaries do not
+_BYTES_SAFE_ANCHORS = {
+    sre_parse.AT_BEGINNING, sre_parse.AT_BEGINNING_LINE, sre_parse.AT_BEGINNING_STRING,
+    sre_parse.AT_END, sre_parse.AT_END_LINE, sre_parse.AT_END_STRING,
+}
+
+
+def _bytes_safe(parsed) -> bool:
+    """Check that a parsed pattern matches UTF-8 bytes exactly where it matches the text.
+
+    Only ASCII literals, line anchors, groups, alternations, repeats and
+    backreferences qualify. Any character (``.``), classes, categories
+    such as ``\\w``, word boundaries and case folding all see a non-ASCII
+    character as several bytes, or fold differently, so they do not.
+    """
+    for op, av in parsed:
+        if op is sre_parse.LITERAL:
+            if av >= 0x80:
+                return False
+        elif op is sre_parse.AT:
+            if av not in _BYTES_SAFE_ANCHORS:
+                return False
+        elif op is sre_parse.SUBPATTERN:
+            if av[1] & re.IGNORECASE or not _bytes_safe(av[-1]):
+                return False
+        elif op is sre_parse.BRANCH:
+            if not all(_bytes_safe(branch) for branch in av[1]):
+                return False
+        elif op in _REPEAT_OPS:
+            if not _bytes_safe(av[2]):
+                return False
+        elif op is getattr(sre_parse, "ATOMIC_GROUP", None):
+            if not _bytes_safe(av):
+                return False
+        elif op is not sre_parse.GROUPREF:
+            return False
+    return True
+
+
+def _has_group_reference(parsed) -> bool:
+    """Look for backreferences or conditional groups in a parsed pattern."""
+    for op, av in parsed:
+        if op in (sre_parse.GROUPREF, sre_parse.GROUPREF_EXISTS):
+            return True
+        if op is sre_parse.SUBPATTERN:
+            if _has_group_reference(av[-1]):
+                return True
+        elif op is sre_parse.BRANCH:
+            if any(_has_group_reference(branch) for branch in av[1]):
+                return True
+        elif op in _REPEAT_OPS:
+            if _has_group_reference(av[2]):
+                return True
+        elif op in (sre_parse.ASSERT, sre_parse.ASSERT_NOT):
+            if _has_group_reference(av[1]):
+                return True
+        elif op is getattr(sre_parse, "ATOMIC_GROUP", None):
+            if _has_group_reference(av):
+                return True
+    return False
+
+
+def _combinable(compiled: Pattern, flags: int) -> bool:
+    """Check whether a pattern keeps its meaning inside an alternation with others.
+
+    Group numbers shift there, changing what backreferences refer to, and
+    inline global flags such as ``(?i)`` are only allowed at the very start.
+    """
+    if compiled.flags & ~(flags | re.UNICODE):
+        return False
+    try:
+        return not _has_group_reference(sre_parse.parse(compiled.pattern, compiled.flags))
+    except Exception:
+        return False
+
+
+def has_nested_repeat(pattern: Pattern) -> bool:
+    """Check whether a compiled pattern nests repeats, as in (a+)+ or (a{1,3})*.
+
+    Backtracking over such a pattern can take exponential time on a line
+    that almost matches. The check is a heuristic: it flags some harmless
+    patterns, such as (ab+)+, and misses ambiguous alternations like (a|aa)+.
+    """
+    try:
+        return _nested_repeat(sre_parse.parse(pattern.pattern, pattern.flags))
+    except Exception:
+        return False
+
+
+def _read_lines_at(path: Union[str, Path], offset: int = 0) -> Generator[Tuple[int, int, str], None, None]:
+    """Read lines from a byte offset, split and decoded exactly like a text-mode file.
+
+    Lines end at "\\n", "\\r\\n" or a lone "\\r", as with universal newlines.
+
+    Yields:
+        Tuples of the line's start offset, the offset just past its terminator
+        and the decoded line without the terminator
+    """
+    with open(path, 'rb') as file:
+        file.seek(offset)
+        pos = offset
+        for chunk in file:
+            end = pos + len(chunk)
+            body = chunk
+            if body.endswith(b'\n'):
+                body = body[:-2] if body.endswith(b'\r\n') else body[:-1]
+            elif body.endswith(b'\r'):
+                # A lone "\r" at the very end of the file ends the last line
+                body = body[:-1]
+            # Any other "\r" ends a line of its own
+            *pieces, last = body.split(b'\r')
+            for piece in pieces:
+                yield pos, pos + len(piece) + 1, piece.decode('utf-8', errors='replace')
+                pos += len(piece) + 1
+            yield pos, end, last.decode('utf-8', errors='replace')
+            pos = end
+
+
+def group_context(
+    results: Iterable[Dict], line_number: bool = True, keep: Optional[int] = None
+) -> Generator[Dict, None, None]:
+    """Merge results whose context windows overlap or touch into hunks, like grep's "--" groups.
+
+    Each hunk names its file once and lists its lines in order, each line
+    once; selected lines carry their match spans. Results must have line
+    numbers and come in file order, as search_files yields them.
+
+    Args:
+        results: Results from search_file or search_files
+        line_number: Whether to keep line numbers in the hunks
+        keep: Merge only this many matches with their context; the hunk
+            of the last one ends with its after-context, and each later
+            match is yielded alone so it can still be counted without
+            the hunks growing
+
+    Yields:
+        Dicts with "file" and "lines"
+    """
+    def entry(line, match):
+        built = {"line_num": line["line_num"]} if line_number else {}
+        built["line"] = line["line"]
+        if line is match:
+            built["matches"] = match["matches"]
+            if "patterns" in match:
+                built["patterns"] = match["patterns"]
+        return built
+
+    group = None
+    first_num = last_num = 0
+    kept = 0
+    for result in results:
+        match = result.get("match", result)
+        if keep is not None and kept >= keep:
+            if group is not None and match["file"] == group["file"] and match["line_num"] <= last_num:
+                # Shown as after-context of the last match kept
+                group["lines"][match["line_num"] - first_num] = entry(match, match)
+                continue
+            if group is not None:
+                yield group
+                group = None
+            yield {"file": match["file"], "lines": [entry(match, match)]}
+            continue
+        kept += 1
+        window = result.get("before_context", []) + [match] + result.get("after_context", [])
+        start = window[0]["line_num"]
+        if group is not None and (match["file"] != group["file"] or start > last_num + 1):
+            yield group
+            group = None
+        if group is None:
+            group = {"file": match["file"], "lines": []}
+            first_num = start
+            last_num = start - 1
+        lines = group["lines"]
+        for line in window:
+            if line["line_num"] > last_num:
+                lines.append(entry(line, match))
+                last_num = line["line_num"]
+            elif line is match:
+                # Shown earlier as context of a previous match
+                lines[line["line_num"] - first_num] = entry(line, match)
+    if group is not None:
+        yield group
 
 
 class MCPGrep:
@@ -21,7 +452,10 @@ class MCPGrep:
         before_context: int = 0,
         after_context: int = 0,
         context: Optional[int] = None,
-        max_count: int = 0
+        max_count: int = 0,
+        scan_mode: str = "lines",
+        patterns: Optional[List[str]] = None,
+        pattern_file: Optional[Union[str, Path]] = None
     ):
         """Initialize with search pattern.
 
@@ -36,7 +470,19 @@ class MCPGrep:
             after_context: Number of lines to show after each match
             context: Number of lines to show before and after each match (overrides before/after_context)
             max_count: Stop after this many matches
+            scan_mode: How files are read; "lines" reads line by line and
+                stops at max_count, "stream" does the same through the
+                context emitter for every search,
+                "buffer" runs the pattern once over the whole file contents,
+                "mmap" matches bytes against a memory-mapped file and only
+                decodes selected lines
+            patterns: Additional patterns; a line matches if any pattern does (-e)
+            pattern_file: File with one additional pattern per line (-f)
         """
+        if scan_mode not in SCAN_MODES:
+            raise ValueError(f"Unknown scan mode: {scan_mode}")
+        self.scan_mode = scan_mode
+
         # If context is provided, it overrides before_context and after_context
         if context is not None:
             self.before_context = context
@@ -48,6 +494,52 @@ class MCPGrep:
         self.invert_match = invert_match
         self.line_number = line_number
         self.max_count = max_count
+        # When set to a list, search_files appends every path the results
+        # depend on: files searched, directories listed and ignore files read
+        self.sources: Optional[List[str]] = None
+        # Once this event is set, searches stop at the next line they read
+        self.stop: Optional[threading.Event] = None
+        
+        # Gather every pattern; an empty main pattern only counts on its own
+        needles = list(patterns or [])
+        if pattern_file is not None:
+            with open(pattern_file, 'r', encoding='utf-8') as file:
+                needles.extend(line for line in file.read().splitlines() if line)
+        if pattern or not needles:
+            needles.insert(0, pattern)
+        self.patterns = needles
+        
+        # Several patterns: literals share one automaton; each regex is matched
+        # on its own, behind an alternation of them all that skips most lines
+        combine = True
+        self._automaton = None
+        self._needle_regexes = None
+        self._match_all = False
+        self._pattern_set = None
+        if len(needles) > 1:
+            if fixed_strings or not regexp:
+                literals = [needle for needle in needles if needle]
+                self._match_all = len(literals) < len(needles)
+                self._automaton_needles = [needle for needle in needles if needle]
+                if ignore_case:
+                    literals = [needle.lower() for needle in literals]
+                    # str.lower only agrees with re.IGNORECASE on ASCII, and can
+                    # change lengths; other lines are matched with these
+                    self._needle_regexes = [
+                        re.compile(f"(?=({re.escape(needle)}))", re.IGNORECASE)
+                        for needle in self._automaton_needles
+                    ]
+                    self._ascii_needles = all(needle.isascii() for needle in self._automaton_needles)
+                self._automaton = AhoCorasick(literals) if literals else None
+                fixed_strings = False
+                regexp = False
+            else:
+                pattern_flags = re.IGNORECASE if ignore_case else 0
+                self._pattern_set = [re.compile(needle, pattern_flags) for needle in needles]
+                pattern = "|".join(f"(?:{needle})" for needle in needles)
+                combine = all(_combinable(compiled, pattern_flags) for compiled in self._pattern_set)
+        else:
+            pattern = needles[0]
         
         # Handle pattern based on flags
         if fixed_strings:
@@ -61,24 +553,284 @@ class MCPGrep:
             flags |= re.IGNORECASE
         
         # Compile the pattern
-        self.pattern = re.compile(pattern, flags) if regexp else None
+        self.pattern = None
+        if regexp and combine:
+            try:
+                self.pattern = re.compile(pattern, flags)
+            except re.error:
+                # Group names repeated across patterns
+                if self._pattern_set is None:
+                    raise
         self.raw_pattern = pattern
         self.ignore_case = ignore_case
+        
+        # Literal every match must contain, tested before running the regex
+        self._prefilter = None
+        self._folded_literal = None
+        if self.pattern:
+            literal = required_literal(self.pattern)
+            if not self.pattern.flags & re.IGNORECASE:
+                self._prefilter = literal
+            elif literal and literal.isascii():
+                self._folded_literal = literal.lower()
+        elif ignore_case and len(needles) == 1:
+            # Fold a plain case-insensitive substring once instead of per line
+            self._folded_literal = pattern.lower()
+        self._fold_hazards = ""
+        if self._folded_literal is not None:
+            self._fold_hazards = "\u0130" + "".join(
+                sorted({hazard for char in self._folded_literal for hazard in _FOLD_HAZARDS.get(char, "")})
+            )
+        
+        # Whole-buffer variant of the pattern, where ^ and $ match at line boundaries
+        self._buffer_pattern = None
+        if self.pattern and not _LINE_ONLY_SYNTAX.search(pattern):
+            self._buffer_pattern = re.compile(pattern, flags | re.MULTILINE)
+        
+        # Bytes variant for memory-mapped files, only for patterns that find
+        # the same lines in the raw bytes; others use the text path
+        self._bytes_pattern = None
+        self._bytes_literal = None
+        if self.pattern:
+            if self._buffer_pattern and not self.pattern.flags & re.IGNORECASE:
+                try:
+                    if _bytes_safe(sre_parse.parse(pattern, flags)):
+                        self._bytes_pattern = re.compile(pattern.encode('utf-8'), flags | re.MULTILINE)
+                except re.error:
+                    # str-only syntax such as \u escapes
+                    pass
+        elif not ignore_case and len(needles) == 1:
+            self._bytes_literal = pattern.encode('utf-8')
+        self._bytes_prefilter = self._prefilter.encode('utf-8') if self._prefilter else None
+        self._bytes_folded = None
+        if self._folded_literal is not None and self._folded_literal.isascii():
+            self._bytes_folded = self._folded_literal.encode('ascii')
+        self._bytes_fold_hazards = [hazard.encode('utf-8') for hazard in self._fold_hazards]
     
+    def __getstate__(self) -> Dict:
+        """Leave the stop event behind when the searcher is sent to a worker process."""
+        state = self.__dict__.copy()
+        state["stop"] = None
+        return state
+
+    def regexes(self) -> List[Pattern]:
+        """List the compiled regular expressions lines are tested with, one per pattern."""
+        if self._pattern_set is not None:
+            return list(self._pattern_set)
+        return [self.pattern] if self.pattern else []
+
+    def literal_alternatives(self) -> Optional[List[List[str]]]:
+        """Describe the literals a selected line must contain, for narrowing file sets.
+
+        Returns:
+            Alternatives, each a list of literals that must all occur in a
+            selected line, or None if any line could be selected
+        """
+        if self.invert_match:
+            return None
+        if self._pattern_set is not None:
+            alternatives = []
+            for compiled in self._pattern_set:
+                if compiled.flags & re.IGNORECASE and not self.ignore_case:
+                    # Folded by an inline (?i), which the index lookup would not do
+                    return None
+                literal_sets = required_literal_sets(compiled)
+                if literal_sets is None:
+                    return None
+                alternatives.extend(literal_sets)
+            return alternatives
+        if self.pattern:
+            if self.pattern.flags & re.IGNORECASE and not self.ignore_case:
+                return None
+            return required_literal_sets(self.pattern)
+        if self._match_all or not self.raw_pattern and len(self.patterns) == 1:
+            return None
+        if len(self.patterns) > 1:
+            return [[needle] for needle in self._automaton_needles]
+        return [[self.raw_pattern]]
+    
+    def _passes_prefilter(self, line: str) -> bool:
+        """Check a line for the pattern's required literal before running the regex.
+
+        Case-folded literals are only conclusive on ASCII lines, where no
+        other character can fold onto an ASCII letter.
+        """
+        if self._prefilter is not None:
+            return self._prefilter in line
+        if self._folded_literal is not None and line.isascii():
+            return self._folded_literal in line.lower()
+        return True
+
+    def _has_fold_hazards(self, text: str) -> bool:
+        """Check whether lowering text would not line up with the folded literal."""
+        return not text.isascii() and any(hazard in text for hazard in self._fold_hazards)
+
     def _matches_pattern(self, line: str) -> bool:
         """Check if a line matches the pattern based on invert_match setting."""
-        if self.pattern:
-            matches = bool(self.pattern.search(line))
+        if self._pattern_set is not None:
+            matches = self._passes_alternation(line) and any(
+                compiled.search(line) for compiled in self._pattern_set
+            )
+        elif self.pattern:
+            matches = self._passes_prefilter(line) and bool(self.pattern.search(line))
+        elif len(self.patterns) > 1:
+            matches = self._find_spans(line) is not None
         else:
             # For non-regexp matches, do simple string contains with case sensitivity
             if self.ignore_case:
-                matches = self.raw_pattern.lower() in line.lower()
+                matches = self._folded_literal in line.lower()
             else:
                 matches = self.raw_pattern in line
                 
         # Handle invert_match - return True if line should be included
         return matches != self.invert_match
     
+    def _passes_alternation(self, line: str) -> bool:
+        """Check a line against the alternation of several regexes, if there is one."""
+        return self.pattern is None or self._passes_prefilter(line) and bool(self.pattern.search(line))
+
+    def _find_spans(self, line: str) -> Optional[List[Tuple[int, int]]]:
+        """Find match spans in a line, ignoring invert_match.
+
+        Returns:
+            The spans (empty for plain substring matches), or None if the
+            line does not match
+        """
+        if self._pattern_set is not None:
+            if not self._passes_alternation(line):
+                return None
+            spans = sorted({
+                (m.start(), m.end()) for compiled in self._pattern_set for m in compiled.finditer(line)
+            })
+            return spans or None
+        if self.pattern:
+            if not self._passes_prefilter(line):
+                return None
+            spans = [(m.start(), m.end()) for m in self.pattern.finditer(line)]
+            return spans or None
+        if len(self.patterns) > 1:
+            spans = []
+            if self._automaton:
+                spans = sorted({(start, end) for start, end, _ in self._literal_hits(line)})
+            return spans if spans or self._match_all else None
+        if self.ignore_case:
+            return [] if self._folded_literal in line.lower() else None
+        return [] if self.raw_pattern in line else None
+
+    def _literal_hits(self, line: str) -> Iterator[Tuple[int, int, int]]:
+        """Find every, possibly overlapping, occurrence of the literal patterns in a line.
+
+        Yields:
+            Tuples of start offset, end offset and index into _automaton_needles
+        """
+        if self._needle_regexes is None:
+            yield from self._automaton.finditer(line)
+        elif self._ascii_needles and line.isascii():
+            yield from self._automaton.finditer(line.lower())
+        else:
+            for idx, regex in enumerate(self._needle_regexes):
+                for m in regex.finditer(line):
+                    yield m.start(1), m.end(1), idx
+
+    def _match_spans(self, line: str) -> List[Tuple[int, int]]:
+        """Get the spans of all pattern matches in a selected line."""
+        if self.invert_match:
+            return []
+        if self.pattern and self._pattern_set is None:
+            return [(m.start(), m.end()) for m in self.pattern.finditer(line)]
+        return self._find_spans(line) or []
+
+    def _hit_patterns(self, line: str) -> List[str]:
+        """List the patterns that match a selected line, in the order given."""
+        if self.invert_match:
+            return []
+        if self._pattern_set:
+            return [
+                needle for needle, compiled in zip(self.patterns, self._pattern_set)
+                if compiled.search(line)
+            ]
+        hits = set()
+        if self._automaton:
+            hits = {self._automaton_needles[idx] for _, _, idx in self._literal_hits(line)}
+        return [needle for needle in self.patterns if needle in hits or not needle]
+
+    def _context_line(self, file_name: str, line_num: int, line: str) -> Dict:
+        """Build the dict describing a single context line."""
+        context_line = {
+            "file": file_name,
+            "line": line
+        }
+        if self.line_number:
+            context_line["line_num"] = line_num
+        return context_line
+
+    def _build_result(
+        self,
+        file_name: str,
+        line_num: int,
+        line: str,
+        spans: List[Tuple[int, int]],
+        before: Optional[List[Dict]] = None,
+        after: Optional[List[Dict]] = None,
+        hit_patterns: Optional[List[str]] = None
+    ) -> Dict:
+        """Build the result dict for a selected line.
+
+        Without context the result is a flat dict; with context the match is
+        nested under "match" alongside the before and after context lines.
+        """
+        if len(self.patterns) > 1 and hit_patterns is None:
+            hit_patterns = self._hit_patterns(line)
+        if self.before_context > 0 or self.after_context > 0:
+            match_with_context = {
+                "match": {
+                    "file": file_name,
+                    "line": line,
+                    "matches": spans
+                }
+            }
+            if self.line_number:
+                match_with_context["match"]["line_num"] = line_num
+            if len(self.patterns) > 1:
+                match_with_context["match"]["patterns"] = hit_patterns
+            match_with_context["before_context"] = before or []
+            match_with_context["after_context"] = after or []
+            return match_with_context
+
+        match_result = {
+            "file": file_name,
+            "line": line,
+        }
+        if self.line_number:
+            match_result["line_num"] = line_num
+        match_result["matches"] = spans
+        if len(self.patterns) > 1:
+            match_result["patterns"] = hit_patterns
+        return match_result
+
+    def _compact_result(self, result: Dict) -> tuple:
+        """Reduce a result dict to a tuple for sending between processes.
+
+        The file name and key names are dropped; _expand_record restores them.
+        """
+        match = result.get("match", result)
+        record = (match["line"], match.get("line_num"), match["matches"], match.get("patterns"))
+        if "match" in result:
+            record += (
+                [(line.get("line_num"), line["line"]) for line in result["before_context"]],
+                [(line.get("line_num"), line["line"]) for line in result["after_context"]],
+            )
+        return record
+
+    def _expand_record(self, file_name: str, record: tuple) -> Dict:
+        """Rebuild the result dict for a record made by _compact_result."""
+        line, line_num, spans, hit_patterns = record[:4]
+        before = after = None
+        if len(record) > 4:
+            before = [self._context_line(file_name, num, text) for num, text in record[4]]
+            after = [self._context_line(file_name, num, text) for num, text in record[5]]
+        return self._build_result(file_name, line_num, line, spans, before, after, hit_patterns)
+
     def search_file(self, file_path: Union[str, Path]) -> Generator[Dict, None, None]:
         """Search for pattern in a file.
 
@@ -92,205 +844,1192 @@ class MCPGrep:
         
         if not path.exists() or not path.is_file():
             raise FileNotFoundError(f"File not found: {file_path}")
+
+        yield from self._scan_file(path)
+
+    def _scan_file(self, path: Path) -> Generator[Dict, None, None]:
+        """Search a path already known to be a regular file."""
+        if self.scan_mode == "stream":
+            yield from self._search_stream(path)
+            return
+        if self.scan_mode == "buffer":
+            yield from self._search_buffer(path)
+            return
+        if self.scan_mode == "mmap":
+            yield from self._search_mmap(path)
+            return
+        yield from self._search_lines(path)
+
+    def _search_lines(self, path: Path) -> Generator[Dict, None, None]:
+        """Search a file line by line, yielding each match as soon as it is complete.
+
+        Reading stops once max_count matches and their after-context are in.
+        """
+        if self.before_context > 0 or self.after_context > 0:
+            yield from self._search_stream(path)
+            return
+        if self._folded_literal and not self.invert_match:
+            yield from self._search_folded(path)
+            return
         
-        # Read the entire file to handle context and inversion properly
+        file_name = str(path)
+        match_count = 0
+        stop = self.stop
         with open(path, 'r', encoding='utf-8', errors='replace') as file:
-            lines = file.readlines()
-        
-        # Process lines with context and other options
+            for line_num, line in enumerate(file, 1):
+                if stop is not None and stop.is_set():
+                    break
+                line_content = line.rstrip('\n')
+                if self._matches_pattern(line_content):
+                    yield self._build_result(file_name, line_num, line_content, self._match_spans(line_content))
+                    match_count += 1
+                    
+                    # Check max_count limit
+                    if self.max_count > 0 and match_count >= self.max_count:
+                        break
+
+    def _search_folded(self, path: Path) -> Generator[Dict, None, None]:
+        """Search a file for a case-folded literal a chunk of whole lines at a time.
+
+        Each chunk is lowered once and searched with str.find, as the "buffer"
+        scan mode does with the whole file, so lines without the literal are
+        never split off or lowered one by one. Hits are confirmed against
+        their line, and reading still stops at max_count.
+        """
+        file_name = str(path)
+        literal = self._folded_literal
+        match_count = 0
+        # Number of the first line of the chunk
+        line_num = 1
+        stop = self.stop
+        with open(path, 'r', encoding='utf-8', errors='replace') as file:
+            while True:
+                if stop is not None and stop.is_set():
+                    return
+                chunk = file.read(_FOLD_CHUNK)
+                if not chunk:
+                    return
+                if not chunk.endswith('\n'):
+                    chunk += file.readline()
+                
+                if self._has_fold_hazards(chunk):
+                    # Lowering would shift offsets; test each line instead
+                    lines = chunk.split('\n')
+                    if lines[-1] == '':
+                        lines.pop()
+                    numbered = ((line_num + idx, line) for idx, line in enumerate(lines))
+                else:
+                    numbered = self._folded_hits(chunk, literal, line_num)
+                for num, line in numbered:
+                    if stop is not None and stop.is_set():
+                        return
+                    if self._matches_pattern(line):
+                        yield self._build_result(file_name, num, line, self._match_spans(line))
+                        match_count += 1
+                        if self.max_count > 0 and match_count >= self.max_count:
+                            return
+                line_num += chunk.count('\n')
+
+    @staticmethod
+    def _folded_hits(chunk: str, literal: str, line_num: int) -> Iterator[Tuple[int, str]]:
+        """Yield the numbered lines of a chunk whose lowered text contains the literal."""
+        haystack = chunk.lower()
+        counted = 0
+        hit = haystack.find(literal)
+        while hit >= 0:
+            start = chunk.rfind('\n', 0, hit) + 1
+            end = chunk.find('\n', hit)
+            if end < 0:
+                end = len(chunk)
+            line_num += chunk.count('\n', counted, start)
+            counted = start
+            yield line_num, chunk[start:end]
+            hit = haystack.find(literal, end + 1)
+
+    def _numbered_lines(self, path: Path) -> Generator[Tuple[int, str, bool], None, None]:
+        """Read a file line by line, yielding each line's number, text and whether it is selected."""
+        with open(path, 'r', encoding='utf-8', errors='replace') as file:
+            for line_num, line in enumerate(file, 1):
+                line_content = line.rstrip('\n')
+                yield line_num, line_content, self._matches_pattern(line_content)
+
+    def _search_stream(self, path: Path) -> Generator[Dict, None, None]:
+        """Scan a file incrementally without loading it into memory."""
+        yield from self._emit_stream(str(path), self._numbered_lines(path))
+
+    def _emit_stream(
+        self, file_name: str, numbered_lines: Iterator[Tuple[int, str, bool]]
+    ) -> Generator[Dict, None, None]:
+        """Turn a stream of lines into results, attaching context as it arrives.
+
+        Only the last ``before_context`` lines are kept in a bounded ring, and
+        matches waiting for after-context are held until enough lines have
+        arrived, so memory stays proportional to the context size and the
+        longest line rather than the file size. A jump in line numbers, as in
+        the hunks printed by an external grep, closes any open context.
+
+        Args:
+            file_name: Name reported for every line
+            numbered_lines: Tuples of line number, line and whether the line is selected
+        """
+        with_context = self.before_context > 0 or self.after_context > 0
+        before_ring = deque(maxlen=self.before_context)
+        # Matches still collecting after-context, oldest first: [result, lines_needed]
+        pending = deque()
         match_count = 0
-        matches_with_context = []
+        last_num = None
+        stop = self.stop
         
-        # First pass: find all matching lines
-        for line_idx, line in enumerate(lines):
-            line_content = line.rstrip('\n')
-            line_num = line_idx + 1  # 1-based line numbering
+        for line_num, line_content, selected in numbered_lines:
+            if stop is not None and stop.is_set():
+                return
+            if last_num is not None and line_num != last_num + 1:
+                while pending:
+                    yield pending.popleft()[0]
+                before_ring.clear()
+            last_num = line_num
             
-            # Check if line matches pattern
-            if self._matches_pattern(line_content):
-                # If we're showing context, build a context object
-                if self.before_context > 0 or self.after_context > 0:
-                    # Calculate context line ranges
-                    before_start = max(0, line_idx - self.before_context)
-                    after_end = min(len(lines), line_idx + self.after_context + 1)
-                    
-                    # Get matches for highlighting
-                    matches = []
-                    if self.pattern and not self.invert_match:
-                        for m in self.pattern.finditer(line_content):
-                            matches.append((m.start(), m.end()))
-                    
-                    # Create match result with context
-                    match_with_context = {
-                        "match": {
-                            "file": str(path),
-                            "line": line_content,
-                            "matches": matches
-                        }
-                    }
-                    
-                    # Add line number if requested
-                    if self.line_number:
-                        match_with_context["match"]["line_num"] = line_num
-                    
-                    # Add before context
-                    before_context = []
-                    for j in range(before_start, line_idx):
-                        context_line = {
-                            "file": str(path), 
-                            "line": lines[j].rstrip('\n')
-                        }
-                        if self.line_number:
-                            context_line["line_num"] = j + 1
-                        before_context.append(context_line)
-                    match_with_context["before_context"] = before_context
-                    
-                    # Add after context
-                    after_context = []
-                    for j in range(line_idx + 1, after_end):
-                        context_line = {
-                            "file": str(path), 
-                            "line": lines[j].rstrip('\n')
-                        }
-                        if self.line_number:
-                            context_line["line_num"] = j + 1
-                        after_context.append(context_line)
-                    match_with_context["after_context"] = after_context
-                    
-                    matches_with_context.append(match_with_context)
-                else:
-                    # Simple match without context
-                    match_result = {
-                        "file": str(path),
-                        "line": line_content,
-                    }
-                    
-                    # Add line number if requested
-                    if self.line_number:
-                        match_result["line_num"] = line_num
-                    
-                    # Add match positions if not invert_match
-                    if self.pattern and not self.invert_match:
-                        match_result["matches"] = [
-                            (m.start(), m.end()) for m in self.pattern.finditer(line_content)
-                        ]
-                    else:
-                        match_result["matches"] = []
-                    
-                    yield match_result
-                
+            # Feed this line to every match still waiting for after-context
+            if pending:
+                context_line = self._context_line(file_name, line_num, line_content)
+                for waiting in pending:
+                    waiting[0]["after_context"].append(context_line)
+                    waiting[1] -= 1
+                while pending and pending[0][1] == 0:
+                    yield pending.popleft()[0]
+            
+            limit_reached = self.max_count > 0 and match_count >= self.max_count
+            if limit_reached:
+                # Only keep reading to complete outstanding after-context
+                if not pending:
+                    break
+            elif selected:
+                spans = self._match_spans(line_content)
                 match_count += 1
-                
-                # Check max_count limit
-                if self.max_count > 0 and match_count >= self.max_count:
+                if with_context:
+                    result = self._build_result(
+                        file_name, line_num, line_content, spans, list(before_ring), []
+                    )
+                    if self.after_context > 0:
+                        pending.append([result, self.after_context])
+                    else:
+                        yield result
+                else:
+                    yield self._build_result(file_name, line_num, line_content, spans)
+                    if self.max_count > 0 and match_count >= self.max_count:
+                        break
+            
+            if self.before_context > 0:
+                before_ring.append(self._context_line(file_name, line_num, line_content))
+        
+        # End of input: flush matches with truncated after-context
+        while pending:
+            yield pending.popleft()[0]
+
+    def _emit_hunks(
+        self,
+        file_name: str,
+        numbered_lines: Iterator[Tuple[int, str, bool]],
+        line_number: bool = True,
+        keep: Optional[int] = None
+    ) -> Generator[Dict, None, None]:
+        """Turn a stream of lines into context hunks, as group_context would merge them.
+
+        Each line is built once, when it joins a hunk, however many matches
+        it is context for. Only the last ``before_context`` lines are kept
+        until a match shows whether they belong to a hunk, and a hunk is
+        yielded as soon as no later match can reach it. As in _emit_stream,
+        reading stops at max_count once the after-context is in, and a jump
+        in line numbers closes the open hunk.
+
+        Args:
+            file_name: Name reported for the hunks
+            numbered_lines: Tuples of line number, line and whether the line is selected
+            line_number: Whether to keep line numbers in the hunks
+            keep: As for group_context
+
+        Yields:
+            Dicts with "file" and "lines"
+        """
+        def entry(line_num, line_content):
+            built = {"line_num": line_num} if line_number else {}
+            built["line"] = line_content
+            return built
+
+        def match_entry(line_num, line_content):
+            built = entry(line_num, line_content)
+            built["matches"] = self._match_spans(line_content)
+            if len(self.patterns) > 1:
+                built["patterns"] = self._hit_patterns(line_content)
+            return built
+
+        before_ring = deque(maxlen=self.before_context)
+        hunk = None
+        # Number of the last line in the hunk, and of the last its after-context reaches
+        hunk_end = open_until = 0
+        match_count = 0
+        last_num = None
+        stop = self.stop
+        
+        for line_num, line_content, selected in numbered_lines:
+            if stop is not None and stop.is_set():
+                return
+            if last_num is not None and line_num != last_num + 1:
+                if hunk is not None:
+                    yield hunk
+                    hunk = None
+                before_ring.clear()
+            last_num = line_num
+            
+            if self.max_count > 0 and match_count >= self.max_count:
+                # Only keep reading to complete the after-context
+                if hunk is None or line_num > open_until:
                     break
+                hunk["lines"].append(entry(line_num, line_content))
+                hunk_end = line_num
+                continue
+            
+            if keep is not None and match_count >= keep:
+                # Past the matches kept, the hunk only takes the last one's after-context
+                if selected:
+                    match_count += 1
+                if hunk is not None and line_num <= open_until:
+                    hunk["lines"].append(
+                        match_entry(line_num, line_content) if selected else entry(line_num, line_content)
+                    )
+                    continue
+                if hunk is not None:
+                    yield hunk
+                    hunk = None
+                if selected:
+                    yield {"file": file_name, "lines": [match_entry(line_num, line_content)]}
+                continue
+            
+            if selected:
+                match_count += 1
+                window_start = line_num - len(before_ring)
+                if hunk is not None and window_start > hunk_end + 1:
+                    yield hunk
+                    hunk = None
+                if hunk is None:
+                    hunk = {"file": file_name, "lines": []}
+                    hunk_end = window_start - 1
+                for num, text in before_ring:
+                    if num > hunk_end:
+                        hunk["lines"].append(entry(num, text))
+                hunk["lines"].append(match_entry(line_num, line_content))
+                hunk_end = line_num
+                open_until = line_num + self.after_context
+            elif hunk is not None:
+                if line_num <= open_until:
+                    hunk["lines"].append(entry(line_num, line_content))
+                    hunk_end = line_num
+                elif line_num > open_until + self.before_context:
+                    # No later match's before-context can reach back to the hunk
+                    yield hunk
+                    hunk = None
+            
+            if self.before_context > 0:
+                before_ring.append((line_num, line_content))
         
-        # If we have matches with context, yield them after processing all lines
-        if matches_with_context:
-            for match in matches_with_context[:self.max_count if self.max_count > 0 else None]:
-                yield match
+        if hunk is not None:
+            yield hunk
     
-    def search_files(
-        self, 
-        file_paths: List[Union[str, Path]], 
-        recursive: bool = False,
-        file_pattern: Optional[str] = None
+    def _buffer_hits(
+        self, text: str, lines: List[str], starts: List[int]
+    ) -> Iterator[Tuple[int, List[Tuple[int, int]]]]:
+        """Find the lines of a buffer that match the pattern, ignoring invert_match.
+
+        The pattern (or the literal every match must contain) is searched for
+        over the whole buffer and each hit is mapped back to its line through
+        the table of line start offsets. A hit is confirmed against its line
+        on its own, so matches spanning a newline never select a line, and
+        the search resumes at the next line start.
+
+        Yields:
+            Tuples of 0-based line index and match spans within that line
+        """
+        haystack = text
+        literal = self._prefilter
+        if not self.pattern and not self.ignore_case and len(self.patterns) == 1:
+            literal = self.raw_pattern
+        if literal is None and self._folded_literal is not None and not self._has_fold_hazards(text):
+            # Fold the whole buffer once; offsets still line up with the text
+            haystack = text.lower()
+            literal = self._folded_literal
+        
+        stop = self.stop
+        if literal is None and not self._buffer_pattern:
+            # No whole-buffer search for this pattern; test line by line
+            for line_idx, line in enumerate(lines):
+                if stop is not None and stop.is_set():
+                    return
+                spans = self._find_spans(line)
+                if spans is not None:
+                    yield line_idx, spans
+            return
+        
+        pos = 0
+        end = len(text)
+        while pos <= end:
+            if stop is not None and stop.is_set():
+                return
+            if literal is not None:
+                hit = haystack.find(literal, pos)
+                if hit < 0:
+                    return
+            else:
+                m = self._buffer_pattern.search(text, pos)
+                if m is None:
+                    return
+                hit = m.start()
+            line_idx = bisect_right(starts, hit) - 1
+            if line_idx >= len(lines):
+                return
+            spans = self._find_spans(lines[line_idx])
+            if spans is not None:
+                yield line_idx, spans
+            pos = starts[line_idx + 1]
+
+    def _search_buffer(self, path: Path) -> Generator[Dict, None, None]:
+        """Search a file by running the pattern over its whole contents at once.
+
+        This avoids per-line interpreter overhead when matches are sparse, and
+        yields exactly the same results as the line-based scan modes.
+        """
+        with open(path, 'r', encoding='utf-8', errors='replace') as file:
+            text = file.read()
+        
+        stop = self.stop
+        if stop is not None and stop.is_set():
+            return
+        # Split exactly like readlines() would, without the line terminators
+        lines = text.split('\n')
+        if lines[-1] == '':
+            lines.pop()
+        if stop is not None and stop.is_set():
+            return
+        # starts[i] is the offset of line i; the extra entry marks the buffer end
+        starts = list(accumulate(map((1).__add__, map(len, lines)), initial=0))
+        
+        if self.invert_match:
+            matched = {line_idx for line_idx, _ in self._buffer_hits(text, lines, starts)}
+            
+            def unmatched_lines():
+                for line_idx in range(len(lines)):
+                    if stop is not None and stop.is_set():
+                        return
+                    if line_idx not in matched:
+                        yield line_idx, []
+            selected = unmatched_lines()
+        else:
+            selected = self._buffer_hits(text, lines, starts)
+        
+        file_name = str(path)
+        with_context = self.before_context > 0 or self.after_context > 0
+        match_count = 0
+        for line_idx, spans in selected:
+            if with_context:
+                before = [
+                    self._context_line(file_name, j + 1, lines[j])
+                    for j in range(max(0, line_idx - self.before_context), line_idx)
+                ]
+                after = [
+                    self._context_line(file_name, j + 1, lines[j])
+                    for j in range(line_idx + 1, min(len(lines), line_idx + self.after_context + 1))
+                ]
+                yield self._build_result(
+                    file_name, line_idx + 1, lines[line_idx], spans, before, after
+                )
+            else:
+                yield self._build_result(file_name, line_idx + 1, lines[line_idx], spans)
+            
+            match_count += 1
+            if self.max_count > 0 and match_count >= self.max_count:
+                break
+    
+    def _search_mmap(self, path: Path) -> Generator[Dict, None, None]:
+        """Search a memory-mapped file, falling back to the text reader.
+
+        Empty files, special files, files with carriage returns and patterns
+        without a bytes equivalent are searched with the default line scan.
+        """
+        if (
+            self._bytes_prefilter or self._bytes_folded is not None
+            or self._bytes_pattern or self._bytes_literal is not None
+        ):
+            with open(path, 'rb') as file:
+                try:
+                    buf = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+                except (ValueError, OSError):
+                    buf = None
+                if buf is not None:
+                    with buf:
+                        # Carriage returns need the text reader's newline translation
+                        finder = self._mapped_finder(buf) if buf.find(b'\r') < 0 else None
+                        if finder is not None:
+                            yield from self._search_mapped(str(path), buf, finder)
+                            return
+        yield from self._search_lines(path)
+
+    @staticmethod
+    def _decode_line(buf: mmap.mmap, start: int, end: int) -> str:
+        """Decode one line of a mapped file the way the text reader would."""
+        return buf[start:end].decode('utf-8', errors='replace')
+
+    def _mapped_finder(self, buf: mmap.mmap) -> Optional[Callable[[int], int]]:
+        """Choose how candidate hits are located in a mapped file.
+
+        Returns:
+            A function mapping a start offset to the next candidate offset
+            (-1 when there is none), or None if the mapping cannot be
+            searched directly
+        """
+        literal = self._bytes_prefilter or self._bytes_literal
+        if literal is not None:
+            return lambda pos: buf.find(literal, pos)
+        
+        if self._bytes_folded is not None and not _contains_any(buf, self._bytes_fold_hazards):
+            folded_hits = _find_folded(buf, self._bytes_folded)
+            
+            def next_folded(pos: int) -> int:
+                for hit in folded_hits:
+                    if hit >= pos:
+                        return hit
+                return -1
+            return next_folded
+        
+        # Bytes patterns only fold ASCII case
+        if self._bytes_pattern and not (
+            self.ignore_case and _contains_any(buf, _BYTES_FOLD_HAZARDS)
+        ):
+            def next_match(pos: int) -> int:
+                m = self._bytes_pattern.search(buf, pos)
+                return m.start() if m else -1
+            return next_match
+        return None
+
+    def _mapped_hits(
+        self, buf: mmap.mmap, finder: Callable[[int], int]
+    ) -> Iterator[Tuple[int, int, int, str, List[Tuple[int, int]]]]:
+        """Find the lines of a mapped file that match the pattern, ignoring invert_match.
+
+        Candidates are located directly in the mapping; only the line around
+        each one is decoded and confirmed with the text pattern.
+
+        Yields:
+            Tuples of line number, line start and end offsets, decoded line and spans
+        """
+        size = len(buf)
+        pos = 0
+        line_num = 1
+        counted = 0
+        stop = self.stop
+        while pos <= size:
+            if stop is not None and stop.is_set():
+                return
+            hit = finder(pos)
+            if hit < 0:
+                return
+            start = buf.rfind(b'\n', 0, hit) + 1
+            if start >= size:
+                # Past the final newline there is no line left
+                return
+            end = buf.find(b'\n', hit)
+            if end < 0:
+                end = size
+            line_num += _count_newlines(buf, counted, start)
+            counted = start
+            
+            line = self._decode_line(buf, start, end)
+            spans = self._find_spans(line)
+            if spans is not None:
+                yield line_num, start, end, line, spans
+            pos = end + 1
+
+    def _search_mapped(
+        self, file_name: str, buf: mmap.mmap, finder: Callable[[int], int]
     ) -> Generator[Dict, None, None]:
-        """Search for pattern in multiple files.
+        """Search the contents of a memory-mapped file.
+
+        Lines end at b"\\n", and character classes in the pattern follow
+        ASCII rules on the raw bytes.
+        """
+        size = len(buf)
+        if self.invert_match:
+            matched = {start for _, start, _, _, _ in self._mapped_hits(buf, finder)}
+            
+            def selected_lines():
+                line_num = 0
+                start = 0
+                while start < size and not (self.stop is not None and self.stop.is_set()):
+                    end = buf.find(b'\n', start)
+                    if end < 0:
+                        end = size
+                    line_num += 1
+                    if start not in matched:
+                        yield line_num, start, end, self._decode_line(buf, start, end), []
+                    start = end + 1
+            selected = selected_lines()
+        else:
+            selected = self._mapped_hits(buf, finder)
+        
+        with_context = self.before_context > 0 or self.after_context > 0
+        match_count = 0
+        for line_num, start, end, line, spans in selected:
+            if with_context:
+                before = []
+                ctx_start, ctx_num = start, line_num
+                while len(before) < self.before_context and ctx_start > 0:
+                    ctx_end = ctx_start - 1
+                    ctx_start = buf.rfind(b'\n', 0, ctx_end) + 1
+                    ctx_num -= 1
+                    before.append(self._context_line(
+                        file_name, ctx_num, self._decode_line(buf, ctx_start, ctx_end)
+                    ))
+                before.reverse()
+                
+                after = []
+                ctx_end, ctx_num = end, line_num
+                while len(after) < self.after_context and ctx_end + 1 < size:
+                    ctx_start = ctx_end + 1
+                    ctx_end = buf.find(b'\n', ctx_start)
+                    if ctx_end < 0:
+                        ctx_end = size
+                    ctx_num += 1
+                    after.append(self._context_line(
+                        file_name, ctx_num, self._decode_line(buf, ctx_start, ctx_end)
+                    ))
+                yield self._build_result(file_name, line_num, line, spans, before, after)
+            else:
+                yield self._build_result(file_name, line_num, line, spans)
+            
+            match_count += 1
+            if self.max_count > 0 and match_count >= self.max_count:
+                break
+    
+    def _iter_files(
+        self,
+        file_paths: List[Union[str, Path]],
+        recursive: bool = False,
+        file_pattern: Optional[str] = None,
+        no_ignore: bool = False,
+        include: Optional[List[str]] = None,
+        exclude: Optional[List[str]] = None,
+        types: Optional[List[str]] = None,
+        type_not: Optional[List[str]] = None,
+        type_add: Optional[List[str]] = None
+    ) -> Generator[Union[str, Path], None, None]:
+        """Expand paths, directories and globs into the files to search, in order.
 
         Args:
-            file_paths: List of file paths to search in
-            recursive: Whether to search directories recursively
+            file_paths: List of file paths, directories or glob patterns
+            recursive: Whether to descend into directories recursively
             file_pattern: Optional pattern to filter files (e.g., "*.txt")
+            no_ignore: Also list files excluded by .gitignore and .ignore files
+            include: Globs relative to each directory searched that files must match
+            exclude: Globs relative to each directory searched to skip
+            types: File types to list (e.g., ["py", "config"])
+            type_not: File types to leave out
+            type_add: Extra file types, as "name:glob,glob"
 
         Yields:
-            Dict containing file path, line number, matched line, and match spans
+            Paths of regular files, which need no further checks before opening,
+            until the stop event is set
         """
-        # Track total matches for max_count across all files
-        total_matches = 0
-        
-        # Process each path
+        walker = FileWalker(file_pattern, no_ignore, include, exclude, types, type_not, type_add)
+        sources = walker.sources = self.sources
+        stop = self.stop
         for path in file_paths:
+            if stop is not None and stop.is_set():
+                return
             path_obj = Path(path)
+            if sources is not None:
+                sources.append(str(path))
             
             # Handle directory case with recursion
             if path_obj.is_dir():
                 if recursive:
-                    # Walk through the directory recursively
-                    for root, _, files in os.walk(path):
-                        for file in files:
-                            # Skip files that don't match the pattern
-                            if file_pattern and not fnmatch.fnmatch(file, file_pattern):
-                                continue
-                                
-                            file_path = os.path.join(root, file)
-                            try:
-                                for result in self.search_file(file_path):
-                                    yield result
-                                    total_matches += 1
-                                    
-                                    # Check overall max_count
-                                    if self.max_count > 0 and total_matches >= self.max_count:
-                                        return
-                            except Exception as e:
-                                print(f"Error searching {file_path}: {e}")
+                    files = walker.walk(str(path))
                 else:
                     # If not recursive, just search files in the top directory
-                    for item in path_obj.iterdir():
-                        if item.is_file():
-                            # Skip files that don't match the pattern
-                            if file_pattern and not fnmatch.fnmatch(item.name, file_pattern):
-                                continue
-                                
-                            try:
-                                for result in self.search_file(item):
-                                    yield result
-                                    total_matches += 1
-                                    
-                                    # Check overall max_count
-                                    if self.max_count > 0 and total_matches >= self.max_count:
-                                        return
-                            except Exception as e:
-                                print(f"Error searching {item}: {e}")
+                    files = walker.list_dir(str(path_obj))
             # Handle single file case
             elif path_obj.is_file():
                 # Skip files that don't match the pattern
                 if file_pattern and not fnmatch.fnmatch(path_obj.name, file_pattern):
                     continue
-                    
-                try:
-                    for result in self.search_file(path_obj):
-                        yield result
-                        total_matches += 1
-                        
-                        # Check overall max_count
-                        if self.max_count > 0 and total_matches >= self.max_count:
-                            return
-                except Exception as e:
-                    print(f"Error searching {path_obj}: {e}")
+                yield path_obj
+                continue
             # Handle file pattern case (glob)
             elif "*" in str(path) or "?" in str(path):
                 # Get the directory part and the pattern part
                 dir_part = os.path.dirname(path) or "."
                 base_pattern = os.path.basename(path)
                 
-                # Override file_pattern if the path itself has a pattern
-                effective_file_pattern = base_pattern
-                
                 # Search files in the directory that match the pattern
-                dir_path = Path(dir_part)
-                if dir_path.exists() and dir_path.is_dir():
-                    for item in dir_path.iterdir():
-                        if item.is_file() and fnmatch.fnmatch(item.name, effective_file_pattern):
-                            try:
-                                for result in self.search_file(item):
-                                    yield result
-                                    total_matches += 1
-                                    
-                                    # Check overall max_count
-                                    if self.max_count > 0 and total_matches >= self.max_count:
-                                        return
-                            except Exception as e:
-                                print(f"Error searching {item}: {e}")
+                if sources is not None:
+                    sources.append(dir_part)
+                if not os.path.isdir(dir_part):
+                    continue
+                files = walker.list_dir(dir_part, base_pattern)
             else:
                 print(f"Path not found or invalid: {path}")
+                continue
+            if sources is None and stop is None:
+                yield from files
+                continue
+            for file_path in files:
+                if stop is not None and stop.is_set():
+                    return
+                if sources is not None:
+                    sources.append(file_path)
+                yield file_path
+
+    def _collect_file(self, file_path: Union[str, Path], stop: threading.Event, out: queue.Queue) -> None:
+        """Search one file on a worker thread, passing its results on as they are found.
+
+        The queue is bounded, so a file never gets far ahead of the consumer.
+        It ends with _FILE_DONE, or with the exception that ended the search.
+        """
+        def put(item) -> bool:
+            while not stop.is_set():
+                try:
+                    out.put(item, timeout=_STOP_POLL)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        try:
+            for result in self._scan_file(Path(file_path)):
+                if not put(result):
+                    return
+        except Exception as e:
+            put(e)
+            return
+        put(_FILE_DONE)
+
+    def _drain_file(self, out: queue.Queue) -> Generator[Dict, None, None]:
+        """Yield the results a worker thread passes on for one file, re-raising its error."""
+        stop = self.stop
+        while stop is None or not stop.is_set():
+            try:
+                item = out.get(timeout=_STOP_POLL)
+            except queue.Empty:
+                continue
+            if item is _FILE_DONE:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    def _search_threaded(
+        self, files: Iterator[Union[str, Path]], workers: int
+    ) -> Generator[Tuple[Union[str, Path], Iterator[Dict]], None, None]:
+        """Search files on a thread pool, yielding each file's results in input order.
+
+        Only a bounded window of files is in flight at once, and results are
+        passed on while their file is still being searched. When the consumer
+        stops early or the stop event is set, queued files are cancelled and
+        running ones are told to stop.
+
+        Yields:
+            Each file's path and an iterator over its results, which raises
+            the error that ended its search, if any
+        """
+        stop = threading.Event()
+        window = workers * 4
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            try:
+                for file_path in files:
+                    out = queue.Queue(_QUEUED_RESULTS)
+                    pending.append((file_path, out, executor.submit(self._collect_file, file_path, stop, out)))
+                    while len(pending) >= window:
+                        done_path, out, _ = pending.popleft()
+                        yield done_path, self._drain_file(out)
+                while pending:
+                    done_path, out, _ = pending.popleft()
+                    yield done_path, self._drain_file(out)
+            finally:
+                stop.set()
+                for _, _, future in pending:
+                    future.cancel()
+
+    def _search_processes(
+        self, files: Iterator[Union[str, Path]], workers: int
+    ) -> Generator[Tuple[Union[str, Path], Iterator[Dict]], None, None]:
+        """Search files on a process pool, yielding each file's results in input order.
+
+        Files are grouped into batches of bounded total size so that each
+        round trip to a worker carries enough work to outweigh its overhead.
+        The searcher itself is sent once per worker, not once per batch.
+        With max_count, each batch stops at the matches still wanted when
+        it was sent. Once the stop event is set, no more outcomes are
+        collected, queued batches are cancelled and the pool is shut down
+        without waiting for the batches still running.
+
+        Yields:
+            Each file's path and an iterator over its results, which raises
+            the error that ended its search, if any
+        """
+        def batches():
+            batch = []
+            batch_bytes = 0
+            for file_path in files:
+                try:
+                    size = os.path.getsize(file_path)
+                except OSError:
+                    size = 0
+                batch.append(str(file_path))
+                batch_bytes += size
+                if batch_bytes >= _BATCH_BYTES or len(batch) >= _BATCH_FILES:
+                    yield batch
+                    batch = []
+                    batch_bytes = 0
+            if batch:
+                yield batch
+        
+        window = workers * 2
+        pending = deque()
+        stop = self.stop
+        executor = ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_process_worker, initargs=(self,)
+        )
+        
+        collected = 0
+        
+        def expand(file_name, records, error):
+            nonlocal collected
+            for record in records:
+                collected += 1
+                yield self._expand_record(file_name, record)
+            if error is not None:
+                raise RuntimeError(error)
+        
+        def drain(future):
+            if not _wait_unless_stopped(future, stop):
+                return
+            for file_path, records, error in future.result():
+                if stop is not None and stop.is_set():
+                    return
+                yield file_path, expand(str(Path(file_path)), records, error)
+        
+        try:
+            for batch in batches():
+                if stop is not None and stop.is_set():
+                    return
+                limit = max(self.max_count - collected, 1) if self.max_count > 0 else 0
+                pending.append(executor.submit(_search_process_batch, batch, limit))
+                while len(pending) >= window:
+                    yield from drain(pending.popleft())
+            while pending and not (stop is not None and stop.is_set()):
+                yield from drain(pending.popleft())
+        finally:
+            # Queued batches are dropped; running ones are only waited for
+            # when the search was not stopped
+            executor.shutdown(wait=stop is None or not stop.is_set(), cancel_futures=True)
+
+    def search_files(
+        self, 
+        file_paths: List[Union[str, Path]], 
+        recursive: bool = False,
+        file_pattern: Optional[str] = None,
+        workers: int = 1,
+        executor: str = "thread",
+        no_ignore: bool = False,
+        include: Optional[List[str]] = None,
+        exclude: Optional[List[str]] = None,
+        types: Optional[List[str]] = None,
+        type_not: Optional[List[str]] = None,
+        type_add: Optional[List[str]] = None,
+        index: Optional["TrigramIndex"] = None
+    ) -> Generator[Dict, None, None]:
+        """Search for pattern in multiple files.
+
+        Args:
+            file_paths: List of file paths to search in
+            recursive: Whether to search directories recursively
+            file_pattern: Optional pattern to filter files (e.g., "*.txt")
+            workers: Number of files to search concurrently; results are
+                still yielded in file order
+            executor: "thread" for a thread pool, or "process" to spread
+                CPU-bound regex work over processes in size-bounded batches
+            no_ignore: Also search files excluded by .gitignore, .ignore and
+                git's global excludes
+            include: Globs such as "src/**/*.py" that files under a directory
+                must match; "!glob" excludes instead
+            exclude: Globs such as "**/tests/**" for files and directories to
+                skip; excluded directories are never listed
+            types: File types to search (e.g., ["py", "config"]), so one walk
+                covers a whole family of extensions
+            type_not: File types to skip
+            type_add: Extra file types, as "name:glob,glob"
+            index: Trigram index used to skip files that cannot contain a match
+
+        Yields:
+            Dict containing file path, line number, matched line, and match spans
+        """
+        # Track total matches for max_count across all files
+        total_matches = 0
+        files = self._iter_files(
+            file_paths, recursive, file_pattern, no_ignore, include, exclude, types, type_not, type_add
+        )
+        if index is not None:
+            files = index.candidates(files, self.literal_alternatives(), self.ignore_case)
+        
+        if executor not in EXECUTORS:
+            raise ValueError(f"Unknown executor: {executor}")
+        
+        if workers > 1:
+            if executor == "process":
+                outcomes = self._search_processes(files, workers)
+            else:
+                outcomes = self._search_threaded(files, workers)
+            for file_path, results in outcomes:
+                try:
+                    for result in results:
+                        yield result
+                        total_matches += 1
+                        
+                        # Check overall max_count
+                        if self.max_count > 0 and total_matches >= self.max_count:
+                            return
+                except Exception as e:
+                    print(f"Error searching {file_path}: {e}")
+            return
+        
+        for file_path in files:
+            try:
+                for result in self._scan_file(Path(file_path)):
+                    yield result
+                    total_matches += 1
+                    
+                    # Check overall max_count
+                    if self.max_count > 0 and total_matches >= self.max_count:
+                        return
+            except Exception as e:
+                print(f"Error searching {file_path}: {e}")
+
+    def _count_file(self, path: Path, limit: int = 0) -> int:
+        """Count the selected lines of a file without building any results.
+
+        Lines are only tested against the pattern; no spans, result dicts or
+        context lines are made. Reading stops once ``limit`` lines are
+        counted, when it is positive. Counting every line of a file searches
+        its whole contents at once where the pattern allows, as the
+        "buffer" scan mode does, unless the scan mode is "stream".
+        """
+        if limit != 1 and not self.invert_match and self.scan_mode != "stream":
+            literal = self._prefilter
+            if not self.pattern and not self.ignore_case and len(self.patterns) == 1:
+                literal = self.raw_pattern
+            if literal or self._buffer_pattern:
+                with open(path, 'r', encoding='utf-8', errors='replace') as file:
+                    return self._count_buffer(file.read(), literal, limit)
+        
+        count = 0
+        matches = self._matches_pattern
+        stop = self.stop
+        with open(path, 'r', encoding='utf-8', errors='replace') as file:
+            for line in file:
+                if stop is not None and stop.is_set():
+                    break
+                if matches(line.rstrip('\n')):
+                    count += 1
+                    if count == limit:
+                        break
+        return count
+
+    def _count_buffer(self, text: str, literal: Optional[str], limit: int) -> int:
+        """Count the lines of a buffer that match, searching for hits across line boundaries.
+
+        Each hit of the literal (or of the whole-buffer pattern) is confirmed
+        against its line, unless the pattern is that literal, and the search
+        resumes at the next line.
+        """
+        confirm = (
+            not literal or "\n" in literal
+            or self.pattern is not None and self.pattern.pattern != re.escape(literal)
+        )
+        count = 0
+        pos = 0
+        size = len(text)
+        stop = self.stop
+        while pos <= size:
+            if stop is not None and stop.is_set():
+                break
+            if literal:
+                hit = text.find(literal, pos)
+                if hit < 0:
+                    break
+            else:
+                m = self._buffer_pattern.search(text, pos)
+                if m is None:
+                    break
+                hit = m.start()
+            start = text.rfind('\n', 0, hit) + 1
+            if start >= size:
+                # Past the final newline there is no line left
+                break
+            end = text.find('\n', hit)
+            if end < 0:
+                end = size
+            if not confirm or self._matches_pattern(text[start:end]):
+                count += 1
+                if count == limit:
+                    break
+            pos = end + 1
+        return count
+
+    @staticmethod
+    def _file_summary(file_name: str, count: int, mode: str) -> Optional[Dict]:
+        """Build the summary of a file with ``count`` selected lines, or None if it is not listed."""
+        if mode == "files_without_match":
+            return None if count else {"file": file_name}
+        if not count:
+            return None
+        if mode == "count":
+            return {"file": file_name, "count": count}
+        return {"file": file_name}
+
+    def search_hunks(
+        self,
+        file_paths: List[Union[str, Path]],
+        recursive: bool = False,
+        file_pattern: Optional[str] = None,
+        workers: int = 1,
+        executor: str = "thread",
+        no_ignore: bool = False,
+        include: Optional[List[str]] = None,
+        exclude: Optional[List[str]] = None,
+        types: Optional[List[str]] = None,
+        type_not: Optional[List[str]] = None,
+        type_add: Optional[List[str]] = None,
+        index: Optional["TrigramIndex"] = None,
+        line_number: bool = True,
+        keep: Optional[int] = None
+    ) -> Generator[Dict, None, None]:
+        """Search multiple files, yielding context hunks like group_context(search_files(...)).
+
+        In the "lines" and "stream" scan modes on a single worker, hunks are
+        built straight from each file's lines, so a line shared by the context
+        of several matches is built once. Other scan modes and worker pools
+        merge the results of search_files instead. max_count applies to the
+        matches across all files.
+
+        Args:
+            file_paths: List of file paths to search in
+            recursive: Whether to search directories recursively
+            file_pattern: Optional pattern to filter files (e.g., "*.txt")
+            workers: As for search_files
+            executor: As for search_files
+            no_ignore: Also search files excluded by ignore files
+            include: Globs that files under a directory must match
+            exclude: Globs for files and directories to skip
+            types: File types to search
+            type_not: File types to skip
+            type_add: Extra file types, as "name:glob,glob"
+            index: Trigram index used to skip files that cannot contain a match
+            line_number: Whether to keep line numbers in the hunks
+            keep: Merge only this many matches with their context, across
+                all files, as for group_context
+
+        Yields:
+            Dicts with "file" and "lines"
+        """
+        if workers > 1 or self.scan_mode not in ("lines", "stream"):
+            yield from group_context(self.search_files(
+                file_paths, recursive, file_pattern, workers, executor, no_ignore,
+                include, exclude, types, type_not, type_add, index
+            ), line_number, keep)
+            return
+        files = self._iter_files(
+            file_paths, recursive, file_pattern, no_ignore, include, exclude, types, type_not, type_add
+        )
+        if index is not None:
+            files = index.candidates(files, self.literal_alternatives(), self.ignore_case)
+        
+        def numbered_lines(path):
+            try:
+                yield from self._numbered_lines(path)
+            except Exception as e:
+                print(f"Error searching {path}: {e}")
+        
+        yield from self._hunks_over(
+            ((str(Path(file_path)), numbered_lines(Path(file_path))) for file_path in files),
+            line_number, keep
+        )
+
+    def _hunks_over(
+        self,
+        files: Iterator[Tuple[str, Iterator[Tuple[int, str, bool]]]],
+        line_number: bool,
+        keep: Optional[int] = None
+    ) -> Generator[Dict, None, None]:
+        """Build the hunks of each file's line stream, applying max_count and keep across files."""
+        total_matches = 0
+        stop = self.stop
+        for file_name, numbered_lines in files:
+            if stop is not None and stop.is_set():
+                return
+            searcher = self
+            if self.max_count > 0:
+                searcher = copy.copy(self)
+                searcher.max_count = self.max_count - total_matches
+            file_keep = max(keep - total_matches, 0) if keep is not None else None
+            for hunk in searcher._emit_hunks(file_name, numbered_lines, line_number, file_keep):
+                yield hunk
+                total_matches += sum("matches" in line for line in hunk["lines"])
+            if self.max_count > 0 and total_matches >= self.max_count:
+                return
+
+    def summarize_files(
+        self,
+        file_paths: List[Union[str, Path]],
+        mode: str = "count",
+        recursive: bool = False,
+        file_pattern: Optional[str] = None,
+        no_ignore: bool = False,
+        include: Optional[List[str]] = None,
+        exclude: Optional[List[str]] = None,
+        types: Optional[List[str]] = None,
+        type_not: Optional[List[str]] = None,
+        type_add: Optional[List[str]] = None,
+        index: Optional["TrigramIndex"] = None
+    ) -> Generator[Dict, None, None]:
+        """Report each file as a whole instead of its lines, like grep -c, -l and -L.
+
+        "count" yields the number of selected lines of every file that has
+        any, counting at most max_count per file as grep -c -m does.
+        "files_with_matches" names the files with a selected line and
+        "files_without_match" the others; both stop reading a file at its
+        first selected line.
+
+        Args:
+            file_paths: List of file paths to search in
+            mode: One of FILE_MODES
+            recursive: Whether to search directories recursively
+            file_pattern: Optional pattern to filter files (e.g., "*.txt")
+            no_ignore: Also search files excluded by ignore files
+            include: Globs that files under a directory must match
+            exclude: Globs for files and directories to skip
+            types: File types to search
+            type_not: File types to skip
+            type_add: Extra file types, as "name:glob,glob"
+            index: Trigram index used to skip files that cannot contain a
+                match; not used for "files_without_match", which lists them
+
+        Yields:
+            Dict with the file path, and its "count" in count mode
+        """
+        if mode not in FILE_MODES:
+            raise ValueError(f"Unknown file mode: {mode}")
+        files = self._iter_files(
+            file_paths, recursive, file_pattern, no_ignore, include, exclude, types, type_not, type_add
+        )
+        if index is not None and mode != "files_without_match":
+            files = index.candidates(files, self.literal_alternatives(), self.ignore_case)
+        
+        limit = self.max_count if mode == "count" else 1
+        for file_path in files:
+            try:
+                count = self._count_file(Path(file_path), limit)
+            except Exception as e:
+                print(f"Error searching {file_path}: {e}")
+                continue
+            summary = self._file_summary(str(Path(file_path)), count, mode)
+            if summary is not None:
+                yield summary
+
+    def search_page(
+        self,
+        file_paths: List[Union[str, Path]],
+        page_size: int,
+        position: Optional[PagePosition] = None,
+        recursive: bool = False,
+        file_pattern: Optional[str] = None,
+        no_ignore: bool = False,
+        include: Optional[List[str]] = None,
+        exclude: Optional[List[str]] = None,
+        types: Optional[List[str]] = None,
+        type_not: Optional[List[str]] = None,
+        type_add: Optional[List[str]] = None,
+        index: Optional["TrigramIndex"] = None
+    ) -> Tuple[List[Dict], Optional[PagePosition]]:
+        """Search for one page of results, stopping as soon as the page is full.
+
+        Files are read line by line from a byte offset, so the next page
+        seeks straight to where this one stopped instead of rescanning the
+        file. Reading resumes ``before_context`` lines early so the next
+        match still gets its context, but those lines are never selected.
+
+        Args:
+            file_paths: List of file paths to search in
+            page_size: Number of results per page
+            position: Where to resume, as returned for the previous page
+            recursive: Whether to search directories recursively
+            file_pattern: Optional pattern to filter files (e.g., "*.txt")
+            no_ignore: Also search files excluded by ignore files
+            include: Globs that files under a directory must match
+            exclude: Globs for files and directories to skip
+            types: File types to search
+            type_not: File types to skip
+            type_add: Extra file types, as "name:glob,glob"
+            index: Trigram index used to skip files that cannot contain a match
+
+        Returns:
+            The page's results and the position of the next page, or None
+            when there are no more results
+        """
+        file_index, offset, first_line, first_selectable, total = position or (0, 0, 1, 1, 0)
+        files = self._iter_files(
+            file_paths, recursive, file_pattern, no_ignore, include, exclude, types, type_not, type_add
+        )
+        if index is not None:
+            files = index.candidates(files, self.literal_alternatives(), self.ignore_case)
+        
+        page = []
+        for current, file_path in enumerate(files):
+            if current < file_index:
+                continue
+            if current > file_index:
+                offset, first_line, first_selectable = 0, 1, 1
+            limit = page_size - len(page)
+            if self.max_count > 0:
+                limit = min(limit, self.max_count - total - len(page))
+            searcher = copy.copy(self)
+            searcher.max_count = limit
+            
+            # Start offsets of the lines that may begin the next page
+            starts = deque(maxlen=self.before_context + self.after_context + 2)
+            last_selected = [0, 0]  # selected line count and number of the last one
+            next_start = [offset]
+            
+            def numbered_lines():
+                line_num = first_line
+                for start, end, line_content in _read_lines_at(file_path, offset):
+                    starts.append((line_num, start))
+                    next_start[0] = end
+                    selected = line_num >= first_selectable and self._matches_pattern(line_content)
+                    if selected and last_selected[0] < limit:
+                        last_selected[0] += 1
+                        last_selected[1] = line_num
+                    yield line_num, line_content, selected
+                    line_num += 1
+            
+            try:
+                page.extend(searcher._emit_stream(str(Path(file_path)), numbered_lines()))
+            except Exception as e:
+                print(f"Error searching {file_path}: {e}")
+                continue
+            if self.max_count > 0 and total + len(page) >= self.max_count:
+                return page, None
+            if len(page) >= page_size:
+                resume = last_selected[1] + 1
+                target = max(first_line, resume - self.before_context)
+                known = dict(starts)
+                resume_offset = known.get(target, next_start[0])
+                return page, (current, resume_offset, target, resume, total + len(page))
+        return page, None
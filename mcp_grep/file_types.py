@@ -0,0 +1,126 @@
+"""File type presets for selecting whole language families at once."""
+
+import re
+import fnmatch
+from typing import Dict, FrozenSet, List, Optional
+
+# Built-in file types and the file name globs that belong to each
+FILE_TYPES: Dict[str, List[str]] = {
+    "c": ["*.c", "*.h"],
+    "config": ["*.cfg", "*.conf", "*.config", "*.ini", "*.properties", "*.toml", "*.yaml", "*.yml", ".env"],
+    "cpp": ["*.cc", "*.cpp", "*.cxx", "*.c++", "*.h", "*.hh", "*.hpp", "*.hxx", "*.inl"],
+    "cs": ["*.cs", "*.csx"],
+    "css": ["*.css", "*.less", "*.sass", "*.scss"],
+    "docker": ["Dockerfile", "*.dockerfile", "Dockerfile.*"],
+    "go": ["*.go"],
+    "html": ["*.htm", "*.html", "*.xhtml"],
+    "java": ["*.java"],
+    "js": ["*.js", "*.jsx", "*.cjs", "*.mjs", "*.vue"],
+    "json": ["*.json", "*.jsonl"],
+    "kotlin": ["*.kt", "*.kts"],
+    "log": ["*.log"],
+    "make": ["Makefile", "makefile", "GNUmakefile", "*.mk", "*.mak"],
+    "md": ["*.md", "*.markdown", "*.mdx"],
+    "php": ["*.php"],
+    "py": ["*.py", "*.pyi", "*.pyw", "*.pyx", "*.pxd"],
+    "rb": ["*.rb", "*.gemspec", "Gemfile", "Rakefile"],
+    "rust": ["*.rs"],
+    "sh": ["*.sh", "*.bash", "*.zsh", "*.ksh"],
+    "sql": ["*.sql"],
+    "swift": ["*.swift"],
+    "toml": ["*.toml"],
+    "ts": ["*.ts", "*.tsx", "*.cts", "*.mts"],
+    "txt": ["*.txt"],
+    "xml": ["*.xml", "*.xsd", "*.xsl", "*.xslt"],
+    "yaml": ["*.yaml", "*.yml"],
+}
+
+_GLOB_CHARS = re.compile(r"[*?\[\\]")
+
+
+class _NameSet:
+    """File name globs split into hash sets of extensions and basenames.
+
+    Only globs that are neither ``*.ext`` nor a plain name fall back to a
+    combined regex.
+    """
+
+    def __init__(self, globs: List[str]):
+        extensions = set()
+        basenames = set()
+        others = []
+        for glob in globs:
+            if glob.startswith("*.") and not _GLOB_CHARS.search(glob[2:]):
+                extensions.add(glob[2:])
+            elif not _GLOB_CHARS.search(glob):
+                basenames.add(glob)
+            else:
+                others.append(fnmatch.translate(glob))
+        self.extensions: FrozenSet[str] = frozenset(extensions)
+        self.basenames: FrozenSet[str] = frozenset(basenames)
+        self.pattern = re.compile("|".join(others)) if others else None
+
+    def __contains__(self, name: str) -> bool:
+        if name in self.basenames:
+            return True
+        # Try every suffix after a dot, so "a.tar.gz" checks "tar.gz" and "gz"
+        dot = name.find(".")
+        while dot >= 0:
+            if name[dot + 1:] in self.extensions:
+                return True
+            dot = name.find(".", dot + 1)
+        return self.pattern is not None and self.pattern.match(name) is not None
+
+
+class TypeFilter:
+    """Selects files by type name, such as "py" or "config".
+
+    Each selection is compiled once, so testing a file name costs a few
+    set lookups however many types and globs are involved.
+    """
+
+    def __init__(
+        self,
+        types: Optional[List[str]] = None,
+        type_not: Optional[List[str]] = None,
+        type_add: Optional[List[str]] = None
+    ):
+        """Compile the selected types.
+
+        Args:
+            types: Types a file must belong to one of
+            type_not: Types a file must not belong to
+            type_add: Extra definitions of the form "name:glob,glob"; an
+                existing name gains the extra globs
+        """
+        definitions = {name: list(globs) for name, globs in FILE_TYPES.items()}
+        for spec in type_add or []:
+            name, _, globs = spec.partition(":")
+            name = name.strip()
+            globs = [glob.strip() for glob in globs.split(",") if glob.strip()]
+            if not name or not globs:
+                raise ValueError(f"Invalid file type definition: {spec}")
+            definitions.setdefault(name, []).extend(globs)
+
+        self._include = self._compile(types, definitions)
+        self._exclude = self._compile(type_not, definitions)
+
+    @staticmethod
+    def _compile(names: Optional[List[str]], definitions: Dict[str, List[str]]) -> Optional[_NameSet]:
+        if not names:
+            return None
+        globs = []
+        for name in names:
+            if name not in definitions:
+                raise ValueError(f"Unknown file type: {name}")
+            globs.extend(definitions[name])
+        return _NameSet(globs)
+
+    def __bool__(self) -> bool:
+        return self._include is not None or self._exclude is not None
+
+    def allows(self, name: str) -> bool:
+        """Check whether a file name belongs to the selected types."""
+        if self._exclude is not None and name in self._exclude:
+            return False
+        return self._include is None or name in self._include
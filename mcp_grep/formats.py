@@ -0,0 +1,104 @@
+"""Encodings of grep results for tool responses."""
+
+import json
+from typing import Any, Dict, List
+
+# Output formats of the grep tool
+OUTPUT_FORMATS = ("json", "columnar", "grep")
+
+
+def _dumps(value: Any) -> str:
+    """Serialise to JSON without any whitespace between tokens."""
+    return json.dumps(value, separators=(",", ":"))
+
+
+def encode_json(results: List[Dict]) -> str:
+    """Encode results as a JSON list of result dicts, as search_files yields them."""
+    return _dumps(results)
+
+
+def encode_columnar(groups: List[Dict]) -> str:
+    """Encode context groups as a file table plus per-file columns.
+
+    Each path is written once. For the file at position i of "files", the
+    i-th entries of "line_nums", "lines" and "matches" list its lines in
+    order; context lines have null instead of match spans. "line_nums" is
+    left out without line numbers, and "patterns" is present only when
+    several patterns were searched.
+
+    Args:
+        groups: Groups from group_context
+    """
+    files: Dict[str, int] = {}
+    line_nums: List[List[int]] = []
+    lines: List[List[str]] = []
+    matches: List[List[Any]] = []
+    patterns: List[List[Any]] = []
+    has_line_nums = has_patterns = False
+    for group in groups:
+        index = files.setdefault(group["file"], len(files))
+        if index == len(lines):
+            for column in (line_nums, lines, matches, patterns):
+                column.append([])
+        for line in group["lines"]:
+            if "line_num" in line:
+                has_line_nums = True
+                line_nums[index].append(line["line_num"])
+            lines[index].append(line["line"])
+            matches[index].append(line.get("matches"))
+            if "patterns" in line:
+                has_patterns = True
+            patterns[index].append(line.get("patterns"))
+
+    table: Dict[str, Any] = {"files": list(files)}
+    if has_line_nums:
+        table["line_nums"] = line_nums
+    table["lines"] = lines
+    table["matches"] = matches
+    if has_patterns:
+        table["patterns"] = patterns
+    return _dumps(table)
+
+
+def encode_grep(groups: List[Dict], separators: bool = False) -> str:
+    """Encode context groups as grep prints them.
+
+    Selected lines are written ``path:line:text`` and context lines
+    ``path-line-text``, or without the line number when there is none.
+
+    Args:
+        groups: Groups from group_context
+        separators: Write "--" between groups, as grep does with context
+    """
+    out = []
+    for group in groups:
+        if separators and out:
+            out.append("--")
+        path = group["file"]
+        for line in group["lines"]:
+            sep = ":" if "matches" in line else "-"
+            if "line_num" in line:
+                out.append(f"{path}{sep}{line['line_num']}{sep}{line['line']}")
+            else:
+                out.append(f"{path}{sep}{line['line']}")
+    return "\n".join(out)
+
+
+def encode_summaries(summaries: List[Dict], output_format: str = "json") -> str:
+    """Encode per-file summaries from MCPGrep.summarize_files.
+
+    The "columnar" format lists the paths under "files" and, in count mode,
+    their counts under "counts"; the "grep" format writes ``path:count`` or
+    just the path on each line, as grep -c, -l and -L do.
+    """
+    if output_format == "grep":
+        return "\n".join(
+            f"{summary['file']}:{summary['count']}" if "count" in summary else summary["file"]
+            for summary in summaries
+        )
+    if output_format == "columnar":
+        table: Dict[str, Any] = {"files": [summary["file"] for summary in summaries]}
+        if any("count" in summary for summary in summaries):
+            table["counts"] = [summary["count"] for summary in summaries]
+        return _dumps(table)
+    return _dumps(summaries)
@@ -0,0 +1,209 @@
+"""Parsing and matching of .gitignore-style ignore files."""
+
+import os
+import re
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+# Ignore files read in every directory, lowest precedence first
+IGNORE_FILES = (".gitignore", ".ignore")
+
+# Directories that are never searched while ignore rules are in effect
+ALWAYS_IGNORED = frozenset({".git"})
+
+
+def glob_to_regex(glob: str) -> str:
+    """Translate a gitignore glob into a regular expression over a relative path.
+
+    ``*`` and ``?`` never match a slash, ``**`` as a whole path component
+    matches any number of directories, and ``[...]`` is a character class.
+    """
+    out = []
+    i = 0
+    n = len(glob)
+    while i < n:
+        char = glob[i]
+        if char == "*":
+            if glob.startswith("**", i):
+                end = i + 2
+                at_start = i == 0 or glob[i - 1] == "/"
+                at_end = end == n or glob[end] == "/"
+                if at_start and at_end:
+                    if end == n:
+                        # "foo/**" matches everything inside foo
+                        out.append(".*")
+                        i = end
+                    else:
+                        # "**/" matches zero or more directories
+                        out.append("(?:.*/)?")
+                        i = end + 1
+                    continue
+                i = end
+            else:
+                i += 1
+            out.append("[^/]*")
+            continue
+        if char == "?":
+            out.append("[^/]")
+        elif char == "[":
+            close = i + 1
+            if close < n and glob[close] in "!^":
+                close += 1
+            if close < n and glob[close] == "]":
+                close += 1
+            close = glob.find("]", close)
+            if close < 0:
+                out.append(re.escape(char))
+            else:
+                body = glob[i + 1:close]
+                negate = body[:1] in ("!", "^")
+                if negate:
+                    body = body[1:]
+                body = body.replace("\\", "\\\\")
+                out.append(f"(?!/)[^{body}]" if negate else f"[{body}]")
+                i = close + 1
+                continue
+        elif char == "\\" and i + 1 < n:
+            out.append(re.escape(glob[i + 1]))
+            i += 2
+            continue
+        else:
+            out.append(re.escape(char))
+        i += 1
+    return "".join(out)
+
+
+def parse_rule(line: str) -> Optional[Tuple[str, bool, bool]]:
+    """Parse one line of an ignore file.
+
+    Returns:
+        Tuple of regex, whether the rule re-includes (``!``) and whether it
+        only applies to directories, or None for blank lines and comments
+    """
+    line = line.rstrip("\r\n")
+    # Trailing spaces are dropped unless escaped with a backslash
+    stripped = line.rstrip(" ")
+    if stripped.endswith("\\") and len(stripped) < len(line):
+        stripped += " "
+    line = stripped
+    if not line or line.startswith("#"):
+        return None
+    negate = line.startswith("!")
+    if negate:
+        line = line[1:]
+    elif line.startswith(("\\#", "\\!")):
+        line = line[1:]
+    dir_only = line.endswith("/")
+    line = line.rstrip("/")
+    if not line:
+        return None
+    # A slash anywhere but the end anchors the rule to the ignore file's directory
+    if "/" in line:
+        regex = glob_to_regex(line.lstrip("/"))
+    else:
+        regex = "(?:.*/)?" + glob_to_regex(line)
+    return regex, negate, dir_only
+
+
+class IgnoreRules:
+    """Compiled rules from the ignore files of one directory.
+
+    Paths are tested relative to that directory. When no rule re-includes
+    anything, all rules are merged into one regex per entry type, so a
+    lookup is a single match regardless of the number of rules.
+    """
+
+    def __init__(self, rules: List[Tuple[str, bool, bool]]):
+        """Compile parsed rules, in file order.
+
+        Args:
+            rules: Rules as returned by parse_rule
+        """
+        self._rules = [
+            (re.compile(regex, re.DOTALL), negate, dir_only) for regex, negate, dir_only in rules
+        ]
+        self._merged = None
+        if not any(negate for _, negate, _ in rules):
+            every = "|".join(regex for regex, _, _ in rules)
+            files = "|".join(regex for regex, _, dir_only in rules if not dir_only)
+            self._merged = (
+                re.compile(f"(?:{every})", re.DOTALL),
+                re.compile(f"(?:{files})", re.DOTALL) if files else None,
+            )
+
+    def __bool__(self) -> bool:
+        return bool(self._rules)
+
+    def match(self, rel_path: str, is_dir: bool) -> Optional[bool]:
+        """Decide whether a path is ignored.
+
+        Args:
+            rel_path: Path relative to the rules' directory, using "/"
+            is_dir: Whether the path is a directory
+
+        Returns:
+            True if ignored, False if re-included, None if no rule applies
+        """
+        if self._merged is not None:
+            merged = self._merged[0] if is_dir else self._merged[1]
+            if merged is not None and merged.fullmatch(rel_path):
+                return True
+            return None
+        # Later rules take precedence over earlier ones
+        for regex, negate, dir_only in reversed(self._rules):
+            if dir_only and not is_dir:
+                continue
+            if regex.fullmatch(rel_path):
+                return not negate
+        return None
+
+
+def read_rules(*file_paths: str) -> IgnoreRules:
+    """Read and compile the rules from ignore files, skipping missing ones."""
+    rules = []
+    for file_path in file_paths:
+        try:
+            with open(file_path, "r", encoding="utf-8", errors="replace") as file:
+                lines = file.readlines()
+        except OSError:
+            continue
+        rules.extend(rule for rule in map(parse_rule, lines) if rule)
+    return IgnoreRules(rules)
+
+
+def _global_excludes_file() -> str:
+    """Find git's global excludes file, following core.excludesFile if set."""
+    config_home = os.environ.get("XDG_CONFIG_HOME") or os.path.expanduser("~/.config")
+    for config in (os.path.expanduser("~/.gitconfig"), os.path.join(config_home, "git", "config")):
+        try:
+            with open(config, "r", encoding="utf-8", errors="replace") as file:
+                section = ""
+                for line in file:
+                    line = line.strip()
+                    if line.startswith("["):
+                        section = line.strip("[]").strip().lower()
+                    elif section == "core" and "=" in line:
+                        key, value = line.split("=", 1)
+                        if key.strip().lower() == "excludesfile":
+                            return os.path.expanduser(value.strip().strip('"'))
+        except OSError:
+            continue
+    return os.path.join(config_home, "git", "ignore")
+
+
+@lru_cache(maxsize=1)
+def global_rules() -> IgnoreRules:
+    """Rules from git's global excludes file, read once per process."""
+    return read_rules(_global_excludes_file())
+
+
+def find_repo_root(dir_path: str) -> Optional[str]:
+    """Find the nearest enclosing directory that contains a .git entry."""
+    current = os.path.abspath(dir_path)
+    while True:
+        if os.path.exists(os.path.join(current, ".git")):
+            return current
+        parent = os.path.dirname(current)
+        if parent == current:
+            return None
+        current = parent
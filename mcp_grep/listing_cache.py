@@ -0,0 +1,179 @@
+"""Process-wide cache of directory listings."""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+
+# Names of the regular files and of the subdirectories in a directory, in
+# listing order. Symlinks to directories are in neither, as os.walk does not
+# descend into them.
+Listing = Tuple[Tuple[str, ...], Tuple[str, ...]]
+
+# Directory timestamps come from a coarse clock, so a change made in the same
+# tick as an earlier one can leave the mtime unchanged. Listings taken this
+# soon after the directory's mtime are never trusted.
+RACY_NS = 50_000_000
+
+
+def scan_dir(dir_path: str) -> Listing:
+    """List a directory, treating unreadable directories as empty like os.walk."""
+    files = []
+    dirs = []
+    try:
+        with os.scandir(dir_path) as entries:
+            for entry in entries:
+                try:
+                    # Only symlinks need a stat call here
+                    if entry.is_dir(follow_symlinks=False):
+                        dirs.append(entry.name)
+                    elif entry.is_file():
+                        files.append(entry.name)
+                except OSError:
+                    continue
+    except OSError:
+        pass
+    return tuple(files), tuple(dirs)
+
+
+class ListingCache:
+    """LRU cache of directory listings keyed by absolute path.
+
+    Each listing is validated against the directory's device, inode and
+    mtime, which change whenever an entry is added, removed or renamed, so
+    an unchanged directory costs one ``stat`` instead of a full listing.
+    With a watcher attached, listings of watched directories are trusted
+    without any ``stat`` until the watcher reports a change. The cache is
+    bounded by the total number of entries it holds, by default the
+    ``MCP_GREP_LISTING_CACHE_ENTRIES`` environment variable or 200,000.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None):
+        """Create an empty cache.
+
+        Args:
+            max_entries: Upper bound on the entries held over all listings;
+                0 disables caching; by default read from the environment
+        """
+        if max_entries is None:
+            max_entries = int(os.environ.get("MCP_GREP_LISTING_CACHE_ENTRIES") or 200_000)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._size = 0
+        self._listings: "OrderedDict[str, Tuple[Tuple[int, int, int], int, Listing, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.watcher = None
+        # Listings the watcher vouches for, returned without a stat call
+        self._trusted: Set[str] = set()
+
+    def attach(self, watcher) -> None:
+        """Trust listings of directories the watcher covers until it reports a change."""
+        with self._lock:
+            self.watcher = watcher
+            self._trusted.clear()
+        watcher.subscribe(self)
+
+    def on_change(self, path: str, is_dir: bool) -> None:
+        """Forget a directory's listing after the watcher saw it change."""
+        if is_dir:
+            self.invalidate(path)
+
+    def on_listing_change(self, dir_path: str) -> None:
+        """Forget a directory's listing after entries were added to it or removed from it."""
+        self.invalidate(dir_path)
+
+    def on_reset(self) -> None:
+        """Fall back to stat validation after the watcher lost events."""
+        with self._lock:
+            self._trusted.clear()
+
+    def list(self, dir_path: str) -> Listing:
+        """Get the listing of a directory, from the cache when it is unchanged."""
+        if self.max_entries <= 0:
+            return scan_dir(dir_path)
+        key = os.path.abspath(dir_path)
+        watcher = self.watcher
+        if watcher is not None:
+            with self._lock:
+                if key in self._trusted:
+                    self._listings.move_to_end(key)
+                    self.hits += 1
+                    return self._listings[key][2]
+            # Checked before the directory is looked at, so any change made
+            # after this point bumps the generation
+            generation = watcher.generation if watcher.covers(key) else None
+        else:
+            generation = None
+
+        try:
+            st = os.stat(dir_path)
+        except OSError:
+            self.invalidate(key)
+            return (), ()
+        signature = (st.st_dev, st.st_ino, st.st_mtime_ns)
+
+        with self._lock:
+            cached = self._listings.get(key)
+            if cached is not None and cached[0] == signature and cached[1] - st.st_mtime_ns > RACY_NS:
+                self._listings.move_to_end(key)
+                self.hits += 1
+                if generation is not None and watcher.generation == generation:
+                    self._trusted.add(key)
+                return cached[2]
+            self.misses += 1
+
+        taken_ns = time.time_ns()
+        listing = scan_dir(dir_path)
+        with self._lock:
+            self._discard(key)
+            size = len(listing[0]) + len(listing[1])
+            if size <= self.max_entries:
+                self._listings[key] = (signature, taken_ns, listing, size)
+                self._size += size
+                if generation is not None and watcher.generation == generation:
+                    self._trusted.add(key)
+                # Evict the least recently used listings
+                while self._size > self.max_entries:
+                    self._discard(next(iter(self._listings)))
+        return listing
+
+    def _discard(self, key: str) -> None:
+        cached = self._listings.pop(key, None)
+        if cached is not None:
+            self._size -= cached[3]
+        self._trusted.discard(key)
+
+    def invalidate(self, dir_path: Optional[str] = None) -> None:
+        """Forget one directory's listing, or every listing when no path is given."""
+        with self._lock:
+            if dir_path is None:
+                self._listings.clear()
+                self._trusted.clear()
+                self._size = 0
+            else:
+                self._discard(os.path.abspath(dir_path))
+
+    def resize(self, max_entries: int) -> None:
+        """Change the size bound, evicting listings as needed."""
+        with self._lock:
+            self.max_entries = max_entries
+            while self._listings and self._size > max(max_entries, 0):
+                self._discard(next(iter(self._listings)))
+
+    def stats(self) -> Dict[str, int]:
+        """Report the cache's size and hit counts."""
+        with self._lock:
+            return {
+                "directories": len(self._listings),
+                "trusted": len(self._trusted),
+                "entries": self._size,
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+# Shared by every search in this process
+listing_cache = ListingCache()
@@ -0,0 +1,175 @@
+"""Process-wide cache of grep tool responses."""
+
+import copy
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from mcp_grep.listing_cache import RACY_NS
+
+# A path's mtime, size and inode, or None if it does not exist
+Fingerprint = Optional[Tuple[int, int, int]]
+
+
+def fingerprint(path: str) -> Fingerprint:
+    """Fingerprint a file or directory."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+
+class ResultCache:
+    """LRU cache of tool responses keyed by the normalised tool arguments.
+
+    Each entry keeps the fingerprints of every path its results depend on:
+    the files searched, the directories listed and the ignore files read.
+    An entry is served only while all of them are unchanged, so a repeated
+    query costs one ``stat`` per path instead of a search. When a watcher
+    covers those paths and has seen no change since, even that is skipped.
+    The cache is bounded by the total bytes of the responses it holds.
+    """
+
+    def __init__(self, max_bytes: int = 32 << 20):
+        """Create an empty cache.
+
+        Args:
+            max_bytes: Upper bound on the bytes held over all entries;
+                0 disables caching
+        """
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.watcher = None
+        self._size = 0
+        # key -> (response, fingerprints, watcher generation, size)
+        self._entries: "OrderedDict[str, Tuple[Dict, List[Tuple[str, Fingerprint]], Optional[int], int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def attach(self, watcher) -> None:
+        """Skip fingerprint checks while the watcher reports no changes."""
+        self.watcher = watcher
+        watcher.subscribe(self)
+
+    def on_change(self, path: str, is_dir: bool) -> None:
+        """Entries are checked against the watcher's generation, so nothing to do."""
+
+    def on_listing_change(self, dir_path: str) -> None:
+        """Entries are checked against the watcher's generation, so nothing to do."""
+
+    def on_reset(self) -> None:
+        """Fall back to fingerprint checks after the watcher lost events."""
+        with self._lock:
+            for key, (response, fingerprints, _, size) in self._entries.items():
+                self._entries[key] = (response, fingerprints, None, size)
+
+    @staticmethod
+    def key(**arguments: Any) -> str:
+        """Build a cache key from tool arguments."""
+        return json.dumps(arguments, sort_keys=True, separators=(",", ":"), default=str)
+
+    def _generation(self, paths: List[str]) -> Optional[int]:
+        """The watcher's generation, if it covers every path's directory."""
+        watcher = self.watcher
+        if watcher is None:
+            return None
+        generation = watcher.generation
+        for path in paths:
+            if not (watcher.covers(path) or watcher.covers(os.path.dirname(path))):
+                return None
+        return generation
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Get a cached response if every path it depends on is unchanged."""
+        if self.max_bytes <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        response, fingerprints, generation, size = entry
+        watcher = self.watcher
+        if generation is None or watcher is None or watcher.generation != generation:
+            generation = self._generation([path for path, _ in fingerprints])
+            if any(fingerprint(path) != known for path, known in fingerprints):
+                with self._lock:
+                    self._discard(key)
+                    self.misses += 1
+                return None
+
+        with self._lock:
+            if key in self._entries:
+                self._entries[key] = (response, fingerprints, generation, size)
+                self._entries.move_to_end(key)
+            self.hits += 1
+        return copy.deepcopy(response)
+
+    def put(self, key: str, response: Dict, sources: List[str], started_ns: int) -> None:
+        """Cache a response.
+
+        Args:
+            key: Key from ResultCache.key
+            response: Tool response to return for the same arguments
+            sources: Every path the response depends on
+            started_ns: When the search started, from time.time_ns()
+        """
+        if self.max_bytes <= 0 or response.get("isError"):
+            return
+        paths = [os.path.abspath(path) for path in dict.fromkeys(sources)]
+        generation = self._generation(paths)
+        fingerprints = [(path, fingerprint(path)) for path in paths]
+        # A path changed during the search, or within one timestamp tick of
+        # its start, could be modified again without changing its fingerprint
+        if any(known is not None and known[0] > started_ns - RACY_NS for _, known in fingerprints):
+            return
+
+        size = sum(len(item.get("text", "")) for item in response.get("content", []))
+        size += sum(len(path) + 64 for path in paths)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = (copy.deepcopy(response), fingerprints, generation, size)
+            self._size += size
+            # Evict the least recently used entries
+            while self._size > self.max_bytes:
+                self._discard(next(iter(self._entries)))
+
+    def _discard(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= entry[3]
+
+    def invalidate(self) -> None:
+        """Forget every cached response."""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def resize(self, max_bytes: int) -> None:
+        """Change the size bound, evicting entries as needed."""
+        with self._lock:
+            self.max_bytes = max_bytes
+            while self._entries and self._size > max(max_bytes, 0):
+                self._discard(next(iter(self._entries)))
+
+    def stats(self) -> Dict[str, int]:
+        """Report the cache's size and hit counts."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+# Shared by every grep tool call in this process
+result_cache = ResultCache()
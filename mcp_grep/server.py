@@ -1,19 +1,37 @@
 """MCP Server implementation for grep functionality using system grep binary."""
 
-from pathlib import Path
 import json
+import base64
+import hashlib
 import subprocess
 import shutil
 import os
 import fnmatch
+import threading
+import time
+from contextlib import nullcontext
+from contextvars import ContextVar
+from functools import lru_cache, wraps
 from typing import Dict, List, Optional, Union, Any
 
+import anyio
 from mcp.server.fastmcp import FastMCP
-from mcp_grep.core import MCPGrep
+from mcp_grep.bounded import BoundedSearch
+from mcp_grep.core import EXECUTORS, FILE_MODES, MCPGrep, PagePosition, group_context as group_hunks, has_nested_repeat
+from mcp_grep.formats import OUTPUT_FORMATS, encode_columnar, encode_grep, encode_json, encode_summaries
+from mcp_grep.system_grep import ENGINES, SystemGrep
+from mcp_grep.listing_cache import listing_cache
+from mcp_grep.result_cache import result_cache
+from mcp_grep.trigram_index import indexes
+from mcp_grep.walker import FileWalker
+from mcp_grep.watcher import start_watching
 
 # Create an MCP server
 mcp = FastMCP("grep-server")
 
+# Event set when the tool call running in this context is cancelled
+_stop_event: "ContextVar[Optional[threading.Event]]" = ContextVar("_stop_event", default=None)
+
 def get_grep_info() -> Dict[str, Optional[str]]:
     """Get information about the system grep binary."""
     info = {
@@ -53,42 +71,153 @@ def get_grep_info() -> Dict[str, Optional[str]]:
     
     return info
 
+@lru_cache(maxsize=1)
+def _cached_grep_info() -> Dict[str, Optional[str]]:
+    """Probe the system grep binary once per process."""
+    return get_grep_info()
+
+@lru_cache(maxsize=1)
+def _start_watcher():
+    """Start the background watcher for MCP_GREP_WATCH_ROOTS once per process."""
+    roots = [root for root in os.environ.get("MCP_GREP_WATCH_ROOTS", "").split(os.pathsep) if root]
+    if not roots:
+        return None
+    return start_watching(
+        [os.path.expanduser(root) for root in roots], [listing_cache, indexes, result_cache]
+    )
+
 # Register grep info as a resource
 @mcp.resource("grep://info")
 def grep_info() -> str:
     """Resource providing information about the grep binary."""
     return json.dumps(get_grep_info(), indent=2)
 
-def _format_results(results: List[Dict[str, Any]], count: int) -> Dict:
-    """Format grep results for the MCP response."""
-    # Truncate results if there are too many matches to avoid response size issues
-    MAX_RESULTS = 50
-    if len(results) > MAX_RESULTS:
-        truncated_results = results[:MAX_RESULTS]
-        truncated_message = f"Found {count} matches, showing first {MAX_RESULTS}."
-        results_json = json.dumps(truncated_results, indent=2)
+# Register trigram index status as a resource
+@mcp.resource("grep://index")
+def grep_index() -> str:
+    """Resource providing the status of the trigram indexes."""
+    return json.dumps(indexes.status(), indent=2)
+
+# Register cache statistics as a resource
+@mcp.resource("grep://cache")
+def grep_cache() -> str:
+    """Resource providing hit counts and sizes of the result and listing caches."""
+    return json.dumps({"results": result_cache.stats(), "listings": listing_cache.stats()}, indent=2)
+
+# Most results shown in one response
+MAX_RESULTS = 50
+
+def _encode_cursor(query_id: str, position: PagePosition) -> str:
+    """Pack a page position, tied to its query, into an opaque cursor."""
+    return base64.urlsafe_b64encode(json.dumps([query_id, *position]).encode("utf-8")).decode("ascii")
+
+def _decode_cursor(cursor: str, query_id: str) -> PagePosition:
+    """Unpack a cursor made by _encode_cursor for the same query."""
+    try:
+        fields = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        position = tuple(int(field) for field in fields[1:])
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if fields[0] != query_id or len(position) != 5:
+        raise ValueError("Cursor belongs to a different query")
+    return position
+
+def _wildcard_files(wild_path: str, recursive: bool, walker: FileWalker) -> Optional[List[str]]:
+    """List the files a wildcard path names, or None if its directory does not exist."""
+    # Split into directory and pattern
+    dir_path = os.path.dirname(wild_path) or "."
+    base_pattern = os.path.basename(wild_path)
+    if not os.path.isdir(dir_path):
+        return None
+    
+    # Gather files recursively if needed
+    files = walker.walk(dir_path) if recursive else walker.list_dir(dir_path)
+    return [file for file in files if fnmatch.fnmatch(os.path.basename(file), base_pattern)]
+
+def _add_hunk(
+    results: List[Dict], hunk: Dict, match_count: int, result_limit: int, after_context: int
+) -> int:
+    """Keep what a hunk adds to the shown matches and count its matches within result_limit.
+
+    A hunk that runs past MAX_RESULTS or result_limit is cut after the last
+    match kept and its after-context, where selected lines are shown as
+    context, as they are when whole results are cut.
+
+    Returns:
+        The match count including the hunk
+    """
+    lines = hunk["lines"]
+    found = sum("matches" in line for line in lines)
+    if result_limit > 0:
+        found = min(found, result_limit - match_count)
+    shown = min(found, MAX_RESULTS - match_count)
+    if shown > 0:
+        for idx, line in enumerate(lines):
+            if "matches" in line:
+                shown -= 1
+                if shown == 0:
+                    break
+        end = min(idx + after_context + 1, len(lines))
+        tail = [
+            {key: value for key, value in line.items() if key not in ("matches", "patterns")}
+            for line in lines[idx + 1:end]
+        ]
+        results.append({"file": hunk["file"], "lines": lines[:idx + 1] + tail})
+    return match_count + found
+
+def _encode_results(results: List[Dict[str, Any]], output_format: str, separators: bool = False) -> str:
+    """Encode results (or context groups) in one of OUTPUT_FORMATS.
+
+    Args:
+        results: Result dicts for "json", context groups for the other formats
+        output_format: One of OUTPUT_FORMATS
+        separators: Separate groups with "--" in the "grep" format
+    """
+    # Serialised once, without indentation, to keep responses small
+    if output_format == "columnar":
+        return encode_columnar(results)
+    if output_format == "grep":
+        return encode_grep(results, separators)
+    return encode_json(results)
+
+
+def _format_results(
+    results_text: str, count: int, notes: Optional[List[str]] = None, unit: str = "matches"
+) -> Dict:
+    """Format encoded grep results for the MCP response, after any notes about the search.
+
+    Args:
+        results_text: Results to show, already cut to at most MAX_RESULTS
+            and encoded
+        count: Number of matches (or files) found in all
+        notes: Notes about the search to show first
+        unit: What count counts, for the truncation message
+    """
+    prefix = "".join(note + "\n\n" for note in notes or [])
+    # Only the first results were kept, to avoid response size issues
+    if count > MAX_RESULTS:
+        truncated_message = f"Found {count} {unit}, showing first {MAX_RESULTS}."
         return {
             "content": [
                 {
                     "type": "text",
-                    "text": truncated_message + "\n\n" + results_json
+                    "text": prefix + truncated_message + "\n\n" + results_text
                 }
             ],
             "isError": False
         }
     else:
-        results_json = json.dumps(results, indent=2)
         return {
             "content": [
                 {
                     "type": "text",
-                    "text": results_json
+                    "text": prefix + results_text
                 }
             ],
             "isError": False
         }
 
-@mcp.tool()
+
 def grep(
     pattern: str,
     paths: Union[str, List[str]],
@@ -102,7 +231,31 @@ def grep(
     regexp: bool = True,
     invert_match: bool = False,
     line_number: bool = True,
-    file_pattern: Optional[str] = None
+    file_pattern: Optional[str] = None,
+    scan_mode: str = "lines",
+    patterns: Optional[List[str]] = None,
+    pattern_file: Optional[str] = None,
+    workers: int = 1,
+    executor: str = "thread",
+    engine: str = "python",
+    no_ignore: bool = False,
+    include: Optional[List[str]] = None,
+    exclude: Optional[List[str]] = None,
+    types: Optional[List[str]] = None,
+    type_not: Optional[List[str]] = None,
+    type_add: Optional[List[str]] = None,
+    use_index: bool = True,
+    use_cache: bool = True,
+    timeout: Optional[float] = None,
+    file_timeout: Optional[float] = None,
+    reject_exponential: bool = False,
+    group_context: bool = False,
+    page_size: int = 0,
+    cursor: Optional[str] = None,
+    output_format: str = "json",
+    count: bool = False,
+    files_with_matches: bool = False,
+    files_without_match: bool = False
 ) -> Dict:
     """Search for pattern in files using system grep.
     
@@ -120,131 +273,343 @@ def grep(
         invert_match: Select non-matching lines (-v)
         line_number: Show line numbers (-n)
         file_pattern: Pattern to filter files (e.g., "*.txt")
+        scan_mode: File reading strategy ("lines", "stream" for large files,
+            "buffer" for sparse matches, or "mmap" for large trees); with
+            engine="system" it only applies to patterns the binary cannot run
+        patterns: Additional patterns to search for at once (-e); with
+            fixed_strings they are matched in a single pass
+        pattern_file: File with one pattern per line (-f)
+        workers: Number of files to search concurrently; not with timeout,
+            file_timeout or page_size, and with engine="system" only for
+            patterns the binary cannot run
+        executor: "thread", or "process" for CPU-heavy patterns; used when
+            workers is above 1
+        engine: "python", or "system" to run the grep (or rg) binary, which
+            hands patterns it cannot run with Python's meaning to Python's
+            engine; a lone "\r" ends a line for Python but not for the
+            binary, so such lines are numbered and matched differently
+        no_ignore: Also search files excluded by .gitignore and .ignore files
+        include: Globs files must match, relative to each directory searched
+            (e.g., ["src/**/*.py"]); "!glob" excludes instead
+        exclude: Globs for files and directories to skip (e.g., ["**/tests/**"])
+        types: File types to search in one walk (e.g., ["py", "js", "config"])
+        type_not: File types to skip
+        type_add: Extra file types, as "name:glob,glob" (e.g., "proto:*.proto")
+        use_index: Narrow the files read with the trigram index when the paths
+            lie under a root listed in MCP_GREP_INDEX_ROOTS
+        use_cache: Reuse the response of an identical earlier call when none
+            of the files, directories or ignore files it read have changed
+        timeout: Seconds the whole search may take; matching then runs in a
+            worker process, and partial results are marked as timed out
+        file_timeout: Seconds any one file may take; slower files are skipped
+        reject_exponential: Refuse patterns with nested repeats such as (a+)+,
+            which can take exponential time
+        group_context: Merge overlapping context into hunks like grep's "--"
+            groups, listing each line once with match lines carrying spans
+        page_size: Return results a page at a time (at most 50), reading
+            no further than needed; the response's nextCursor continues it.
+            Pages are read line by line with Python's engine, so scan_mode
+            must be "lines" or "stream", with one worker and engine="python"
+        cursor: nextCursor from the previous page of the same query
+        output_format: "json" for result dicts, "columnar" for a file table
+            with per-file arrays of line numbers, lines and spans, or "grep"
+            for path:line:text lines
+        count: Report the number of selected lines per file instead of the
+            lines (-c); max_count then limits each file
+        files_with_matches: Only list the files with a selected line (-l)
+        files_without_match: Only list the files without one (-L)
         
     Returns:
         JSON string with search results
     """
     try:
+        _start_watcher()
+
         # Convert single path to list and expand user paths
         if isinstance(paths, str):
             paths = [os.path.expanduser(paths)]
         else:
             paths = [os.path.expanduser(p) for p in paths]
         
-        # Use our MCPGrep implementation for more consistent and flexible searching
-        grep_tool = MCPGrep(
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine: {engine}")
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format: {output_format}")
+        file_modes = [
+            mode for mode, chosen in zip(FILE_MODES, (count, files_with_matches, files_without_match)) if chosen
+        ]
+        if len(file_modes) > 1:
+            raise ValueError("Choose at most one of count, files_with_matches and files_without_match")
+        file_mode = file_modes[0] if file_modes else None
+        if executor not in EXECUTORS:
+            raise ValueError(f"Unknown executor: {executor}")
+        
+        # Use our MCPGrep implementation for more consistent and flexible searching,
+        # or hand the matching to the system binary
+        engine_args = {}
+        grep_class = MCPGrep
+        if engine == "system":
+            info = _cached_grep_info()
+            grep_class = SystemGrep
+            engine_args = {"grep_path": info["path"], "supports_pcre": info["supports_pcre"]}
+        grep_tool = grep_class(
             pattern=pattern,
             ignore_case=ignore_case,
             fixed_strings=fixed_strings,
             regexp=regexp,
             invert_match=invert_match,
-            line_number=line_number,
+            # Hunks are merged by line number
+            line_number=line_number or group_context or output_format != "json",
             before_context=before_context,
             after_context=after_context,
             context=context,
-            max_count=max_count
+            max_count=max_count,
+            scan_mode=scan_mode,
+            patterns=patterns,
+            pattern_file=os.path.expanduser(pattern_file) if pattern_file else None,
+            **engine_args
         )
+        if reject_exponential and any(has_nested_repeat(compiled) for compiled in grep_tool.regexes()):
+            raise ValueError(
+                "Pattern nests repeated groups, which can take exponential time; "
+                "rewrite it or set a timeout instead"
+            )
+        budgeted = timeout is not None or file_timeout is not None
+        if budgeted and file_mode:
+            raise ValueError(f"{file_mode} cannot be combined with timeout or file_timeout")
+        if budgeted and workers > 1:
+            raise ValueError("workers cannot be combined with timeout or file_timeout")
+        # Paged searches stop reading as soon as the page is full
+        paged = page_size > 0 or cursor is not None
+        if paged:
+            if budgeted:
+                raise ValueError("page_size cannot be combined with timeout or file_timeout")
+            if file_mode:
+                raise ValueError(f"page_size cannot be combined with {file_mode}")
+            if workers > 1:
+                raise ValueError("page_size cannot be combined with workers")
+            if scan_mode not in ("lines", "stream"):
+                raise ValueError(f"page_size cannot be combined with scan_mode={scan_mode}")
+            if engine == "system":
+                raise ValueError("page_size cannot be combined with engine=system")
         
-        # Search for matches
-        results = []
-        match_count = 0
+        # Only arguments that affect just the speed are left out of the key;
+        # the call is looked up once it is known to be valid
+        query_key = result_cache.key(
+            pattern=pattern, paths=[os.path.abspath(p) for p in paths], ignore_case=ignore_case,
+            before_context=before_context, after_context=after_context, context=context,
+            max_count=max_count, fixed_strings=fixed_strings, recursive=recursive,
+            regexp=regexp, invert_match=invert_match, line_number=line_number,
+            file_pattern=file_pattern, scan_mode=scan_mode, patterns=patterns,
+            pattern_file=os.path.abspath(os.path.expanduser(pattern_file)) if pattern_file else None,
+            engine=engine, no_ignore=no_ignore, include=include, exclude=exclude,
+            types=types, type_not=type_not, type_add=type_add, group_context=group_context,
+            output_format=output_format, file_mode=file_mode, cwd=os.getcwd()
+        )
+        cache_key = result_cache.key(
+            query=query_key, page_size=page_size, cursor=cursor, reject_exponential=reject_exponential,
+            timeout=timeout, file_timeout=file_timeout
+        )
+        if use_cache:
+            cached = result_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        started_ns = time.time_ns()
         
-        # If any path contains a wildcard, handle it at the paths level
-        wildcarded_paths = []
-        standard_paths = []
+        # Matching runs in a worker process that is killed when a budget runs
+        # out, and once the search is over however it ends
+        with BoundedSearch(grep_tool, timeout, file_timeout) if budgeted else nullcontext() as bounded:
+            # Everything the response depends on, for validating the cached copy
+            sources = [os.path.expanduser(pattern_file)] if pattern_file else []
+            grep_tool.sources = sources
+            # Set when an async tool call is cancelled; the search stops reading at once
+            stop = grep_tool.stop = _stop_event.get()
         
-        for path in paths:
-            if "*" in path or "?" in path:
-                wildcarded_paths.append(path)
-            else:
-                standard_paths.append(path)
+            # Search for matches
+            results = []
+            match_count = 0
+            # In the file modes max_count applies to each file instead
+            result_limit = 0 if file_mode else max_count
+            # The compact formats are written from hunks, built straight from the lines read
+            hunks = not file_mode and (group_context or output_format != "json")
         
-        # Process standard paths
-        if standard_paths:
-            try:
-                for result in grep_tool.search_files(standard_paths, recursive, file_pattern):
-                    results.append(result)
-                    match_count += 1
-                    if max_count > 0 and match_count >= max_count:
-                        break
-            except Exception as e:
-                return {
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": f"Error searching files: {str(e)}"
-                        }
-                    ],
-                    "isError": True
-                }
+            # If any path contains a wildcard, handle it at the paths level
+            wildcarded_paths = []
+            standard_paths = []
         
-        # Process wildcard paths
-        if wildcarded_paths and match_count < (max_count if max_count > 0 else float('inf')):
-            # For each wildcarded path
-            for wild_path in wildcarded_paths:
-                # Split into directory and pattern
-                dir_path = os.path.dirname(wild_path) or "."
-                base_pattern = os.path.basename(wild_path)
-                
-                # Find all matching files in the directory
+            for path in paths:
+                if "*" in path or "?" in path:
+                    wildcarded_paths.append(path)
+                else:
+                    standard_paths.append(path)
+        
+            walker = FileWalker(file_pattern, no_ignore, include, exclude, types, type_not, type_add)
+            walker.sources = sources
+        
+            next_cursor = None
+            if paged:
+                query_id = hashlib.sha1(query_key.encode("utf-8")).hexdigest()[:16]
+                position = _decode_cursor(cursor, query_id) if cursor else None
+                file_paths = list(standard_paths)
+                for wild_path in wildcarded_paths:
+                    file_paths.extend(_wildcard_files(wild_path, recursive, walker) or [])
+                results, next_position = grep_tool.search_page(
+                    file_paths, min(page_size or MAX_RESULTS, MAX_RESULTS), position, recursive,
+                    file_pattern, no_ignore, include, exclude, types, type_not, type_add,
+                    indexes.index_for(file_paths) if use_index else None
+                )
+                match_count = len(results)
+                if next_position is not None:
+                    next_cursor = _encode_cursor(query_id, next_position)
+        
+            # Process standard paths
+            if standard_paths and not paged:
                 try:
-                    dir_obj = Path(dir_path)
-                    if dir_obj.exists() and dir_obj.is_dir():
-                        matching_files = []
-                        
-                        # Gather files recursively if needed
-                        if recursive:
-                            for root, _, files in os.walk(dir_path):
-                                for file in files:
-                                    if fnmatch.fnmatch(file, base_pattern):
-                                        # Also check file_pattern if specified
-                                        if file_pattern and not fnmatch.fnmatch(file, file_pattern):
-                                            continue
-                                        matching_files.append(os.path.join(root, file))
+                    index = indexes.index_for(standard_paths) if use_index else None
+                    if file_mode:
+                        search = grep_tool.summarize_files(
+                            standard_paths, file_mode, recursive, file_pattern, no_ignore,
+                            include, exclude, types, type_not, type_add, index
+                        )
+                    elif bounded is not None:
+                        search = bounded.search_files(
+                            standard_paths, recursive, file_pattern, no_ignore,
+                            include, exclude, types, type_not, type_add, index
+                        )
+                    elif hunks:
+                        # Lines past the shown matches are never added to a hunk, only counted
+                        search = grep_tool.search_hunks(
+                            standard_paths, recursive, file_pattern, workers, executor, no_ignore,
+                            include, exclude, types, type_not, type_add, index, line_number,
+                            max(MAX_RESULTS - match_count, 0)
+                        )
+                    else:
+                        search = grep_tool.search_files(
+                            standard_paths, recursive, file_pattern, workers, executor, no_ignore,
+                            include, exclude, types, type_not, type_add, index
+                        )
+                    for result in search:
+                        if stop is not None and stop.is_set():
+                            break
+                        # Results past the display limit are only counted
+                        if hunks and bounded is None:
+                            match_count = _add_hunk(
+                                results, result, match_count, result_limit, grep_tool.after_context
+                            )
                         else:
-                            # Non-recursive search
-                            for item in dir_obj.iterdir():
-                                if item.is_file() and fnmatch.fnmatch(item.name, base_pattern):
-                                    # Also check file_pattern if specified
-                                    if file_pattern and not fnmatch.fnmatch(item.name, file_pattern):
-                                        continue
-                                    matching_files.append(str(item))
+                            if match_count < MAX_RESULTS:
+                                results.append(result)
+                            match_count += 1
+                        if result_limit > 0 and match_count >= result_limit:
+                            break
+                except Exception as e:
+                    return {
+                        "content": [
+                            {
+                                "type": "text",
+                                "text": f"Error searching files: {str(e)}"
+                            }
+                        ],
+                        "isError": True
+                    }
+        
+            # Process wildcard paths
+            if wildcarded_paths and not paged and match_count < (result_limit if result_limit > 0 else float('inf')):
+                # For each wildcarded path
+                for wild_path in wildcarded_paths:
+                    # Find all matching files in the directory
+                    try:
+                        matching_files = _wildcard_files(wild_path, recursive, walker)
+                        if matching_files is not None:
+                            sources.extend(matching_files)
                         
-                        # Search in the matching files
-                        for file_path in matching_files:
-                            try:
-                                for result in grep_tool.search_file(file_path):
-                                    results.append(result)
-                                    match_count += 1
-                                    if max_count > 0 and match_count >= max_count:
-                                        break
-                                
-                                if max_count > 0 and match_count >= max_count:
+                            # Search in the matching files
+                            for file_path in matching_files:
+                                if stop is not None and stop.is_set():
                                     break
-                            except Exception as e:
-                                print(f"Error searching {file_path}: {e}")
+                                try:
+                                    if file_mode:
+                                        file_results = grep_tool.summarize_files([file_path], file_mode)
+                                    elif bounded is not None:
+                                        file_results = bounded.search_files([file_path])
+                                    elif hunks:
+                                        file_results = grep_tool.search_hunks(
+                                            [file_path], line_number=line_number,
+                                            keep=max(MAX_RESULTS - match_count, 0)
+                                        )
+                                    else:
+                                        file_results = grep_tool.search_file(file_path)
+                                    for result in file_results:
+                                        if stop is not None and stop.is_set():
+                                            break
+                                        if hunks and bounded is None:
+                                            match_count = _add_hunk(
+                                                results, result, match_count, result_limit, grep_tool.after_context
+                                            )
+                                        else:
+                                            if match_count < MAX_RESULTS:
+                                                results.append(result)
+                                            match_count += 1
+                                        if result_limit > 0 and match_count >= result_limit:
+                                            break
+                                    
+                                    if result_limit > 0 and match_count >= result_limit:
+                                        break
+                                except Exception as e:
+                                    print(f"Error searching {file_path}: {e}")
                         
-                        if max_count > 0 and match_count >= max_count:
-                            break
-                    else:
-                        print(f"Directory not found: {dir_path}")
-                except Exception as e:
-                    print(f"Error processing wildcard path {wild_path}: {e}")
+                            if result_limit > 0 and match_count >= result_limit:
+                                break
+                        else:
+                            dir_path = os.path.dirname(wild_path) or "."
+                            sources.append(dir_path)
+                            print(f"Directory not found: {dir_path}")
+                    except Exception as e:
+                        print(f"Error processing wildcard path {wild_path}: {e}")
+        
+        notes = []
+        if bounded is not None:
+            if bounded.timed_out:
+                notes.append(f"Search timed out after {timeout} seconds; results are partial.")
+            if bounded.timed_out_files:
+                notes.append(
+                    f"Timed out after {file_timeout} seconds and skipped: "
+                    + ", ".join(bounded.timed_out_files)
+                )
         
         # No results case
         if not results:
-            return {
+            response = {
                 "content": [
                     {
                         "type": "text",
-                        "text": "No matches found"
+                        "text": "".join(note + "\n\n" for note in notes)
+                        + ("No files found" if file_mode else "No matches found")
                     }
                 ],
                 "isError": False
             }
-        
-        # Return the formatted results
-        return _format_results(results, match_count)
+        else:
+            if file_mode:
+                results_text = encode_summaries(results, output_format)
+            else:
+                # Results cut short by a budget or a page still need merging
+                if hunks and (bounded is not None or paged):
+                    results = list(group_hunks(results, line_number))
+                results_text = _encode_results(
+                    results, output_format, grep_tool.before_context > 0 or grep_tool.after_context > 0
+                )
+            # Return the formatted results
+            response = _format_results(results_text, match_count, notes, "files" if file_mode else "matches")
+        if next_cursor is not None:
+            response["content"][0]["text"] += "\n\nMore results are available; pass nextCursor as cursor."
+            response["nextCursor"] = next_cursor
+        if notes:
+            response["timedOut"] = True
+        elif use_cache and not (stop is not None and stop.is_set()):
+            # A cancelled search may have stopped early
+            result_cache.put(cache_key, response, sources, started_ns)
+        return response
         
     except Exception as e:
         return {
@@ -257,6 +622,24 @@ def grep(
             "isError": True
         }
 
+@mcp.tool(name="grep")
+@wraps(grep)
+async def grep_async(*args, **kwargs) -> Dict:
+    # Takes grep's signature and docstring, which describe the tool
+    stop = threading.Event()
+
+    def run() -> Dict:
+        _stop_event.set(stop)
+        return grep(*args, **kwargs)
+
+    try:
+        # The search runs on a worker thread so the event loop keeps serving
+        # the session. When the request is cancelled the call returns at once
+        # and the event tells the abandoned search to stop reading files.
+        return await anyio.to_thread.run_sync(run, abandon_on_cancel=True)
+    finally:
+        stop.set()
+
 def parse_grep_query(query: str) -> Dict:
     """Parse a natural language query for grep operations.
     
@@ -0,0 +1,705 @@
+"""Search backend that runs the system grep (or ripgrep) binary."""
+
+import base64
+import json
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+from itertools import groupby
+from pathlib import Path
+from typing import Dict, Generator, Iterator, List, Optional, Pattern, Tuple, Union
+
+from mcp_grep.core import FILE_MODES, MCPGrep
+from mcp_grep.trigram_index import TrigramIndex
+
+try:
+    from re import _parser as sre_parse  # Python 3.11+
+except ImportError:
+    import sre_parse
+
+# Ways the grep tool can run a search
+ENGINES = ("python", "system")
+
+# Upper bounds on the files passed to one invocation of the binary
+_BATCH_FILES = 512
+_BATCH_ARG_BYTES = 64 << 10
+
+# Characters escaped to be taken literally by PCRE and Rust's regex syntax
+_META = frozenset("\\.+*?()|[]{}^$#&-~")
+# Characters escaped to be taken literally in a POSIX extended regex
+_ERE_META = frozenset("\\.[]()*+?{}|^$")
+# Largest repeat count each dialect accepts
+_MAX_REPEAT_COUNT = {"pcre": 65535, "rust": 1000, "ere": 32767}
+# Categories such as \d: how PCRE and Rust write them, and the POSIX
+# bracket expression and whether it is negated; POSIX [:digit:] is only
+# 0-9, while \d also matches other scripts' digits
+_CATEGORIES = {
+    sre_parse.CATEGORY_DIGIT: ("\\d", None, False),
+    sre_parse.CATEGORY_NOT_DIGIT: ("\\D", None, True),
+    sre_parse.CATEGORY_SPACE: ("\\s", "[:space:]", False),
+    sre_parse.CATEGORY_NOT_SPACE: ("\\S", "[:space:]", True),
+    sre_parse.CATEGORY_WORD: ("\\w", "[:alnum:]_", False),
+    sre_parse.CATEGORY_NOT_WORD: ("\\W", "[:alnum:]_", True),
+}
+# Anchors: how PCRE and Rust write them, and how a POSIX extended regex
+# does; each line is matched on its own, so string and line anchors agree
+_ANCHORS = {
+    sre_parse.AT_BEGINNING: ("^", "^"),
+    sre_parse.AT_BEGINNING_LINE: ("^", "^"),
+    sre_parse.AT_BEGINNING_STRING: ("\\A", "^"),
+    sre_parse.AT_BOUNDARY: ("\\b", "\\b"),
+    sre_parse.AT_NON_BOUNDARY: ("\\B", "\\B"),
+}
+# Before Python 3.14, \B never matches an empty line, unlike in grep and rg
+_EMPTY_NON_BOUNDARY = re.search(r"\B", "") is not None
+# Anchors at the end of a line, which the binary sees before any "\r" of a
+# CRLF line end, while Python reads that "\r" as part of the line end
+_END_ANCHORS = (sre_parse.AT_END, sre_parse.AT_END_LINE, sre_parse.AT_END_STRING)
+# Inline flags that change nothing when every line is matched on its own
+_LINE_NEUTRAL_FLAGS = re.MULTILINE | re.DOTALL | re.VERBOSE | re.UNICODE
+
+
+def _matches_cr(item) -> bool:
+    """Whether an item of a character class matches "\r"."""
+    op, av = item
+    if op is sre_parse.LITERAL:
+        return av == 0x0D
+    if op is sre_parse.RANGE:
+        return av[0] <= 0x0D <= av[1]
+    return av in (sre_parse.CATEGORY_SPACE, sre_parse.CATEGORY_NOT_WORD, sre_parse.CATEGORY_NOT_DIGIT)
+
+
+class _Untranslatable(Exception):
+    """A pattern uses syntax the binary's dialect cannot express."""
+
+
+class _Translator:
+    """Rewrite parsed Python patterns in the syntax of a grep binary.
+
+    The dialects are "pcre" for grep -P and rg --pcre2, "rust" for rg's
+    default engine and "ere" for grep -E. Python spells some constructs
+    differently (``{,n}``, ``\\Z``, ``(?P=name)``), and each binary lacks
+    some of Python's syntax altogether, so patterns are written out again
+    from the parse tree instead of being passed on as typed.
+    """
+
+    def __init__(self, dialect: str):
+        self.dialect = dialect
+        # Capturing groups written so far; PCRE and Rust keep counting
+        # across the patterns of one alternation
+        self.groups = 0
+        self._numbers: Dict[int, int] = {}
+
+    def translate(self, compiled: Pattern, ignore_case: bool) -> Optional[str]:
+        """Translate one compiled pattern, or return None if the dialect cannot express it."""
+        self._numbers = {}
+        try:
+            if compiled.flags & (re.ASCII | re.LOCALE):
+                raise _Untranslatable()
+            text = self._sequence(sre_parse.parse(compiled.pattern, compiled.flags))
+            if compiled.flags & re.IGNORECASE and not ignore_case:
+                # Folded by an inline (?i) rather than the -i option
+                if self.dialect == "ere":
+                    raise _Untranslatable()
+                text = f"(?i:{text})"
+        except _Untranslatable:
+            return None
+        return text
+
+    def _require(self, *dialects: str) -> None:
+        if self.dialect not in dialects:
+            raise _Untranslatable()
+
+    def _sequence(self, parsed) -> str:
+        return "".join(self._item(op, av) for op, av in parsed)
+
+    def _open_group(self, python_group: Optional[int] = None) -> str:
+        """Open a group, capturing when Python's is or when ERE has no other kind.
+
+        Python's group numbers are mapped to the ones written, which shift
+        with the groups ERE adds and with earlier patterns of an alternation.
+        """
+        if python_group is None and self.dialect != "ere":
+            return "(?:"
+        self.groups += 1
+        if python_group is not None:
+            self._numbers[python_group] = self.groups
+        return "("
+
+    def _item(self, op, av) -> str:
+        if op is sre_parse.LITERAL:
+            if av == 0x0D:
+                # Python never sees a "\r" in a line, the binary sees the
+                # one of each CRLF line end
+                raise _Untranslatable()
+            return self._char(av)
+        if op is sre_parse.NOT_LITERAL:
+            return self._class([(sre_parse.NEGATE, None), (sre_parse.LITERAL, av)])
+        if op is sre_parse.ANY:
+            # rg's "." leaves out "\r" itself when run with --crlf
+            return {"pcre": "[^\\r\\n]", "rust": ".", "ere": "[^\r]"}[self.dialect]
+        if op is sre_parse.IN:
+            return self._class(av)
+        if op is sre_parse.AT:
+            if av in _END_ANCHORS:
+                # rg's "$" matches before a CRLF's "\r" when run with --crlf,
+                # grep's only after it
+                return {"pcre": "(?=\\r?$)", "rust": "$", "ere": "\r?$"}[self.dialect]
+            if av not in _ANCHORS:
+                raise _Untranslatable()
+            if av is sre_parse.AT_NON_BOUNDARY and not _EMPTY_NON_BOUNDARY:
+                self._require("pcre")
+                return "\\B(?:(?<=.)|(?=.))"
+            return _ANCHORS[av][self.dialect == "ere"]
+        if op is sre_parse.BRANCH:
+            opening = self._open_group()
+            return opening + "|".join(self._sequence(branch) for branch in av[1]) + ")"
+        if op is sre_parse.SUBPATTERN:
+            group, add_flags, del_flags, body = av
+            if (add_flags | del_flags) & ~(_LINE_NEUTRAL_FLAGS | re.IGNORECASE):
+                raise _Untranslatable()
+            opening = self._open_group(group)
+            text = self._sequence(body)
+            if (add_flags | del_flags) & re.IGNORECASE:
+                self._require("pcre", "rust")
+                text = f"(?{'' if add_flags & re.IGNORECASE else '-'}i:{text})"
+            return opening + text + ")"
+        if op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT, getattr(sre_parse, "POSSESSIVE_REPEAT", None)):
+            return self._repeat(op, *av)
+        if op is sre_parse.GROUPREF:
+            # GNU grep -E misses some matches of backreferences to empty groups
+            self._require("pcre")
+            number = self._numbers.get(av)
+            if number is None:
+                raise _Untranslatable()
+            return f"\\g{{{number}}}"
+        if op is sre_parse.GROUPREF_EXISTS:
+            self._require("pcre")
+            group, yes, no = av
+            number = self._numbers.get(group)
+            if number is None:
+                raise _Untranslatable()
+            text = f"(?({number}){self._sequence(yes)}"
+            if no is not None:
+                text += "|" + self._sequence(no)
+            return text + ")"
+        if op in (sre_parse.ASSERT, sre_parse.ASSERT_NOT):
+            self._require("pcre")
+            direction, body = av
+            kind = ("=" if op is sre_parse.ASSERT else "!")
+            return f"(?{'<' if direction < 0 else ''}{kind}{self._sequence(body)})"
+        if op is getattr(sre_parse, "ATOMIC_GROUP", None):
+            self._require("pcre")
+            return f"(?>{self._sequence(av)})"
+        raise _Untranslatable()
+
+    def _repeat(self, op, low: int, high: int, body) -> str:
+        limit = _MAX_REPEAT_COUNT[self.dialect]
+        if low > limit or (high != sre_parse.MAXREPEAT and high > limit):
+            raise _Untranslatable()
+        if high == sre_parse.MAXREPEAT:
+            quantifier = {0: "*", 1: "+"}.get(low, f"{{{low},}}")
+        elif (low, high) == (0, 1):
+            quantifier = "?"
+        elif low == high:
+            quantifier = f"{{{low}}}"
+        else:
+            quantifier = f"{{{low},{high}}}"
+        if op is sre_parse.MIN_REPEAT and self.dialect != "ere":
+            # Laziness changes the span matched, never whether a line matches
+            quantifier += "?"
+        elif op is not sre_parse.MIN_REPEAT and op is not sre_parse.MAX_REPEAT:
+            self._require("pcre")
+            quantifier += "+"
+        
+        if len(body) == 1 and body[0][0] in (
+            sre_parse.LITERAL, sre_parse.NOT_LITERAL, sre_parse.ANY, sre_parse.IN, sre_parse.SUBPATTERN
+        ):
+            return self._item(*body[0]) + quantifier
+        opening = self._open_group()
+        return opening + self._sequence(body) + ")" + quantifier
+
+    def _char(self, code: int, in_class: bool = False) -> str:
+        char = chr(code)
+        if 0xD800 <= code <= 0xDFFF:
+            # Lone surrogates cannot be passed on the command line
+            raise _Untranslatable()
+        if self.dialect == "ere":
+            if char in "\0\n":
+                raise _Untranslatable()
+            return "\\" + char if char in _ERE_META and not in_class else char
+        if char in _META:
+            return "\\" + char
+        if code < 0x20 or code == 0x7F:
+            return f"\\x{{{code:x}}}"
+        return char
+
+    def _class(self, items) -> str:
+        negate = bool(items) and items[0][0] is sre_parse.NEGATE
+        if negate:
+            items = items[1:]
+        if self.dialect != "ere":
+            parts = []
+            for op, av in items:
+                if op is sre_parse.LITERAL:
+                    parts.append(self._char(av, True))
+                elif op is sre_parse.RANGE:
+                    parts.append(f"{self._char(av[0], True)}-{self._char(av[1], True)}")
+                elif op is sre_parse.CATEGORY and av in _CATEGORIES:
+                    parts.append(_CATEGORIES[av][0])
+                else:
+                    raise _Untranslatable()
+            # Keep a CRLF's "\r", which Python never sees, out of the class
+            if negate:
+                return f"[^{''.join(parts)}\\r]"
+            text = f"[{''.join(parts)}]"
+            if not any(map(_matches_cr, items)):
+                return text
+            return f"(?:(?!\\r){text})" if self.dialect == "pcre" else f"[{text[1:-1]}&&[^\\r]]"
+        
+        # A POSIX bracket expression has no escapes: "]" must come first,
+        # "-" last, "^" anywhere but first, and "[" before neither ":", "." nor "="
+        specials = set()
+        parts = []
+        for op, av in items:
+            if op is sre_parse.LITERAL:
+                char = self._char(av, True)
+                if char in "]-^[":
+                    specials.add(char)
+                else:
+                    parts.append(char)
+            elif op is sre_parse.RANGE:
+                low, high = self._char(av[0], True), self._char(av[1], True)
+                if low in "]-^[" or high in "]-^[":
+                    raise _Untranslatable()
+                parts.append(f"{low}-{high}")
+            elif op is sre_parse.CATEGORY and _CATEGORIES.get(av, (None, None))[1]:
+                _, bracket, negated = _CATEGORIES[av]
+                if negated:
+                    # Only expressible on its own, by negating the whole expression
+                    if len(items) > 1:
+                        raise _Untranslatable()
+                    negate = not negate
+                parts.append(bracket)
+            else:
+                raise _Untranslatable()
+        # Keep a CRLF's "\r", which Python never sees, out of the expression;
+        # POSIX has no way to take it out of one that is not negated
+        if negate:
+            parts.append("\r")
+        elif any(map(_matches_cr, items)):
+            raise _Untranslatable()
+        order = (["]"] if "]" in specials else []) + parts + [
+            char for char in "[^-" if char in specials
+        ]
+        if not negate and order[0] == "^":
+            if len(order) == 1:
+                return "\\^"
+            order[0], order[1] = order[1], order[0]
+        return f"[{'^' if negate else ''}{''.join(order)}]"
+
+
+class SystemGrep(MCPGrep):
+    """Searcher that hands matching to an external grep process.
+
+    Files are enumerated exactly as MCPGrep does and passed to the binary in
+    batches. Its output is parsed line by line as it arrives and turned into
+    the same result dicts, so the first results are available before the
+    process finishes. Match spans are still computed with Python's re module.
+
+    Patterns are rewritten in the binary's own syntax. Those it cannot run
+    with the meaning Python gives them, such as lookarounds for grep -E,
+    are searched with Python's engine instead.
+    """
+
+    def __init__(
+        self,
+        pattern: str,
+        grep_path: Optional[str] = None,
+        supports_pcre: bool = False,
+        **kwargs
+    ):
+        """Initialize with search pattern.
+
+        Args:
+            pattern: Pattern to search for
+            grep_path: Path to a grep binary; ripgrep is preferred when it is on PATH
+            supports_pcre: Whether grep accepts -P, which is closest to Python's syntax
+            **kwargs: The search options accepted by MCPGrep
+        """
+        super().__init__(pattern, **kwargs)
+        self._fixed = kwargs.get("fixed_strings", False) or not kwargs.get("regexp", True)
+        self.binary = shutil.which("rg") or grep_path or shutil.which("grep")
+        if not self.binary:
+            raise FileNotFoundError("No grep binary found on PATH")
+        self.is_ripgrep = Path(self.binary).name.startswith("rg")
+        self.supports_pcre = supports_pcre
+        self._selected = self._translated_selection()
+
+    def _command(self) -> List[str]:
+        """Build the command line, without the files to search."""
+        if self.is_ripgrep:
+            command = [self.binary, "--json", "--no-config", "--no-ignore", "--hidden", "--text", "-j1"]
+        else:
+            command = [self.binary, "-H", "-n", "--null", "-a", "--color=never"]
+        if self.max_count > 0:
+            command += ["-m", str(self.max_count)]
+        if self.before_context > 0:
+            command += ["-B", str(self.before_context)]
+        if self.after_context > 0:
+            command += ["-A", str(self.after_context)]
+        return command + self._selection()
+
+    def _summary_command(self, mode: str) -> List[str]:
+        """Build the command line for summarize_files, without the files to search."""
+        if self.is_ripgrep:
+            # rg leaves out the name when given a single file unless asked for it
+            command = [
+                self.binary, "--no-config", "--no-ignore", "--hidden", "--text", "-j1", "--null",
+                "--with-filename"
+            ]
+        else:
+            command = [self.binary, "-H", "--null", "-a", "--color=never"]
+        if mode == "count":
+            command.append("--count")
+            if self.max_count > 0:
+                command += ["-m", str(self.max_count)]
+        elif mode == "files_with_matches":
+            command.append("--files-with-matches")
+        else:
+            command.append("--files-without-match")
+        return command + self._selection()
+
+    def _selection(self) -> List[str]:
+        """Build the options choosing which lines are selected, ending the options."""
+        # Lets rg's "$" match before the "\r" of a CRLF line end
+        command = ["--crlf"] if self.is_ripgrep else []
+        if self.ignore_case:
+            command.append("-i")
+        if self.invert_match:
+            command.append("-v")
+        return command + self._selected + ["--"]
+
+    def _translated_selection(self) -> Optional[List[str]]:
+        """Write the patterns in the binary's syntax, with the option choosing it.
+
+        Returns:
+            The syntax option and -e arguments, or None if the binary cannot
+            run the patterns with the meaning Python gives them
+        """
+        if self._fixed:
+            # grep would split a needle at its newline into two, and Python
+            # never sees the "\r" of a CRLF line end that it would match
+            if any("\n" in needle or "\0" in needle or "\r" in needle for needle in self.patterns):
+                return None
+            return ["-F"] + [arg for needle in self.patterns for arg in ("-e", needle)]
+
+        regexes = self.regexes()
+        if self.is_ripgrep:
+            translator = _Translator("rust")
+            needles = [translator.translate(compiled, self.ignore_case) for compiled in regexes]
+            if None not in needles:
+                return [arg for needle in needles for arg in ("-e", needle)]
+            # Lookarounds and backreferences need rg's PCRE2 engine
+            option = "--pcre2"
+        elif self.supports_pcre:
+            option = "-P"
+        else:
+            translator = _Translator("ere")
+            needles = [translator.translate(compiled, self.ignore_case) for compiled in regexes]
+            if None in needles:
+                return None
+            return ["-E"] + [arg for needle in needles for arg in ("-e", needle)]
+
+        # grep -P takes a single pattern, so the patterns are joined into one
+        # alternation, with groups numbered across it
+        translator = _Translator("pcre")
+        needles = [translator.translate(compiled, self.ignore_case) for compiled in regexes]
+        if None in needles:
+            return None
+        pattern = needles[0] if len(needles) == 1 else "|".join(f"(?:{needle})" for needle in needles)
+        if option == "-P":
+            # Otherwise \w, \d and \b only know ASCII, unlike Python's
+            pattern = "(*UCP)" + pattern
+        return [option, "-e", pattern]
+
+    def _parse_grep(self, output: Iterator[bytes]) -> Iterator[Tuple[str, int, str, bool]]:
+        """Parse GNU grep output of the form ``path\\0NUM:line`` or ``path\\0NUM-line``."""
+        for raw in output:
+            name, sep, rest = raw.partition(b"\0")
+            if not sep:
+                # "--" between context groups
+                continue
+            digits = 0
+            while digits < len(rest) and rest[digits:digits + 1].isdigit():
+                digits += 1
+            line = rest[digits + 1:]
+            if line.endswith(b"\n"):
+                line = line[:-1]
+            if line.endswith(b"\r"):
+                line = line[:-1]
+            yield (
+                os.fsdecode(name),
+                int(rest[:digits]),
+                line.decode("utf-8", errors="replace"),
+                rest[digits:digits + 1] == b":"
+            )
+
+    def _parse_ripgrep(self, output: Iterator[bytes]) -> Iterator[Tuple[str, int, str, bool]]:
+        """Parse ripgrep's JSON Lines output."""
+        def text_of(field: Dict) -> bytes:
+            if "text" in field:
+                return field["text"].encode("utf-8")
+            return base64.b64decode(field["bytes"])
+
+        for raw in output:
+            event = json.loads(raw)
+            if event["type"] not in ("match", "context"):
+                continue
+            data = event["data"]
+            line = text_of(data["lines"])
+            if line.endswith(b"\n"):
+                line = line[:-1]
+            if line.endswith(b"\r"):
+                line = line[:-1]
+            yield (
+                os.fsdecode(text_of(data["path"])),
+                data["line_number"],
+                line.decode("utf-8", errors="replace"),
+                event["type"] == "match"
+            )
+
+    def _output(self, command: List[str]) -> Generator[bytes, None, None]:
+        """Run the binary and yield its output line by line as it arrives.
+
+        The process is killed once the stop event is set or the consumer
+        stops reading.
+
+        Raises:
+            RuntimeError: If the binary fails, with what it wrote to stderr
+        """
+        with tempfile.TemporaryFile() as stderr:
+            process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=stderr)
+            try:
+                for raw in process.stdout:
+                    if self.stop is not None and self.stop.is_set():
+                        # Killed below
+                        return
+                    yield raw
+
+                # Exit status 1 only means nothing was selected
+                status = process.wait()
+                if status > 1:
+                    stderr.seek(0)
+                    message = stderr.read().decode("utf-8", errors="replace").strip()
+                    raise RuntimeError(message or f"{self.binary} exited with status {status}")
+            finally:
+                if process.poll() is None:
+                    process.kill()
+                process.stdout.close()
+                process.wait()
+
+    def _file_lines(
+        self, file_paths: List[str]
+    ) -> Generator[Tuple[str, Iterator[Tuple[int, str, bool]]], None, None]:
+        """Run the binary over a batch of files and yield each file's name and printed lines."""
+        parse = self._parse_ripgrep if self.is_ripgrep else self._parse_grep
+        events = parse(self._output(self._command() + file_paths))
+        for name, file_events in groupby(events, key=lambda event: event[0]):
+            yield str(Path(name)), ((num, line, selected) for _, num, line, selected in file_events)
+
+    def _run(self, file_paths: List[str]) -> Generator[Dict, None, None]:
+        """Run the binary over a batch of files and yield their results."""
+        for name, numbered_lines in self._file_lines(file_paths):
+            yield from self._emit_stream(name, numbered_lines)
+
+    def _scan_file(self, path: Path) -> Generator[Dict, None, None]:
+        """Search a single regular file with the external binary."""
+        if self._selected is None:
+            yield from super()._scan_file(path)
+            return
+        yield from self._run([str(path)])
+
+    @staticmethod
+    def _batches(files: Iterator[Union[str, Path]]) -> Generator[List[str], None, None]:
+        """Group files into argument lists of bounded length."""
+        batch = []
+        batch_bytes = 0
+        for file_path in files:
+            batch.append(str(file_path))
+            batch_bytes += len(batch[-1]) + 1
+            if batch_bytes >= _BATCH_ARG_BYTES or len(batch) >= _BATCH_FILES:
+                yield batch
+                batch = []
+                batch_bytes = 0
+        if batch:
+            yield batch
+
+    def search_files(
+        self,
+        file_paths: List[Union[str, Path]],
+        recursive: bool = False,
+        file_pattern: Optional[str] = None,
+        workers: int = 1,
+        executor: str = "thread",
+        no_ignore: bool = False,
+        include: Optional[List[str]] = None,
+        exclude: Optional[List[str]] = None,
+        types: Optional[List[str]] = None,
+        type_not: Optional[List[str]] = None,
+        type_add: Optional[List[str]] = None,
+        index: Optional[TrigramIndex] = None
+    ) -> Generator[Dict, None, None]:
+        """Search for pattern in multiple files with the external binary.
+
+        Args:
+            file_paths: List of file paths to search in
+            recursive: Whether to search directories recursively
+            file_pattern: Optional pattern to filter files (e.g., "*.txt")
+            workers: Only used when the patterns fall back to Python's engine
+            executor: Only used when the patterns fall back to Python's engine
+            no_ignore: Also search files excluded by ignore files
+            include: Globs that files under a directory must match
+            exclude: Globs for files and directories to skip
+            types: File types to search
+            type_not: File types to skip
+            type_add: Extra file types, as "name:glob,glob"
+            index: Trigram index used to skip files that cannot contain a match
+
+        Yields:
+            Dict containing file path, line number, matched line, and match spans
+        """
+        if self._selected is None:
+            yield from super().search_files(
+                file_paths, recursive, file_pattern, workers, executor, no_ignore,
+                include, exclude, types, type_not, type_add, index
+            )
+            return
+        files = self._iter_files(
+            file_paths, recursive, file_pattern, no_ignore, include, exclude, types, type_not, type_add
+        )
+        if index is not None:
+            files = index.candidates(files, self.literal_alternatives(), self.ignore_case)
+
+        # Track total matches for max_count across all files
+        total_matches = 0
+        for batch in self._batches(files):
+            for result in self._run(batch):
+                yield result
+                total_matches += 1
+
+                # Check overall max_count
+                if self.max_count > 0 and total_matches >= self.max_count:
+                    return
+
+    def search_hunks(
+        self,
+        file_paths: List[Union[str, Path]],
+        recursive: bool = False,
+        file_pattern: Optional[str] = None,
+        workers: int = 1,
+        executor: str = "thread",
+        no_ignore: bool = False,
+        include: Optional[List[str]] = None,
+        exclude: Optional[List[str]] = None,
+        types: Optional[List[str]] = None,
+        type_not: Optional[List[str]] = None,
+        type_add: Optional[List[str]] = None,
+        index: Optional[TrigramIndex] = None,
+        line_number: bool = True,
+        keep: Optional[int] = None
+    ) -> Generator[Dict, None, None]:
+        """Search multiple files with the external binary, yielding context hunks.
+
+        Hunks are built straight from the lines the binary prints.
+
+        Args:
+            file_paths: List of file paths to search in
+            recursive: Whether to search directories recursively
+            file_pattern: Optional pattern to filter files (e.g., "*.txt")
+            workers: Only used when the patterns fall back to Python's engine
+            executor: Only used when the patterns fall back to Python's engine
+            no_ignore: Also search files excluded by ignore files
+            include: Globs that files under a directory must match
+            exclude: Globs for files and directories to skip
+            types: File types to search
+            type_not: File types to skip
+            type_add: Extra file types, as "name:glob,glob"
+            index: Trigram index used to skip files that cannot contain a match
+            line_number: Whether to keep line numbers in the hunks
+            keep: Merge only this many matches with their context, across
+                all files, as for group_context
+
+        Yields:
+            Dicts with "file" and "lines"
+        """
+        if self._selected is None:
+            yield from super().search_hunks(
+                file_paths, recursive, file_pattern, workers, executor, no_ignore,
+                include, exclude, types, type_not, type_add, index, line_number, keep
+            )
+            return
+        files = self._iter_files(
+            file_paths, recursive, file_pattern, no_ignore, include, exclude, types, type_not, type_add
+        )
+        if index is not None:
+            files = index.candidates(files, self.literal_alternatives(), self.ignore_case)
+        yield from self._hunks_over(
+            (file_lines for batch in self._batches(files) for file_lines in self._file_lines(batch)),
+            line_number, keep
+        )
+
+    def summarize_files(
+        self,
+        file_paths: List[Union[str, Path]],
+        mode: str = "count",
+        recursive: bool = False,
+        file_pattern: Optional[str] = None,
+        no_ignore: bool = False,
+        include: Optional[List[str]] = None,
+        exclude: Optional[List[str]] = None,
+        types: Optional[List[str]] = None,
+        type_not: Optional[List[str]] = None,
+        type_add: Optional[List[str]] = None,
+        index: Optional[TrigramIndex] = None
+    ) -> Generator[Dict, None, None]:
+        """Report each file as a whole with the binary's -c, -l or -L.
+
+        Takes the same arguments as MCPGrep.summarize_files.
+
+        Yields:
+            Dict with the file path, and its "count" in count mode
+        """
+        if self._selected is None:
+            yield from super().summarize_files(
+                file_paths, mode, recursive, file_pattern, no_ignore,
+                include, exclude, types, type_not, type_add, index
+            )
+            return
+        if mode not in FILE_MODES:
+            raise ValueError(f"Unknown file mode: {mode}")
+        files = self._iter_files(
+            file_paths, recursive, file_pattern, no_ignore, include, exclude, types, type_not, type_add
+        )
+        if index is not None and mode != "files_without_match":
+            files = index.candidates(files, self.literal_alternatives(), self.ignore_case)
+
+        for batch in self._batches(files):
+            output = self._output(self._summary_command(mode) + batch)
+            if mode == "count":
+                # Lines of the form path\0COUNT
+                for raw in output:
+                    name, _, count = raw.rstrip(b"\n").partition(b"\0")
+                    summary = self._file_summary(str(Path(os.fsdecode(name))), int(count), mode)
+                    if summary is not None:
+                        yield summary
+                continue
+            # Paths each ended by a NUL instead of a newline
+            pending = b""
+            for raw in output:
+                names = (pending + raw).split(b"\0")
+                pending = names.pop()
+                for name in names:
+                    yield {"file": str(Path(os.fsdecode(name)))}
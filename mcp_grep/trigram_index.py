@@ -0,0 +1,415 @@
+"""Opt-in on-disk trigram index for narrowing the files a search must read."""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Union
+
+from mcp_grep.listing_cache import RACY_NS
+from mcp_grep.walker import FileWalker
+
+# Files larger than this are not indexed and are always searched
+MAX_INDEXED_BYTES = 16 << 20
+
+# Characters that IGNORECASE lets non-ASCII text match, so trigrams containing
+# them cannot be looked up in an ASCII-folded index
+_FOLD_BREAKS = frozenset("iksIKS\r\n")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    trigrams BLOB
+);
+CREATE TABLE IF NOT EXISTS postings (
+    trigram INTEGER NOT NULL,
+    file_id INTEGER NOT NULL,
+    PRIMARY KEY (trigram, file_id)
+) WITHOUT ROWID;
+"""
+
+
+def file_trigrams(data: bytes) -> array:
+    """Get the distinct ASCII-folded trigrams of a file's contents, as integers.
+
+    Trigrams spanning a line break are left out, since a match never does.
+    """
+    grams = set()
+    for line in data.lower().replace(b"\r", b"\n").split(b"\n"):
+        grams.update(zip(line, line[1:], line[2:]))
+    return array("I", sorted((a << 16) | (b << 8) | c for a, b, c in grams))
+
+
+def query_trigrams(alternatives: Optional[List[List[str]]], ignore_case: bool) -> Optional[List[Set[int]]]:
+    """Turn the literals a match requires into a trigram query.
+
+    Args:
+        alternatives: As returned by MCPGrep.literal_alternatives
+        ignore_case: Whether the literals are matched case-insensitively
+
+    Returns:
+        For each alternative, trigrams a matching file must all contain, or
+        None if the literals give no usable trigrams
+    """
+    if not alternatives:
+        return None
+    query = []
+    for literals in alternatives:
+        grams = set()
+        for literal in literals:
+            if ignore_case:
+                # Only ASCII runs free of letters with non-ASCII case variants
+                segments = "".join(
+                    char if char.isascii() and char not in _FOLD_BREAKS else "\n" for char in literal
+                ).split("\n")
+            else:
+                segments = literal.replace("\r", "\n").split("\n")
+            for segment in segments:
+                data = segment.encode("utf-8").lower()
+                grams.update(int.from_bytes(data[i:i + 3], "big") for i in range(len(data) - 2))
+        if not grams:
+            return None
+        query.append(grams)
+    return query
+
+
+class TrigramIndex:
+    """Trigram posting lists for the files under one root, kept in SQLite.
+
+    Each file's entry records the mtime and size it was indexed at. Files
+    are reindexed as soon as a search sees them change, so results never
+    depend on how fresh the index is: a file is skipped only when its
+    current contents are known to lack a required trigram. With a watcher
+    attached, files it covers are checked with ``stat`` once and then
+    trusted until it reports a change.
+    """
+
+    def __init__(self, root: str, db_path: str):
+        """Open or create the index.
+
+        Args:
+            root: Directory whose files are indexed
+            db_path: SQLite database holding the index
+        """
+        self.root = os.path.abspath(root)
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        # The index can always be rebuilt, so favour write speed over durability
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = OFF")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        # path -> (id, mtime_ns, size, indexed)
+        self._files: Dict[str, tuple] = {
+            path: (file_id, mtime_ns, size, trigrams is not None)
+            for path, file_id, mtime_ns, size, trigrams in self._conn.execute(
+                "SELECT path, id, mtime_ns, size, trigrams IS NOT NULL FROM files"
+            )
+        }
+        self.built_at = self._meta("built_at")
+        self.updated_at = self._meta("updated_at")
+        self.watcher = None
+        # Files checked since the watcher started and unchanged since
+        self._verified: Set[str] = set()
+
+    def attach(self, watcher) -> None:
+        """Skip stat checks for files the watcher has not reported as changed."""
+        with self._lock:
+            self.watcher = watcher
+            self._verified.clear()
+        watcher.subscribe(self)
+
+    def on_change(self, path: str, is_dir: bool) -> None:
+        """Check a file again, or every file under a directory, on next use."""
+        with self._lock:
+            self._verified.discard(path)
+            if is_dir:
+                prefix = os.path.join(path, "")
+                self._verified = {known for known in self._verified if not known.startswith(prefix)}
+
+    def on_listing_change(self, dir_path: str) -> None:
+        """Entries added or removed are reported on their own, so the other files stay verified."""
+
+    def on_reset(self) -> None:
+        """Check every file again after the watcher lost events."""
+        with self._lock:
+            self._verified.clear()
+
+    def _meta(self, key: str) -> Optional[float]:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return float(row[0]) if row else None
+
+    def _set_meta(self, key: str, value: float) -> None:
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def close(self) -> None:
+        """Close the database."""
+        with self._lock:
+            self._conn.close()
+
+    def _index_file(self, path: str, st: os.stat_result) -> Optional[array]:
+        """Read a file and replace its postings. Returns its trigrams, or None if unindexed."""
+        trigrams = None
+        if st.st_size <= MAX_INDEXED_BYTES:
+            try:
+                with open(path, "rb") as file:
+                    trigrams = file_trigrams(file.read())
+            except OSError:
+                trigrams = None
+
+        # A file written again within the same timestamp tick would look
+        # unchanged, so recently modified files are checked again next time
+        mtime_ns = st.st_mtime_ns if time.time_ns() - st.st_mtime_ns > RACY_NS else -1
+        conn = self._conn
+        known = self._files.get(path)
+        if known is not None:
+            self._drop_postings(known[0])
+            file_id = known[0]
+            conn.execute(
+                "UPDATE files SET mtime_ns = ?, size = ?, trigrams = ? WHERE id = ?",
+                (mtime_ns, st.st_size, trigrams.tobytes() if trigrams is not None else None, file_id)
+            )
+        else:
+            file_id = conn.execute(
+                "INSERT INTO files (path, mtime_ns, size, trigrams) VALUES (?, ?, ?, ?)",
+                (path, mtime_ns, st.st_size, trigrams.tobytes() if trigrams is not None else None)
+            ).lastrowid
+        if trigrams is not None:
+            conn.executemany(
+                "INSERT INTO postings (trigram, file_id) VALUES (?, ?)",
+                ((gram, file_id) for gram in trigrams)
+            )
+        self._files[path] = (file_id, mtime_ns, st.st_size, trigrams is not None)
+        return trigrams
+
+    def _drop_postings(self, file_id: int) -> None:
+        row = self._conn.execute("SELECT trigrams FROM files WHERE id = ?", (file_id,)).fetchone()
+        if row and row[0] is not None:
+            old = array("I")
+            old.frombytes(row[0])
+            self._conn.executemany(
+                "DELETE FROM postings WHERE trigram = ? AND file_id = ?",
+                ((gram, file_id) for gram in old)
+            )
+
+    def _remove(self, path: str) -> None:
+        self._verified.discard(path)
+        known = self._files.pop(path, None)
+        if known is not None:
+            self._drop_postings(known[0])
+            self._conn.execute("DELETE FROM files WHERE id = ?", (known[0],))
+
+    def _is_current(self, path: str, st: os.stat_result) -> bool:
+        known = self._files.get(path)
+        return known is not None and known[1] == st.st_mtime_ns and known[2] == st.st_size
+
+    def update(self, paths: Optional[Iterable[str]] = None) -> Dict[str, int]:
+        """Bring the index up to date.
+
+        Args:
+            paths: Files to check; by default the whole root is walked and
+                entries for files that no longer exist are removed
+
+        Returns:
+            Counts of files checked, reindexed and removed
+        """
+        full = paths is None
+        if full:
+            paths = FileWalker().walk(self.root)
+        counts = {"checked": 0, "reindexed": 0, "removed": 0}
+        with self._lock:
+            seen = set()
+            for path in paths:
+                path = os.path.abspath(path)
+                seen.add(path)
+                counts["checked"] += 1
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    self._remove(path)
+                    counts["removed"] += 1
+                    continue
+                if not self._is_current(path, st):
+                    self._index_file(path, st)
+                    counts["reindexed"] += 1
+            if full:
+                for path in [path for path in self._files if path not in seen]:
+                    self._remove(path)
+                    counts["removed"] += 1
+                self.built_at = time.time()
+                self._set_meta("built_at", self.built_at)
+            self.updated_at = time.time()
+            self._set_meta("updated_at", self.updated_at)
+            self._conn.commit()
+        return counts
+
+    def _lookup(self, query: List[Set[int]]) -> Set[int]:
+        """Find the ids of indexed files containing every trigram of some alternative."""
+        matches = set()
+        for grams in query:
+            found = None
+            for gram in grams:
+                ids = {row[0] for row in self._conn.execute(
+                    "SELECT file_id FROM postings WHERE trigram = ?", (gram,)
+                )}
+                found = ids if found is None else found & ids
+                if not found:
+                    break
+            matches |= found or set()
+        return matches
+
+    def candidates(
+        self,
+        files: Iterator[Union[str, os.PathLike]],
+        alternatives: Optional[List[List[str]]],
+        ignore_case: bool = False
+    ) -> Iterator[Union[str, os.PathLike]]:
+        """Keep only the files that may contain a match, in order.
+
+        Files outside the root, too large to index or changed since they were
+        indexed are kept (changed files are reindexed on the way).
+
+        Args:
+            files: Files a search would read
+            alternatives: As returned by MCPGrep.literal_alternatives
+            ignore_case: Whether the literals are matched case-insensitively
+        """
+        query = query_trigrams(alternatives, ignore_case)
+        if query is None:
+            yield from files
+            return
+        if self.built_at is None:
+            self.update()
+
+        with self._lock:
+            matches = self._lookup(query)
+        prefix = os.path.join(self.root, "")
+        watcher = self.watcher
+        changed = False
+        try:
+            for file_path in files:
+                path = os.path.abspath(file_path)
+                if not path.startswith(prefix):
+                    yield file_path
+                    continue
+                if path in self._verified:
+                    with self._lock:
+                        known = self._files.get(path)
+                    if known is not None:
+                        if not known[3] or known[0] in matches:
+                            yield file_path
+                        continue
+                generation = None
+                if watcher is not None and watcher.covers(os.path.dirname(path)):
+                    generation = watcher.generation
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    yield file_path
+                    continue
+                with self._lock:
+                    known = self._files.get(path)
+                    if self._is_current(path, st):
+                        keep = not known[3] or known[0] in matches
+                    else:
+                        changed = True
+                        trigrams = self._index_file(path, st)
+                        keep = trigrams is None or any(grams.issubset(trigrams) for grams in query)
+                    if generation is not None and watcher.generation == generation:
+                        self._verified.add(path)
+                if keep:
+                    yield file_path
+        finally:
+            if changed:
+                with self._lock:
+                    self.updated_at = time.time()
+                    self._set_meta("updated_at", self.updated_at)
+                    self._conn.commit()
+
+    def status(self) -> Dict[str, Union[str, int, float, None]]:
+        """Describe the index for the grep://index resource."""
+        with self._lock:
+            indexed = sum(1 for entry in self._files.values() if entry[3])
+            return {
+                "root": self.root,
+                "database": self.db_path,
+                "files": len(self._files),
+                "indexed_files": indexed,
+                "unindexed_files": len(self._files) - indexed,
+                "verified_files": len(self._verified),
+                "bytes_on_disk": os.path.getsize(self.db_path) if os.path.exists(self.db_path) else 0,
+                "built_at": self.built_at,
+                "updated_at": self.updated_at,
+            }
+
+
+class IndexRegistry:
+    """The trigram indexes for the configured roots, opened on first use.
+
+    Roots come from ``MCP_GREP_INDEX_ROOTS`` (separated by ``os.pathsep``)
+    and databases are kept in ``MCP_GREP_INDEX_DIR``, by default
+    ``~/.cache/mcp-grep``. With no roots configured no index is used.
+    """
+
+    def __init__(self, roots: Optional[List[str]] = None, index_dir: Optional[str] = None):
+        """Configure the registry.
+
+        Args:
+            roots: Directories to index; by default read from the environment
+            index_dir: Where to keep the databases
+        """
+        if roots is None:
+            roots = [root for root in os.environ.get("MCP_GREP_INDEX_ROOTS", "").split(os.pathsep) if root]
+        if index_dir is None:
+            cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+            index_dir = os.environ.get("MCP_GREP_INDEX_DIR") or os.path.join(cache_home, "mcp-grep")
+        self.roots = [os.path.abspath(os.path.expanduser(root)) for root in roots]
+        self.index_dir = index_dir
+        self._indexes: Dict[str, TrigramIndex] = {}
+        self._lock = threading.Lock()
+        self.watcher = None
+
+    def attach(self, watcher) -> None:
+        """Attach a watcher to every index, including ones opened later."""
+        with self._lock:
+            self.watcher = watcher
+            opened = list(self._indexes.values())
+        for index in opened:
+            index.attach(watcher)
+
+    def _open(self, root: str) -> TrigramIndex:
+        with self._lock:
+            index = self._indexes.get(root)
+            if index is None:
+                name = hashlib.sha1(root.encode("utf-8")).hexdigest()[:16]
+                index = TrigramIndex(root, os.path.join(self.index_dir, f"{name}.sqlite3"))
+                if self.watcher is not None:
+                    index.attach(self.watcher)
+                self._indexes[root] = index
+            return index
+
+    def index_for(self, paths: List[Union[str, os.PathLike]]) -> Optional[TrigramIndex]:
+        """Find the index of a configured root that contains all of the paths."""
+        if not paths:
+            return None
+        abs_paths = [os.path.abspath(path) for path in paths]
+        for root in self.roots:
+            prefix = os.path.join(root, "")
+            if all(path == root or path.startswith(prefix) for path in abs_paths):
+                return self._open(root)
+        return None
+
+    def status(self) -> List[Dict[str, Union[str, int, float, None]]]:
+        """Describe every configured root's index."""
+        return [self._open(root).status() for root in self.roots]
+
+
+# Indexes configured for this process
+indexes = IndexRegistry()
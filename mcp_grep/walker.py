@@ -0,0 +1,300 @@
+"""Directory traversal for MCP-Grep built on os.scandir."""
+
+import os
+import re
+import fnmatch
+from typing import Callable, Generator, List, Optional, Pattern, Tuple
+
+from mcp_grep.file_types import TypeFilter
+from mcp_grep.ignore import (
+    ALWAYS_IGNORED, IGNORE_FILES, IgnoreRules, find_repo_root, glob_to_regex, global_rules, read_rules
+)
+from mcp_grep.listing_cache import Listing, listing_cache
+
+# Ignore rules in effect in a directory, lowest precedence first, each with
+# the path from the rules' directory down to the current one
+RuleChain = Tuple[Tuple[IgnoreRules, str], ...]
+
+
+def name_matcher(pattern: Optional[str]) -> Optional[Callable[[str], bool]]:
+    """Compile an fnmatch pattern for file names once, instead of per file.
+
+    Returns:
+        A function testing a file name, or None when there is no pattern
+    """
+    if not pattern:
+        return None
+    match = re.compile(fnmatch.translate(os.path.normcase(pattern))).match
+    return lambda name: match(os.path.normcase(name)) is not None
+
+
+def _glob_pattern(glob: str) -> str:
+    """Translate an include or exclude glob; globs without a slash match at any depth."""
+    if glob.endswith("/"):
+        glob += "**"
+    if "/" in glob:
+        return glob_to_regex(glob.lstrip("/"))
+    return "(?:.*/)?" + glob_to_regex(glob)
+
+
+def _literal_dirs(glob: str) -> Optional[List[str]]:
+    """Get the leading directories of a glob that contain no wildcards.
+
+    Returns:
+        The directory names, or None if the glob can match at any depth
+    """
+    if glob.endswith("/"):
+        glob += "**"
+    if "/" not in glob:
+        return None
+    dirs = []
+    for part in glob.lstrip("/").split("/")[:-1]:
+        if any(char in part for char in "*?[\\"):
+            break
+        dirs.append(part)
+    return dirs
+
+
+class GlobFilter:
+    """Include and exclude globs over paths relative to the search root.
+
+    Globs use ignore-file syntax, so ``src/**/*.py`` is anchored at the
+    root while ``*.py`` matches at any depth, and an include starting with
+    ``!`` is an exclude. All includes are merged into one regex and all
+    excludes into another. Directories are pruned when an exclude matches
+    them or when no include could match anything beneath them.
+    """
+
+    def __init__(self, include: Optional[List[str]] = None, exclude: Optional[List[str]] = None):
+        """Compile the globs.
+
+        Args:
+            include: Globs a file must match one of; "!glob" excludes instead
+            exclude: Globs no file or directory may match
+        """
+        includes = []
+        excludes = list(exclude or [])
+        for glob in include or []:
+            if glob.startswith("!"):
+                excludes.append(glob[1:])
+            else:
+                includes.append(glob)
+        self._include = self._combine(includes)
+        self._exclude = self._combine(excludes)
+        
+        # Directory prefixes that can lead to an include, or None for any directory
+        self._include_dirs = None
+        if includes:
+            include_dirs = [_literal_dirs(glob) for glob in includes]
+            if all(dirs is not None for dirs in include_dirs):
+                self._include_dirs = include_dirs
+
+    @staticmethod
+    def _combine(globs: List[str]) -> Optional[Pattern]:
+        if not globs:
+            return None
+        return re.compile("|".join(f"(?:{_glob_pattern(glob)})" for glob in globs), re.DOTALL)
+
+    def __bool__(self) -> bool:
+        return self._include is not None or self._exclude is not None
+
+    def allows_file(self, rel_path: str) -> bool:
+        """Check whether a file, given relative to the search root, is searched."""
+        if self._exclude is not None and self._exclude.fullmatch(rel_path):
+            return False
+        return self._include is None or self._include.fullmatch(rel_path) is not None
+
+    def allows_dir(self, rel_path: str) -> bool:
+        """Check whether the walk should descend into a directory."""
+        if self._exclude is not None and (
+            self._exclude.fullmatch(rel_path) or self._exclude.fullmatch(rel_path + "/")
+        ):
+            return False
+        if self._include_dirs is None:
+            return True
+        parts = rel_path.split("/")
+        return any(
+            dirs[:len(parts)] == parts[:len(dirs)] for dirs in self._include_dirs
+        )
+
+
+class FileWalker:
+    """Lists the regular files to search under a directory.
+
+    The file type comes from the ``DirEntry`` returned by ``os.scandir``,
+    which on most platforms needs no stat call at all, and names are
+    filtered before anything else is done with a file. Only confirmed
+    regular files are yielded, so the searcher can open them directly.
+    Files are yielded in the same order as ``os.walk``. Listings come from
+    the process-wide ``listing_cache``, so directories that have not changed
+    since an earlier search are not listed again.
+
+    Unless ``no_ignore`` is set, ``.gitignore`` and ``.ignore`` files are
+    honoured the way git does: rules from deeper directories win over those
+    above them, the repository's ``.git/info/exclude`` and the global
+    excludes file have the lowest precedence, and ignored directories are
+    pruned without being listed. ``.git`` itself is never searched.
+    """
+
+    def __init__(
+        self,
+        file_pattern: Optional[str] = None,
+        no_ignore: bool = False,
+        include: Optional[List[str]] = None,
+        exclude: Optional[List[str]] = None,
+        types: Optional[List[str]] = None,
+        type_not: Optional[List[str]] = None,
+        type_add: Optional[List[str]] = None
+    ):
+        """Initialize the walker.
+
+        Args:
+            file_pattern: Optional pattern to filter file names (e.g., "*.txt")
+            no_ignore: Search files excluded by ignore files as well
+            include: Globs relative to the walked directory that files must match
+            exclude: Globs relative to the walked directory to skip, pruning directories
+            types: File types to search (e.g., ["py", "config"])
+            type_not: File types to skip
+            type_add: Extra file types, as "name:glob,glob"
+        """
+        self._file_filter = name_matcher(file_pattern)
+        self.no_ignore = no_ignore
+        self._globs = GlobFilter(include, exclude)
+        self._types = TypeFilter(types, type_not, type_add)
+        # When set to a list, every directory listed and ignore file consulted
+        # is appended to it, so callers can tell when a walk would change
+        self.sources: Optional[List[str]] = None
+
+    def _inherited_rules(self, dir_path: str) -> RuleChain:
+        """Collect the rules that reach into a directory from above it."""
+        if self.no_ignore:
+            return ()
+        abs_dir = os.path.abspath(dir_path)
+        repo_root = find_repo_root(abs_dir)
+        base = repo_root or abs_dir
+        rel = os.path.relpath(abs_dir, base)
+        parts = [] if rel == os.curdir else rel.split(os.sep)
+        
+        sources = [global_rules()]
+        if repo_root:
+            exclude_file = os.path.join(repo_root, ".git", "info", "exclude")
+            sources.append(read_rules(exclude_file))
+            if self.sources is not None:
+                self.sources.append(exclude_file)
+        sources = [(rules, 0) for rules in sources]
+        # Ignore files of the repository root and each directory below it
+        ancestor = base
+        for depth in range(len(parts)):
+            sources.append((self._own_rules(ancestor), depth))
+            if self.sources is not None:
+                self.sources.extend(os.path.join(ancestor, name) for name in IGNORE_FILES)
+            ancestor = os.path.join(ancestor, parts[depth])
+        
+        return tuple(
+            (rules, "".join(part + "/" for part in parts[depth:]))
+            for rules, depth in sources if rules
+        )
+
+    @staticmethod
+    def _own_rules(dir_path: str, names: Optional[set] = None) -> IgnoreRules:
+        """Read a directory's ignore files, limited to those known to exist."""
+        return read_rules(*(
+            os.path.join(dir_path, name) for name in IGNORE_FILES
+            if names is None or name in names
+        ))
+
+    def _with_own_rules(self, chain: RuleChain, dir_path: str, listing: Listing) -> RuleChain:
+        """Add a directory's own ignore files, found in its listing, to the chain."""
+        if self.no_ignore:
+            return chain
+        names = {name for name in IGNORE_FILES if name in listing[0]}
+        if names:
+            if self.sources is not None:
+                self.sources.extend(os.path.join(dir_path, name) for name in names)
+            rules = self._own_rules(dir_path, names)
+            if rules:
+                chain += ((rules, ""),)
+        return chain
+
+    def _ignored(self, chain: RuleChain, name: str, is_dir: bool) -> bool:
+        """Check whether an entry is excluded by the nearest rule that matches it."""
+        if self.no_ignore:
+            return False
+        if is_dir and name in ALWAYS_IGNORED:
+            return True
+        for rules, prefix in reversed(chain):
+            verdict = rules.match(prefix + name, is_dir)
+            if verdict is not None:
+                return verdict
+        return False
+
+    def list_dir(self, dir_path: str, name_pattern: Optional[str] = None) -> Generator[str, None, None]:
+        """Yield the regular files directly inside a directory.
+
+        Args:
+            dir_path: Directory to list
+            name_pattern: Pattern file names must match instead of file_pattern
+        """
+        name_filter = name_matcher(name_pattern) if name_pattern else self._file_filter
+        globs = self._globs
+        file_types = self._types
+        listing = listing_cache.list(dir_path)
+        if self.sources is not None:
+            self.sources.append(dir_path)
+        chain = self._with_own_rules(self._inherited_rules(dir_path), dir_path, listing)
+        base = os.path.join(dir_path, "")
+        for name in listing[0]:
+            if name_filter and not name_filter(name):
+                continue
+            if file_types and not file_types.allows(name):
+                continue
+            if globs and not globs.allows_file(name):
+                continue
+            if chain and self._ignored(chain, name, False):
+                continue
+            yield base + name
+
+    def walk(self, root: str) -> Generator[str, None, None]:
+        """Yield the regular files under a directory, descending depth first.
+
+        Symbolic links to directories are not followed, as with ``os.walk``.
+
+        Args:
+            root: Directory to walk
+        """
+        name_filter = self._file_filter
+        globs = self._globs
+        file_types = self._types
+        # Each directory carries its path relative to root, ending in "/"
+        stack = [(root, "", self._inherited_rules(root))]
+        while stack:
+            dir_path, rel_dir, chain = stack.pop()
+            files, dirs = listing = listing_cache.list(dir_path)
+            if self.sources is not None:
+                self.sources.append(dir_path)
+            chain = self._with_own_rules(chain, dir_path, listing)
+            base = os.path.join(dir_path, "")
+            for name in files:
+                if name_filter and not name_filter(name):
+                    continue
+                if file_types and not file_types.allows(name):
+                    continue
+                if globs and not globs.allows_file(rel_dir + name):
+                    continue
+                if chain and self._ignored(chain, name, False):
+                    continue
+                yield base + name
+            
+            subdirs = []
+            for name in dirs:
+                if self._ignored(chain, name, True):
+                    continue
+                if globs and not globs.allows_dir(rel_dir + name):
+                    continue
+                subdirs.append((
+                    base + name,
+                    rel_dir + name + "/",
+                    tuple((rules, prefix + name + "/") for rules, prefix in chain)
+                ))
+            # Visit subdirectories in listing order; ignored ones were never added
+            stack.extend(reversed(subdirs))
@@ -0,0 +1,217 @@
+"""Optional background watcher that marks cached directories and files dirty."""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import threading
+from typing import Dict, List, Optional
+
+from mcp_grep.ignore import ALWAYS_IGNORED
+
+# inotify(7) constants
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_WATCH_MASK = (
+    IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE
+    | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR | IN_DONT_FOLLOW
+)
+_LISTING_CHANGES = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class InotifyWatcher:
+    """Watches directory trees with Linux inotify on a background thread.
+
+    Subscribers get ``on_change(path, is_dir)`` for every file or directory
+    that changes, ``on_listing_change(dir_path)`` when entries are added to
+    a directory or removed from it, and ``on_reset()`` when events were
+    lost. Together with
+    ``covers`` and ``generation`` this lets caches trust an entry without a
+    ``stat`` call for as long as the watcher has not reported a change.
+    """
+
+    def __init__(self, roots: List[str]):
+        """Set up inotify and add watches for every directory under the roots.
+
+        Args:
+            roots: Directories to watch recursively
+
+        Raises:
+            OSError: If inotify is not available
+        """
+        libc_name = ctypes.util.find_library("c")
+        if libc_name is None:
+            raise OSError(errno.ENOSYS, "libc not found")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self._libc, "inotify_init1"):
+            raise OSError(errno.ENOSYS, "inotify is not available")
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            code = ctypes.get_errno()
+            raise OSError(code, os.strerror(code))
+
+        # Incremented for every batch of events, so a cache can tell whether
+        # anything changed while it was validating an entry
+        self.generation = 0
+        self.overflowed = 0
+        self._paths: Dict[int, str] = {}
+        self._watches: Dict[str, int] = {}
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._stop_read, self._stop_write = os.pipe()
+        for root in roots:
+            self._watch_tree(os.path.abspath(root))
+        self._thread = threading.Thread(target=self._run, name="mcp-grep-watcher", daemon=True)
+        self._thread.start()
+
+    def subscribe(self, subscriber) -> None:
+        """Register an object with on_change, on_listing_change and on_reset methods."""
+        with self._lock:
+            self._subscribers.append(subscriber)
+
+    def covers(self, dir_path: str) -> bool:
+        """Check whether changes inside a directory are being reported."""
+        return dir_path in self._watches
+
+    def stats(self) -> Dict[str, int]:
+        """Report how many directories are watched and how many events were processed."""
+        return {
+            "watched_directories": len(self._watches),
+            "generation": self.generation,
+            "overflows": self.overflowed,
+        }
+
+    def _add_watch(self, dir_path: str) -> bool:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(dir_path), _WATCH_MASK)
+        if wd < 0:
+            # ENOSPC means the watch limit is reached; such directories are
+            # simply validated with stat as if there were no watcher
+            return False
+        with self._lock:
+            self._paths[wd] = dir_path
+            self._watches[dir_path] = wd
+        return True
+
+    def _watch_tree(self, root: str) -> None:
+        """Watch a directory and every directory below it, except .git."""
+        stack = [root]
+        while stack:
+            dir_path = stack.pop()
+            if not self._add_watch(dir_path):
+                continue
+            try:
+                with os.scandir(dir_path) as entries:
+                    for entry in entries:
+                        if entry.name not in ALWAYS_IGNORED and entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+            except OSError:
+                continue
+
+    def _notify(self, path: str, is_dir: bool) -> None:
+        for subscriber in list(self._subscribers):
+            subscriber.on_change(path, is_dir)
+
+    def _notify_listing(self, dir_path: str) -> None:
+        for subscriber in list(self._subscribers):
+            subscriber.on_listing_change(dir_path)
+
+    def _handle(self, wd: int, mask: int, name: str) -> None:
+        if mask & IN_Q_OVERFLOW:
+            self.overflowed += 1
+            for subscriber in list(self._subscribers):
+                subscriber.on_reset()
+            return
+        dir_path = self._paths.get(wd)
+        if dir_path is None:
+            return
+        if mask & IN_IGNORED:
+            with self._lock:
+                self._paths.pop(wd, None)
+                if self._watches.get(dir_path) == wd:
+                    del self._watches[dir_path]
+            return
+        if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+            self._notify(dir_path, True)
+            return
+
+        path = os.path.join(dir_path, name) if name else dir_path
+        is_dir = bool(mask & IN_ISDIR)
+        if mask & _LISTING_CHANGES:
+            self._notify_listing(dir_path)
+            if is_dir and mask & (IN_CREATE | IN_MOVED_TO) and name not in ALWAYS_IGNORED:
+                self._watch_tree(path)
+        self._notify(path, is_dir)
+
+    def _run(self) -> None:
+        while True:
+            ready, _, _ = select.select([self._fd, self._stop_read], [], [])
+            if self._stop_read in ready:
+                return
+            try:
+                buf = os.read(self._fd, 64 << 10)
+            except BlockingIOError:
+                continue
+            except OSError:
+                return
+            self.generation += 1
+            offset = 0
+            while offset + _EVENT_HEADER.size <= len(buf):
+                wd, mask, _, name_len = _EVENT_HEADER.unpack_from(buf, offset)
+                offset += _EVENT_HEADER.size
+                name = os.fsdecode(buf[offset:offset + name_len].rstrip(b"\0"))
+                offset += name_len
+                self._handle(wd, mask, name)
+            self.generation += 1
+
+    def stop(self) -> None:
+        """Stop the background thread and release the inotify descriptor.
+
+        Subscribers are reset, so they go back to validating with stat.
+        """
+        os.write(self._stop_write, b"\0")
+        self._thread.join()
+        with self._lock:
+            self._paths.clear()
+            self._watches.clear()
+        for subscriber in list(self._subscribers):
+            subscriber.on_reset()
+        os.close(self._fd)
+        os.close(self._stop_read)
+        os.close(self._stop_write)
+
+
+def start_watching(roots: List[str], subscribers: list) -> Optional[InotifyWatcher]:
+    """Start a watcher for the roots and attach it to caches.
+
+    Args:
+        roots: Directories to watch recursively
+        subscribers: Caches with an ``attach(watcher)`` method
+
+    Returns:
+        The watcher, or None where inotify is not available
+    """
+    try:
+        watcher = InotifyWatcher(roots)
+    except (OSError, AttributeError):
+        return None
+    for subscriber in subscribers:
+        subscriber.attach(watcher)
+    return watcher
@@ -75,4 +75,305 @@ Feature: Grep Tool Functionality
     And a file with content "Line 1\nLine 2\nLine 3\nLine 4\nLine with match\nLine 6\nLine 7\nLine 8\nLine 9"
     When I invoke the grep tool with pattern "match" and context=3
     Then I should receive results with 1 matching line
-    And the result should include 3 lines before and 3 lines after the match
\ No newline at end of file
+    And the result should include 3 lines before and 3 lines after the match
+
+  Scenario: Streaming scan with context
+    Given I'm connected to the MCP grep server
+    And a file with content "Line one\nLine two has banana\nLine three\nLine four\nLine five has banana\nLine six"
+    When I invoke the grep tool in "stream" scan mode with pattern "banana" and context=1
+    Then I should receive results with 2 matching lines
+    And each match should include context lines
+    And the results should match the default scan mode
+
+  Scenario: Whole-buffer scan
+    Given I'm connected to the MCP grep server
+    And a file with content "apple123\nbanana456\napple789\norange101112"
+    When I invoke the grep tool in "buffer" scan mode with pattern "apple\d+" and context=1
+    Then I should receive results with 2 matching lines
+    And the results should match the default scan mode
+
+  Scenario: Memory-mapped scan
+    Given I'm connected to the MCP grep server
+    And a file with content "Line one\nLine two has banana\nLine three\nLine four\nLine five has banana\nLine six"
+    When I invoke the grep tool in "mmap" scan mode with pattern "banana" and context=2
+    Then I should receive results with 2 matching lines
+    And the results should match the default scan mode
+
+  Scenario: Memory-mapped scan of non-ASCII text
+    Given I'm connected to the MCP grep server
+    And a file with content "é\nab\nçé\n٣"
+    When I invoke the grep tool in "mmap" scan mode with pattern "^\w.?$|\d" and context=0
+    Then I should receive results with 4 matching lines
+    And the results should match the default scan mode
+
+  Scenario: Multiple fixed-string patterns
+    Given I'm connected to the MCP grep server
+    And a file with content "apple pie\nbanana split\ncherry tart\napple banana"
+    When I invoke the grep tool with fixed string patterns "apple,banana"
+    Then I should receive results with 3 matching lines
+    And the result for line 4 should report patterns "apple,banana"
+
+  Scenario: Case-insensitive fixed-string patterns match like a case-insensitive regex
+    Given I'm connected to the MCP grep server
+    And a file with content "İ abc\nſ\nnothing"
+    When I invoke the grep tool with fixed string patterns "abc,s" ignoring case
+    Then I should receive results with 2 matching lines
+    And the result for line 1 should have spans "2-5"
+    And the result for line 2 should report patterns "s"
+
+  Scenario: Multiple regex patterns keep their own groups and flags
+    Given I'm connected to the MCP grep server
+    And a file with content "aa\nbb\nab\nX"
+    When I invoke the grep tool with regex patterns "(a)\1,(b)\1,(?i)x"
+    Then I should receive results with 3 matching lines
+    And the result for line 2 should report patterns "(b)\1"
+
+  Scenario: Regular expression with a required literal
+    Given I'm connected to the MCP grep server
+    And a file with content "def  handle_request(self):\n# handle_request is called here\ndef other():"
+    When I invoke the grep tool in "buffer" scan mode with pattern "def\s+handle_request" and context=0
+    Then I should receive results with 1 matching line
+    And the result should include line number 1
+    And the results should match the default scan mode
+
+  Scenario: Case-insensitive fixed-string search
+    Given I'm connected to the MCP grep server
+    And a file with content "Line with a DOT.\nLine with a [regex]\nline with a dot."
+    When I invoke the grep tool in "mmap" scan mode with pattern "dot." and ignore_case=True and fixed_strings=True
+    Then I should receive results with 2 matching lines
+    And the results should match the default scan mode
+
+  Scenario: Case-insensitive fixed-string search of text with special case folds
+    Given I'm connected to the MCP grep server
+    And a file with content "K\nİstanbul key\nnone\nKEY"
+    When I invoke the grep tool in "buffer" scan mode with pattern "k" and ignore_case=True and fixed_strings=True
+    Then I should receive results with 3 matching lines
+    And the results should match the default scan mode
+
+  Scenario: Parallel recursive directory search
+    Given I'm connected to the MCP grep server
+    And a directory with multiple files containing the word "secret"
+    When I invoke the grep tool with pattern "secret" and recursive=True and workers=4
+    Then I should receive results from multiple files
+    And the results should match a sequential search
+
+  Scenario: Process pool recursive directory search
+    Given I'm connected to the MCP grep server
+    And a directory with multiple files containing the word "secret"
+    When I invoke the grep tool with pattern "secret" and recursive=True and workers=2 in processes
+    Then I should receive results from multiple files
+    And the results should match a sequential search
+
+  Scenario: Process pool search past files without matches
+    Given I'm connected to the MCP grep server
+    And multiple files with extensions ".txt" and ".log"
+    When I invoke the grep tool with pattern "error" and recursive=True and workers=2 in processes
+    Then I should receive results with 2 matching lines
+    And the results should match a sequential search
+
+  Scenario: System grep engine
+    Given I'm connected to the MCP grep server
+    And a directory with multiple files containing the word "secret"
+    When I invoke the grep tool with pattern "secret" and recursive=True on the system engine
+    Then I should receive results from multiple files
+    And the results should match a sequential search
+
+  Scenario: System grep engine runs patterns with Python's meaning
+    Given I'm connected to the MCP grep server
+    And a file with content "xy\nxxxy\nab\nabab\né1\nzz"
+    When I invoke the grep tool with pattern "x{,2}y|(?<=a)b|(ab)\1|^\w\d$" on the system engine with and without -P
+    Then I should receive results with 5 matching lines
+    And the results should match the python engine
+
+  Scenario: System grep engine reads CRLF line ends like Python
+    Given I'm connected to the MCP grep server
+    And a file with CRLF line ends and content "ab\nb c\nabc\nx"
+    When I invoke the grep tool with pattern "b$|c." on the system engine with and without -P
+    Then I should receive results with 1 matching line
+    And the results should match the python engine
+
+  Scenario: System grep engine reports the binary's errors
+    Given I'm connected to the MCP grep server
+    And a directory with multiple files containing the word "secret"
+    When I search for "secret" recursively with a system binary that fails with "grep: broken"
+    Then the search should raise "grep: broken"
+
+  Scenario: Recursive search with a file pattern
+    Given I'm connected to the MCP grep server
+    And multiple files with extensions ".txt" and ".log"
+    When I invoke the grep tool with pattern "error" and file_pattern="*.log" across the directory tree
+    Then I should receive results only from log files
+    And the results should match an os.walk traversal
+
+  Scenario: Recursive search honours ignore files
+    Given I'm connected to the MCP grep server
+    And a directory with multiple files containing the word "secret"
+    And an ignore file excluding "subdir/" and "*.tmp"
+    When I invoke the grep tool with pattern "secret" and recursive=True with and without no_ignore
+    Then the results should skip ignored files
+    And the unfiltered results should include ignored files
+
+  Scenario: Recursive search with include and exclude globs
+    Given I'm connected to the MCP grep server
+    And a directory with multiple files containing the word "secret"
+    When I invoke the grep tool with pattern "secret" and include globs "**/*.txt" and exclude globs "subdir/,file2.*"
+    Then the results should come from files "file1.txt"
+
+  Scenario: Recursive search by file type
+    Given I'm connected to the MCP grep server
+    And multiple files with extensions ".txt" and ".log"
+    When I invoke the grep tool with pattern "t" and file types "log,notes" where notes is "*.md,*.txt"
+    Then the results should come from files "file1.txt,file2.log,file3.txt,file4.log"
+
+  Scenario: Repeated recursive search reuses directory listings
+    Given I'm connected to the MCP grep server
+    And a directory with multiple files containing the word "secret"
+    When I invoke the grep tool with pattern "secret" and recursive=True twice
+    Then the second search should reuse cached directory listings
+    And both searches should return the same results
+
+  Scenario: Directory listing cache bound comes from the environment
+    Given I'm connected to the MCP grep server
+    And a directory with multiple files containing the word "secret"
+    When I list the directory twice with MCP_GREP_LISTING_CACHE_ENTRIES set to "2"
+    Then the listing cache should be bounded to 2 entries and hold no listings
+
+  Scenario: Indexed recursive search
+    Given I'm connected to the MCP grep server
+    And a directory with multiple files containing the word "secret"
+    When I invoke the grep tool with pattern "secret doc" and recursive=True using a trigram index
+    Then I should receive results with 1 matching line
+    And the results should match a sequential search
+    And the index should report 3 files
+
+  Scenario: Indexed search honours an inline case-insensitive flag
+    Given I'm connected to the MCP grep server
+    And a directory with a file containing "Measured in Kelvin"
+    When I invoke the grep tool with pattern "(?i)kelvin" and recursive=True using a trigram index
+    Then I should receive results with 1 matching line
+    And the results should match a sequential search
+
+  Scenario: Watched search sees new files without rescanning
+    Given I'm connected to the MCP grep server
+    And a directory with multiple files containing the word "secret"
+    When I invoke the grep tool with pattern "secret" and recursive=True while watching the directory
+    And a new file containing "secret" is added before searching again
+    Then the second search should include the new file
+    And the watcher should have trusted cached listings
+    And the index should still trust the files it had verified
+
+  Scenario: Repeated grep tool call is served from the result cache
+    Given I'm connected to the MCP grep server
+    And a directory with multiple files containing the word "secret"
+    When I call the grep tool with pattern "secret" recursively twice and again after a file changes
+    Then the second call should be served from the result cache
+    And the call after the change should see the new match
+
+  Scenario: Cached responses are not served to calls that fail validation
+    Given I'm connected to the MCP grep server
+    And a directory with multiple files containing the word "secret"
+    When I call the grep tool with pattern "(se+)+cret" recursively, then again with reject_exponential and with an unknown executor
+    Then the first call should find matches and the repeated calls should be errors
+
+  Scenario: Per-file time budget skips a file that backtracks catastrophically
+    Given I'm connected to the MCP grep server
+    And a directory with a file that makes "(a+)+$|secret" backtrack
+    When I invoke the grep tool with pattern "(a+)+$|secret" and a per-file budget of 0.3 seconds
+    Then I should receive results with 1 matching line
+    And the backtracking file should be reported as timed out
+    And the pattern should be flagged as exponential
+
+  Scenario: Per-file time budget keeps the matches found before the file timed out
+    Given I'm connected to the MCP grep server
+    And a directory with a file that has 256 "secret" lines before one that makes "(a+)+$|secret" backtrack
+    When I invoke the grep tool with pattern "(a+)+$|secret" and a per-file budget of 0.3 seconds
+    Then I should receive results with 256 matching lines
+    And the backtracking file should be reported as timed out
+
+  Scenario: Budgeted search stops its worker when the search fails
+    Given I'm connected to the MCP grep server
+    And a directory with multiple files containing the word "secret"
+    When I call the grep tool with pattern "secret" and a timeout while its worker fails with "disk gone"
+    Then the response should be an error mentioning "disk gone"
+    And the worker process should have been stopped
+
+  Scenario: Context search yields matches while the file is being read
+    Given I'm connected to the MCP grep server
+    And a test file with "secret" on every 100th of 5000 lines
+    When I take the first match with context=1 and then truncate the file
+    Then the remaining matches should stop at the truncation
+
+  Scenario: Overlapping context is merged into groups
+    Given I'm connected to the MCP grep server
+    And a file with content "apple\nbanana\napple\ncherry\ndate\nelder\napple"
+    When I invoke the grep tool with pattern "apple" and context=1 grouped into hunks
+    Then I should receive 2 context groups with lines "1,2,3,4" and "6,7"
+    And the match lines should be 1, 3 and 7
+
+  Scenario: Hunks are built from the lines as they are read
+    Given I'm connected to the MCP grep server
+    And a file with content "apple\nbanana\napple\ncherry\ndate\nelder\napple"
+    When I search for hunks of pattern "apple" with context=1
+    Then I should receive 2 context groups with lines "1,2,3,4" and "6,7"
+    And the match lines should be 1, 3 and 7
+    And the hunks should match the merged results
+
+  Scenario: Paged search resumes where the previous page stopped
+    Given I'm connected to the MCP grep server
+    And a directory with multiple files containing the word "secret"
+    When I page through pattern "secret" recursively with context=1 and page_size=1
+    Then every page should hold at most 1 result
+    And the results should match a sequential search
+
+  Scenario: Options a paged or budgeted search cannot honour are rejected
+    Given I'm connected to the MCP grep server
+    And a directory with multiple files containing the word "secret"
+    When I call the grep tool with pattern "secret" recursively with options paging and budgets cannot honour
+    Then every call should be rejected naming the conflicting option
+
+  Scenario: Matches past the display limit are counted but not kept
+    Given I'm connected to the MCP grep server
+    And a test file with "secret" on every 100th of 5000 lines
+    When I invoke the grep tool with pattern "secret" and invert_match=True on the file
+    Then the response should report 4950 matches and show the first 50
+
+  Scenario: Grep-style output keeps memory bounded past the display limit
+    Given I'm connected to the MCP grep server
+    And a test file with "secret" on every 100th of 30000 lines
+    When I invoke the grep tool with pattern "nowhere" and invert_match=True in the "grep" format while tracing memory
+    Then the grep output should report 30000 matches and show 50 lines
+    And the search should allocate less than 2 MB at its peak
+
+  Scenario: Results are encoded in the requested output format
+    Given I'm connected to the MCP grep server
+    And a file with content "apple\nbanana\napple\ncherry\ndate\nelder\napple"
+    When I invoke the grep tool with pattern "apple" and context=1 in each output format
+    Then the grep output should be "f:1:apple|f-2-banana|f:3:apple|f-4-cherry|--|f-6-elder|f:7:apple"
+    And the columnar output should name the file once with lines "1,2,3,4,6,7"
+    And the json output should not be indented
+
+  Scenario: Count and file listing modes summarize each file
+    Given I'm connected to the MCP grep server
+    And a directory with multiple files containing the word "secret"
+    When I invoke the grep tool with pattern "secret\b" recursively in each file mode
+    Then the file modes should report "file1.txt:1,subdir/file3.txt:1", "file1.txt,subdir/file3.txt" and "file2.txt"
+
+  Scenario: A search stopped partway through a file reads no further lines
+    Given I'm connected to the MCP grep server
+    And a file with content "hit one\nhit two\nhit three\nhit four"
+    When I stop a search in each scan mode with pattern "hit" after its first match
+    Then each scan mode should yield 1 match before stopping
+
+  Scenario: Worker pools collect no more results once the search is stopped
+    Given I'm connected to the MCP grep server
+    And a directory with multiple files containing the word "secret"
+    When I search for "secret" recursively on each worker pool and stop after the first match
+    Then each worker pool should yield 1 matches
+
+  Scenario: Async grep tool runs off the event loop and stops when cancelled
+    Given I'm connected to the MCP grep server
+    And a directory with multiple files containing the word "secret"
+    When I call the async grep tool with pattern "secret" recursively, then cancel a second call
+    Then the event loop should keep running during the call
+    And the cancelled call should not be cached
+    And I should receive results with 0 matching lines
@@ -1,14 +1,27 @@
 """Step definitions for grep_tool.feature tests."""
 
+import json
 import os
 import pytest
 import tempfile
+import threading
+import time
+import tracemalloc
 import shutil
 import re
 from pathlib import Path
+
+import anyio
 from pytest_bdd import given, when, then, parsers
 from typing import Dict, List
-from mcp_grep.core import MCPGrep
+from mcp_grep.bounded import BoundedSearch
+from mcp_grep.core import MCPGrep, group_context, has_nested_repeat
+from mcp_grep.listing_cache import ListingCache, listing_cache
+from mcp_grep.result_cache import result_cache
+from mcp_grep.server import grep as grep_tool_call, grep_async
+from mcp_grep.trigram_index import TrigramIndex
+from mcp_grep.system_grep import SystemGrep
+from mcp_grep.watcher import start_watching
 
 
 @pytest.fixture
@@ -61,6 +74,13 @@ def create_test_file(content, test_file_path):
     return actual_content
 
 
+@given(parsers.parse('a file with CRLF line ends and content "{content}"'))
+def create_crlf_test_file(content, test_file_path):
+    """Create a test file whose lines end in CRLF."""
+    with open(test_file_path, 'w', encoding='utf-8', newline='\r\n') as f:
+        f.write(content.replace('\\n', '\n') + '\n')
+
+
 @given("a directory with multiple files containing the word \"secret\"")
 def create_test_directory_with_files(test_dir):
     """Create a test directory with multiple files containing 'secret'."""
@@ -80,6 +100,26 @@ def create_test_directory_with_files(test_dir):
     return test_dir
 
 
+@given(parsers.parse('a directory with a file containing "{text}"'))
+def create_test_directory_with_text(text, test_dir):
+    """Create a test directory with one file holding the text."""
+    with open(os.path.join(test_dir, "file.txt"), 'w', encoding='utf-8') as f:
+        f.write(text + "\n")
+    
+    return test_dir
+
+
+@given(parsers.parse('an ignore file excluding "{dir_rule}" and "{file_rule}"'))
+def create_ignore_file(dir_rule, file_rule, test_dir):
+    """Write a .gitignore and a file it excludes into the test directory."""
+    with open(os.path.join(test_dir, ".gitignore"), 'w', encoding='utf-8') as f:
+        f.write(f"{dir_rule}\n{file_rule}\n")
+    with open(os.path.join(test_dir, "notes.tmp"), 'w', encoding='utf-8') as f:
+        f.write("A temporary secret")
+    
+    return test_dir
+
+
 @given("multiple files with extensions \".txt\" and \".log\"")
 def create_files_with_extensions(test_dir):
     """Create test files with different extensions."""
@@ -282,6 +322,555 @@ def invoke_grep_with_equal_context(pattern, context, test_file_path, grep_result
     invoke_grep_with_context(pattern, context, context, test_file_path, grep_results)
 
 
+@when(parsers.parse('I invoke the grep tool in "{mode}" scan mode with pattern "{pattern}" and context={context:d}'))
+def invoke_grep_with_scan_mode(mode, pattern, context, test_file_path, grep_results):
+    """Invoke grep using a specific scan mode, keeping the default results for comparison."""
+    grep = MCPGrep(pattern, context=context, scan_mode=mode)
+    
+    # Perform the search
+    results = list(grep.search_file(test_file_path))
+    
+    # Store results for verification
+    grep_results["results"] = results
+    grep_results["match_count"] = len(results)
+    grep_results["default_results"] = list(MCPGrep(pattern, context=context).search_file(test_file_path))
+
+
+@when(parsers.parse('I invoke the grep tool in "{mode}" scan mode with pattern "{pattern}" and ignore_case=True and fixed_strings=True'))
+def invoke_grep_with_scan_mode_ignoring_case(mode, pattern, test_file_path, grep_results):
+    """Invoke a case-insensitive fixed-string grep using a specific scan mode."""
+    grep = MCPGrep(pattern, ignore_case=True, fixed_strings=True, scan_mode=mode)
+    
+    # Perform the search
+    results = list(grep.search_file(test_file_path))
+    
+    # Store results for verification
+    grep_results["results"] = results
+    grep_results["match_count"] = len(results)
+    grep_results["default_results"] = list(
+        MCPGrep(pattern, ignore_case=True, fixed_strings=True).search_file(test_file_path)
+    )
+
+
+@when(parsers.parse('I invoke the grep tool with pattern "{pattern}" and recursive=True and workers={workers:d}'))
+def invoke_grep_with_workers(pattern, workers, test_dir, grep_results):
+    """Invoke a recursive grep that searches files on a thread pool."""
+    grep = MCPGrep(pattern)
+    
+    # Perform the search
+    results = list(grep.search_files([test_dir], recursive=True, workers=workers))
+    
+    # Store results for verification
+    grep_results["results"] = results
+    grep_results["match_count"] = len(results)
+    grep_results["sequential_results"] = list(grep.search_files([test_dir], recursive=True))
+
+
+@when(parsers.parse('I invoke the grep tool with pattern "{pattern}" and recursive=True and workers={workers:d} in processes'))
+def invoke_grep_with_process_workers(pattern, workers, test_dir, grep_results):
+    """Invoke a recursive grep that searches batches of files in worker processes."""
+    grep = MCPGrep(pattern)
+    
+    # Perform the search
+    results = list(grep.search_files([test_dir], recursive=True, workers=workers, executor="process"))
+    
+    # Store results for verification
+    grep_results["results"] = results
+    grep_results["match_count"] = len(results)
+    grep_results["sequential_results"] = list(grep.search_files([test_dir], recursive=True))
+
+
+@when(parsers.parse('I invoke the grep tool with pattern "{pattern}" and recursive=True on the system engine'))
+def invoke_grep_with_system_engine(pattern, test_dir, grep_results):
+    """Invoke a recursive grep that runs the system grep binary."""
+    grep = SystemGrep(pattern)
+    
+    # Perform the search
+    results = list(grep.search_files([test_dir], recursive=True))
+    
+    # Store results for verification
+    grep_results["results"] = results
+    grep_results["match_count"] = len(results)
+    grep_results["sequential_results"] = list(MCPGrep(pattern).search_files([test_dir], recursive=True))
+
+
+@when(parsers.parse('I invoke the grep tool with pattern "{pattern}" on the system engine with and without -P'))
+def invoke_grep_with_system_engine_dialects(pattern, test_file_path, grep_results):
+    """Search a file on the system engine as grep -P and as grep -E would, and with Python's engine."""
+    grep_results["engine_results"] = [
+        list(SystemGrep(pattern, supports_pcre=supports_pcre).search_file(test_file_path))
+        for supports_pcre in (True, False)
+    ]
+    grep_results["results"] = grep_results["engine_results"][0]
+    grep_results["match_count"] = len(grep_results["results"])
+    grep_results["python_results"] = list(MCPGrep(pattern).search_file(test_file_path))
+
+
+@when(parsers.parse('I search for "{pattern}" recursively with a system binary that fails with "{message}"'))
+def search_with_failing_binary(pattern, message, test_dir, grep_results):
+    """Run the system engine with a binary that only reports an error."""
+    binary = os.path.join(test_dir, "failing-grep")
+    with open(binary, "w") as f:
+        f.write(f"#!/bin/sh\necho '{message}' >&2\nexit 2\n")
+    os.chmod(binary, 0o755)
+    grep = SystemGrep(pattern)
+    grep.binary = binary
+    grep.is_ripgrep = False
+    try:
+        list(grep.search_files([test_dir], recursive=True))
+    except RuntimeError as e:
+        grep_results["error"] = str(e)
+
+
+@when(parsers.parse('I invoke the grep tool with pattern "{pattern}" and file_pattern="{file_pattern}" across the directory tree'))
+def invoke_grep_with_file_pattern_recursively(pattern, file_pattern, test_dir, grep_results):
+    """Invoke a recursive grep that filters file names during the walk."""
+    grep = MCPGrep(pattern)
+    
+    # Perform the search
+    results = list(grep.search_files([test_dir], recursive=True, file_pattern=file_pattern))
+    
+    # Store results for verification
+    grep_results["results"] = results
+    grep_results["match_count"] = len(results)
+    
+    # Search the same files found by os.walk one at a time
+    import fnmatch
+    walked_results = []
+    for root, _, files in os.walk(test_dir):
+        for file in files:
+            if fnmatch.fnmatch(file, file_pattern):
+                walked_results.extend(grep.search_file(os.path.join(root, file)))
+    grep_results["walked_results"] = walked_results
+
+
+@when(parsers.parse('I invoke the grep tool with pattern "{pattern}" and recursive=True with and without no_ignore'))
+def invoke_grep_with_and_without_ignore_files(pattern, test_dir, grep_results):
+    """Invoke a recursive grep once honouring ignore files and once without."""
+    grep = MCPGrep(pattern)
+    
+    # Perform the search
+    results = list(grep.search_files([test_dir], recursive=True))
+    
+    # Store results for verification
+    grep_results["results"] = results
+    grep_results["match_count"] = len(results)
+    grep_results["unfiltered_results"] = list(grep.search_files([test_dir], recursive=True, no_ignore=True))
+
+
+@when(parsers.parse('I invoke the grep tool with pattern "{pattern}" and include globs "{include}" and exclude globs "{exclude}"'))
+def invoke_grep_with_include_exclude(pattern, include, exclude, test_dir, grep_results):
+    """Invoke a recursive grep limited by include and exclude globs."""
+    grep = MCPGrep(pattern)
+    
+    # Perform the search
+    results = list(grep.search_files(
+        [test_dir], recursive=True, include=include.split(","), exclude=exclude.split(",")
+    ))
+    
+    # Store results for verification
+    grep_results["results"] = results
+    grep_results["match_count"] = len(results)
+
+
+@when(parsers.parse('I invoke the grep tool with pattern "{pattern}" and file types "{types}" where {name} is "{globs}"'))
+def invoke_grep_with_file_types(pattern, types, name, globs, test_dir, grep_results):
+    """Invoke a recursive grep limited to built-in and user-defined file types."""
+    grep = MCPGrep(pattern)
+    
+    # Perform the search
+    results = list(grep.search_files(
+        [test_dir], recursive=True, types=types.split(","), type_add=[f"{name}:{globs}"]
+    ))
+    
+    # Store results for verification
+    grep_results["results"] = results
+    grep_results["match_count"] = len(results)
+
+
+@given(parsers.parse('a directory with a file that makes "{pattern}" backtrack'), target_fixture="test_dir")
+def backtracking_directory(pattern):
+    """Create a directory with a quick file and one the pattern backtracks on."""
+    temp_dir = tempfile.mkdtemp()
+    with open(os.path.join(temp_dir, "quick.txt"), "w") as f:
+        f.write("A secret line\n")
+    with open(os.path.join(temp_dir, "slow.txt"), "w") as f:
+        f.write("a" * 40 + "!\n")
+    
+    yield temp_dir
+    
+    shutil.rmtree(temp_dir)
+
+
+@given(parsers.parse('a directory with a file that has {count:d} "{word}" lines before one that makes "{pattern}" backtrack'), target_fixture="test_dir")
+def matches_then_backtracking_directory(count, word, pattern):
+    """Create a directory with one file whose matches come before a line the pattern backtracks on."""
+    temp_dir = tempfile.mkdtemp()
+    with open(os.path.join(temp_dir, "slow.txt"), "w") as f:
+        f.write(f"A {word} line\n" * count)
+        f.write("a" * 40 + "!\n")
+    
+    yield temp_dir
+    
+    shutil.rmtree(temp_dir)
+
+
+@given(parsers.parse('a test file with "{word}" on every 100th of {count:d} lines'))
+def file_with_sparse_word(word, count, test_file_path):
+    """Create a file much larger than a read buffer with regularly spaced matches."""
+    with open(test_file_path, "w") as f:
+        for line_num in range(1, count + 1):
+            f.write(f"{word} line {line_num}\n" if line_num % 100 == 1 else f"filler line {line_num}\n")
+    return test_file_path
+
+
+@when(parsers.parse('I invoke the grep tool with pattern "{pattern}" and recursive=True twice'))
+def invoke_grep_recursively_twice(pattern, test_dir, grep_results):
+    """Invoke the same recursive grep twice, recording directory cache hits."""
+    # Age the directories so their listings are not too recent to trust
+    for root, _, _ in os.walk(test_dir):
+        os.utime(root, (1_000_000_000, 1_000_000_000))
+    
+    grep = MCPGrep(pattern)
+    grep_results["results"] = list(grep.search_files([test_dir], recursive=True))
+    hits_before = listing_cache.hits
+    grep_results["repeated_results"] = list(grep.search_files([test_dir], recursive=True))
+    grep_results["cache_hits"] = listing_cache.hits - hits_before
+    grep_results["match_count"] = len(grep_results["results"])
+
+
+@when(parsers.parse('I invoke the grep tool with pattern "{pattern}" and recursive=True using a trigram index'))
+def invoke_grep_with_trigram_index(pattern, test_dir, grep_results):
+    """Invoke a recursive grep that skips files the trigram index rules out."""
+    index_dir = tempfile.mkdtemp()
+    index = TrigramIndex(test_dir, os.path.join(index_dir, "index.sqlite3"))
+    grep = MCPGrep(pattern)
+    
+    try:
+        # Perform the search
+        results = list(grep.search_files([test_dir], recursive=True, index=index))
+        grep_results["index_status"] = index.status()
+    finally:
+        index.close()
+        shutil.rmtree(index_dir)
+    
+    # Store results for verification
+    grep_results["results"] = results
+    grep_results["match_count"] = len(results)
+    grep_results["sequential_results"] = list(grep.search_files([test_dir], recursive=True))
+
+
+@when(parsers.parse('I invoke the grep tool with pattern "{pattern}" and recursive=True while watching the directory'))
+def invoke_grep_while_watching(pattern, test_dir, grep_results):
+    """Invoke a recursive, indexed grep with a watcher attached to the caches."""
+    for root, _, _ in os.walk(test_dir):
+        os.utime(root, (1_000_000_000, 1_000_000_000))
+    index_dir = tempfile.mkdtemp()
+    index = TrigramIndex(test_dir, os.path.join(index_dir, "index.sqlite3"))
+    watcher = start_watching([test_dir], [listing_cache, index])
+    if watcher is None:
+        index.close()
+        shutil.rmtree(index_dir)
+        pytest.skip("inotify is not available")
+    grep = MCPGrep(pattern)
+    grep_results["results"] = list(grep.search_files([test_dir], recursive=True, index=index))
+    grep_results["match_count"] = len(grep_results["results"])
+    grep_results["watch"] = (grep, index, index_dir, watcher)
+
+
+@when(parsers.parse('a new file containing "{text}" is added before searching again'))
+def add_file_and_search_again(text, test_dir, grep_results):
+    """Add a file, wait for the watcher to see it and repeat the search."""
+    grep, index, index_dir, watcher = grep_results["watch"]
+    try:
+        # The first search trusted every listing, so this one needs no stat
+        grep_results["trusted"] = listing_cache.stats()["trusted"]
+        grep_results["verified_before"] = index.status()["verified_files"]
+        generation = watcher.generation
+        with open(os.path.join(test_dir, "new_file.txt"), "w") as f:
+            f.write(f"A {text} that arrived later\n")
+        for _ in range(200):
+            if watcher.generation != generation and watcher.generation % 2 == 0:
+                break
+            time.sleep(0.01)
+        grep_results["verified_after"] = index.status()["verified_files"]
+        grep_results["repeated_results"] = list(grep.search_files([test_dir], recursive=True, index=index))
+    finally:
+        watcher.stop()
+        index.close()
+        shutil.rmtree(index_dir)
+
+
+@then("the index should still trust the files it had verified")
+def verify_index_kept_verified_files(grep_results):
+    """Verify that adding a file did not make the index check the others again."""
+    assert grep_results["verified_before"] == 3, f"Verified {grep_results['verified_before']} files"
+    assert grep_results["verified_after"] == grep_results["verified_before"], \
+        f"{grep_results['verified_after']} of {grep_results['verified_before']} files still verified"
+
+
+@when(parsers.parse('I call the grep tool with pattern "{pattern}" recursively twice and again after a file changes'))
+def call_grep_tool_with_result_cache(pattern, test_dir, grep_results):
+    """Call the grep tool twice, change a file, then call it once more."""
+    # Age everything so the first response is not too recent to cache
+    for root, _, files in os.walk(test_dir):
+        for name in files:
+            os.utime(os.path.join(root, name), (1_000_000_000, 1_000_000_000))
+        os.utime(root, (1_000_000_000, 1_000_000_000))
+    
+    first = grep_tool_call(pattern, test_dir, recursive=True)
+    hits_before = result_cache.stats()["hits"]
+    grep_results["repeated_response"] = grep_tool_call(pattern, test_dir, recursive=True)
+    grep_results["cache_hits"] = result_cache.stats()["hits"] - hits_before
+    grep_results["response"] = first
+    
+    with open(os.path.join(test_dir, "file1.txt"), "a") as f:
+        f.write(f"Another {pattern} was appended\n")
+    grep_results["changed_response"] = grep_tool_call(pattern, test_dir, recursive=True)
+
+
+@when(parsers.parse('I call the grep tool with pattern "{pattern}" recursively, then again with reject_exponential and with an unknown executor'))
+def call_grep_tool_then_invalid_variants(pattern, test_dir, grep_results):
+    """Cache a valid call, then repeat it with options that make it fail."""
+    for root, _, files in os.walk(test_dir):
+        for name in files:
+            os.utime(os.path.join(root, name), (1_000_000_000, 1_000_000_000))
+        os.utime(root, (1_000_000_000, 1_000_000_000))
+    
+    grep_results["response"] = grep_tool_call(pattern, test_dir, recursive=True)
+    grep_results["repeated_responses"] = [
+        grep_tool_call(pattern, test_dir, recursive=True, reject_exponential=True),
+        grep_tool_call(pattern, test_dir, recursive=True, executor="bogus"),
+    ]
+
+
+@when(parsers.parse('I call the grep tool with pattern "{pattern}" recursively with options paging and budgets cannot honour'))
+def call_grep_tool_with_ignored_options(pattern, test_dir, grep_results):
+    """Combine paging and budgets with options their searches would ignore."""
+    calls = {
+        "workers": dict(page_size=1, workers=2),
+        "scan_mode=buffer": dict(page_size=1, scan_mode="buffer"),
+        "engine=system": dict(page_size=1, engine="system"),
+        "workers cannot be combined with timeout": dict(timeout=5, workers=2),
+    }
+    grep_results["rejected"] = {
+        option: grep_tool_call(pattern, test_dir, recursive=True, **kwargs)
+        for option, kwargs in calls.items()
+    }
+
+
+@when(parsers.parse('I invoke the grep tool with pattern "{pattern}" and a per-file budget of {seconds:f} seconds'))
+def invoke_grep_with_file_budget(pattern, seconds, test_dir, grep_results):
+    """Invoke a recursive grep whose matching runs in a killable worker."""
+    grep = MCPGrep(pattern)
+    with BoundedSearch(grep, timeout=30, file_timeout=seconds) as search:
+        grep_results["results"] = list(search.search_files([test_dir], recursive=True))
+    grep_results["match_count"] = len(grep_results["results"])
+    grep_results["timed_out_files"] = search.timed_out_files
+    grep_results["grep"] = grep
+
+
+@when(parsers.parse('I call the grep tool with pattern "{pattern}" and a timeout while its worker fails with "{message}"'))
+def call_grep_tool_with_failing_worker(pattern, message, test_dir, grep_results, monkeypatch):
+    """Call the grep tool with a budget whose search fails once its worker is running."""
+    searches = []
+
+    class FailingSearch(BoundedSearch):
+        def search_files(self, *args, **kwargs):
+            searches.append(self)
+            self._start()
+            raise OSError(message)
+            yield
+
+    monkeypatch.setattr("mcp_grep.server.BoundedSearch", FailingSearch)
+    grep_results["response"] = grep_tool_call(pattern, test_dir, recursive=True, timeout=30, use_cache=False)
+    grep_results["searches"] = searches
+
+
+@when("I take the first match with context=1 and then truncate the file")
+def take_first_match_then_truncate(test_file_path, grep_results):
+    """Read one match, empty the file, then drain the rest of the search."""
+    grep = MCPGrep("secret", context=1)
+    search = grep.search_file(test_file_path)
+    first = next(search)
+    with open(test_file_path, "w"):
+        pass
+    grep_results["results"] = [first] + list(search)
+    grep_results["match_count"] = len(grep_results["results"])
+
+
+@when(parsers.parse('I invoke the grep tool with pattern "{pattern}" and context={context:d} grouped into hunks'))
+def invoke_grep_with_grouped_context(pattern, context, test_file_path, grep_results):
+    """Invoke grep with context and merge the results into hunks."""
+    grep = MCPGrep(pattern, context=context)
+    grep_results["results"] = list(grep.search_file(test_file_path))
+    grep_results["match_count"] = len(grep_results["results"])
+    grep_results["groups"] = list(group_context(grep_results["results"]))
+
+
+@when(parsers.parse('I search for hunks of pattern "{pattern}" with context={context:d}'))
+def search_hunks_with_context(pattern, context, test_file_path, grep_results):
+    """Build hunks straight from the file's lines, and from merged results for comparison."""
+    grep = MCPGrep(pattern, context=context)
+    grep_results["groups"] = list(grep.search_hunks([test_file_path]))
+    grep_results["merged_groups"] = list(group_context(grep.search_files([test_file_path])))
+
+
+@when(parsers.parse('I page through pattern "{pattern}" recursively with context={context:d} and page_size={page_size:d}'))
+def page_through_results(pattern, context, page_size, test_dir, grep_results):
+    """Fetch every page of a recursive search, resuming from each returned position."""
+    grep = MCPGrep(pattern, context=context)
+    pages = []
+    position = None
+    while True:
+        page, position = grep.search_page([test_dir], page_size, position, recursive=True)
+        pages.append(page)
+        if position is None:
+            break
+    grep_results["pages"] = pages
+    grep_results["results"] = [result for page in pages for result in page]
+    grep_results["match_count"] = len(grep_results["results"])
+    grep_results["sequential_results"] = list(grep.search_files([test_dir], recursive=True))
+
+
+@when(parsers.parse('I invoke the grep tool with pattern "{pattern}" and invert_match=True on the file'))
+def invoke_grep_tool_inverted(pattern, test_file_path, grep_results):
+    """Call the grep tool for every line that does not match."""
+    grep_results["response"] = grep_tool_call(pattern, test_file_path, invert_match=True, use_cache=False)
+
+
+@when(parsers.parse('I invoke the grep tool with pattern "{pattern}" and invert_match=True in the "{output_format}" format while tracing memory'))
+def invoke_grep_tool_inverted_tracing_memory(pattern, output_format, test_file_path, grep_results):
+    """Call the grep tool for every line that does not match, recording its peak allocation."""
+    tracemalloc.start()
+    try:
+        grep_results["response"] = grep_tool_call(
+            pattern, test_file_path, invert_match=True, output_format=output_format, use_cache=False
+        )
+        grep_results["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+@when(parsers.parse('I invoke the grep tool with pattern "{pattern}" and context={context:d} in each output format'))
+def invoke_grep_tool_in_each_format(pattern, context, test_file_path, grep_results):
+    """Call the grep tool once per output format, naming the file "f" in the text."""
+    grep_results["outputs"] = {
+        output_format: grep_tool_call(
+            pattern, test_file_path, context=context, output_format=output_format, use_cache=False
+        )["content"][0]["text"].replace(test_file_path, "f")
+        for output_format in ("json", "columnar", "grep")
+    }
+
+
+@when(parsers.parse('I invoke the grep tool with pattern "{pattern}" recursively in each file mode'))
+def invoke_grep_tool_in_each_file_mode(pattern, test_dir, grep_results):
+    """Call the grep tool with -c, -l and -L on both engines, naming files relative to the directory."""
+    prefix = os.path.join(test_dir, "")
+    grep_results["file_modes"] = {
+        (engine, mode): sorted(
+            line.replace(prefix, "").replace(os.sep, "/")
+            for line in grep_tool_call(
+                pattern, test_dir, recursive=True, engine=engine, output_format="grep",
+                use_cache=False, **{mode: True}
+            )["content"][0]["text"].split("\n")
+        )
+        for engine in ("python", "system")
+        for mode in ("count", "files_with_matches", "files_without_match")
+    }
+
+
+@when(parsers.parse('I call the async grep tool with pattern "{pattern}" recursively, then cancel a second call'))
+def call_async_grep_tool(pattern, test_dir, grep_results):
+    """Run the async tool next to a task counting event loop turns, then cancel another call."""
+    async def main():
+        ticks = []
+        done = anyio.Event()
+
+        async def count_ticks():
+            while not done.is_set():
+                ticks.append(time.monotonic())
+                await anyio.sleep(0.001)
+
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(count_ticks)
+            response = await grep_async(pattern, test_dir, recursive=True, use_cache=False)
+            grep_results["ticks_during_call"] = len(ticks)
+            done.set()
+        grep_results["response"] = response
+        
+        entries = result_cache.stats()["entries"]
+        with anyio.move_on_after(0) as scope:
+            await grep_async(pattern, test_dir, recursive=True)
+        grep_results["cancelled"] = scope.cancelled_caught
+        grep_results["cached_after_cancel"] = result_cache.stats()["entries"] - entries
+
+    anyio.run(main)
+    
+    stopped = MCPGrep(pattern)
+    stopped.stop = threading.Event()
+    stopped.stop.set()
+    grep_results["results"] = list(stopped.search_files([test_dir], recursive=True))
+    grep_results["match_count"] = len(grep_results["results"])
+
+
+@when(parsers.parse('I invoke the grep tool with regex patterns "{needles}"'))
+def invoke_grep_with_regex_patterns(needles, test_file_path, grep_results):
+    """Invoke grep with several regular expressions at once."""
+    grep = MCPGrep("", patterns=needles.split(","))
+    grep_results["results"] = list(grep.search_file(test_file_path))
+    grep_results["match_count"] = len(grep_results["results"])
+
+
+@when(parsers.parse('I stop a search in each scan mode with pattern "{pattern}" after its first match'))
+def stop_search_in_each_scan_mode(pattern, test_file_path, grep_results):
+    """Set the stop event once each scan mode yields its first match, then drain the search."""
+    grep_results["stopped_counts"] = {}
+    for mode in ("lines", "stream", "buffer", "mmap"):
+        grep = MCPGrep(pattern, scan_mode=mode)
+        grep.stop = threading.Event()
+        count = 0
+        for _ in grep.search_file(test_file_path):
+            count += 1
+            grep.stop.set()
+        grep_results["stopped_counts"][mode] = count
+
+
+@when(parsers.parse('I search for "{pattern}" recursively on each worker pool and stop after the first match'))
+def search_stopped_worker_pools(pattern, test_dir, grep_results):
+    """Search a directory with two workers on each executor, setting the stop event after the first match."""
+    grep_results["pool_counts"] = {}
+    for executor in ("thread", "process"):
+        grep = MCPGrep(pattern)
+        grep.stop = threading.Event()
+        count = 0
+        for _ in grep.search_files([test_dir], recursive=True, workers=2, executor=executor):
+            count += 1
+            grep.stop.set()
+        grep_results["pool_counts"][executor] = count
+
+
+@when(parsers.parse('I invoke the grep tool with fixed string patterns "{needles}"'))
+def invoke_grep_with_multiple_patterns(needles, test_file_path, grep_results):
+    """Invoke grep with several fixed-string patterns at once."""
+    grep = MCPGrep("", patterns=needles.split(","), fixed_strings=True)
+    
+    # Perform the search
+    results = list(grep.search_file(test_file_path))
+    
+    # Store results for verification
+    grep_results["results"] = results
+    grep_results["match_count"] = len(results)
+
+
+@when(parsers.parse('I invoke the grep tool with fixed string patterns "{needles}" ignoring case'))
+def invoke_grep_with_multiple_patterns_ignoring_case(needles, test_file_path, grep_results):
+    """Invoke a case-insensitive grep with several fixed-string patterns at once."""
+    grep = MCPGrep("", patterns=needles.split(","), fixed_strings=True, ignore_case=True)
+    grep_results["results"] = list(grep.search_file(test_file_path))
+    grep_results["match_count"] = len(grep_results["results"])
+
+
 @then(parsers.parse("I should receive results with {count:d} matching line"))
 @then(parsers.parse("I should receive results with {count:d} matching lines"))
 def verify_match_count(count, grep_results):
@@ -446,6 +1035,322 @@ def verify_equal_context_lines(count, grep_results):
             f"Expected {count} or fewer lines after, got {len(match_with_context['after_context'])}"
 
 
+@then(parsers.parse('the result for line {line_num:d} should have spans "{spans}"'))
+def verify_result_spans(line_num, spans, grep_results):
+    """Verify the match spans reported for a line, given as "start-end" pairs."""
+    expected = [tuple(int(offset) for offset in span.split("-")) for span in spans.split(",")]
+    for result in grep_results["results"]:
+        if result["line_num"] == line_num:
+            assert [tuple(span) for span in result["matches"]] == expected, \
+                f"Expected spans {expected}, got {result['matches']}"
+            return
+    assert False, f"Line number {line_num} not found in results"
+
+
+@then(parsers.parse('the result for line {line_num:d} should report patterns "{needles}"'))
+def verify_reported_patterns(line_num, needles, grep_results):
+    """Verify which patterns were reported for a matching line."""
+    for result in grep_results["results"]:
+        if result["line_num"] == line_num:
+            assert result["patterns"] == needles.split(","), \
+                f"Expected patterns {needles}, got {result['patterns']}"
+            return
+    assert False, f"Line number {line_num} not found in results"
+
+
+@then("the results should match a sequential search")
+def verify_results_match_sequential_search(grep_results):
+    """Verify that a parallel search produced the same results in the same order."""
+    assert grep_results["results"] == grep_results["sequential_results"], \
+        "Parallel results differ from a sequential search"
+
+
+@then("the results should match an os.walk traversal")
+def verify_results_match_os_walk(grep_results):
+    """Verify that the directory walker found the same files in the same order."""
+    assert grep_results["results"] == grep_results["walked_results"], \
+        "Walker results differ from an os.walk traversal"
+
+
+@then("the results should skip ignored files")
+def verify_ignored_files_skipped(grep_results):
+    """Verify that files excluded by the ignore file were not searched."""
+    files = {os.path.basename(result["file"]) for result in grep_results["results"]}
+    assert files == {"file1.txt", "file2.txt"}, f"Unexpected files searched: {files}"
+
+
+@then("the unfiltered results should include ignored files")
+def verify_ignored_files_included(grep_results):
+    """Verify that no_ignore searches the excluded files as well."""
+    files = {os.path.basename(result["file"]) for result in grep_results["unfiltered_results"]}
+    assert files == {"file1.txt", "file2.txt", "file3.txt", "notes.tmp"}, f"Unexpected files searched: {files}"
+
+
+@then(parsers.parse('the results should come from files "{names}"'))
+def verify_result_files(names, grep_results):
+    """Verify exactly which files produced results."""
+    files = {os.path.basename(result["file"]) for result in grep_results["results"]}
+    assert files == set(names.split(",")), f"Unexpected files searched: {files}"
+
+
+@when(parsers.parse('I list the directory twice with MCP_GREP_LISTING_CACHE_ENTRIES set to "{value}"'))
+def list_directory_with_bounded_cache(value, test_dir, grep_results, monkeypatch):
+    """List a directory through a listing cache sized from the environment."""
+    monkeypatch.setenv("MCP_GREP_LISTING_CACHE_ENTRIES", value)
+    cache = ListingCache()
+    cache.list(test_dir)
+    cache.list(test_dir)
+    grep_results["listing_stats"] = cache.stats()
+
+
+@then(parsers.parse("the listing cache should be bounded to {count:d} entries and hold no listings"))
+def verify_listing_cache_bound(count, grep_results):
+    """Verify the cache took its bound from the environment and kept nothing larger."""
+    stats = grep_results["listing_stats"]
+    assert stats["max_entries"] == count
+    assert stats["directories"] == 0 and stats["hits"] == 0, f"Unexpected cache state: {stats}"
+
+
+@then("the second search should reuse cached directory listings")
+def verify_listing_cache_hits(grep_results):
+    """Verify that no directory was listed again by the second search."""
+    assert grep_results["cache_hits"] == 2, \
+        f"Expected 2 cached listings, got {grep_results['cache_hits']}"
+
+
+@then("both searches should return the same results")
+def verify_repeated_results(grep_results):
+    """Verify that cached listings produced the same results."""
+    assert grep_results["repeated_results"] == grep_results["results"], \
+        "Repeated search returned different results"
+
+
+@then(parsers.parse("the index should report {count:d} files"))
+def verify_index_status(count, grep_results):
+    """Verify the number of files recorded in the trigram index."""
+    assert grep_results["index_status"]["files"] == count, \
+        f"Expected {count} indexed files, got {grep_results['index_status']['files']}"
+
+
+@then("the second search should include the new file")
+def verify_watched_search_sees_new_file(grep_results):
+    """Verify that the watcher invalidated the changed directory's listing."""
+    files = {os.path.basename(result["file"]) for result in grep_results["repeated_results"]}
+    assert "new_file.txt" in files, f"New file not searched: {files}"
+    assert len(grep_results["repeated_results"]) == len(grep_results["results"]) + 1
+
+
+@then("the watcher should have trusted cached listings")
+def verify_watcher_trusted_listings(grep_results):
+    """Verify that listings of watched directories were trusted without a stat."""
+    assert grep_results["trusted"] > 0, "No listing was trusted"
+
+
+@then("the second call should be served from the result cache")
+def verify_result_cache_hit(grep_results):
+    """Verify that the repeated call returned the cached response."""
+    assert grep_results["cache_hits"] == 1, f"Expected 1 cache hit, got {grep_results['cache_hits']}"
+    assert grep_results["repeated_response"] == grep_results["response"]
+
+
+@then("the call after the change should see the new match")
+def verify_result_cache_invalidated(grep_results):
+    """Verify that changing a searched file invalidated the cached response."""
+    text = grep_results["changed_response"]["content"][0]["text"]
+    assert "was appended" in text, "Cached response was returned after a file changed"
+
+
+@then("the backtracking file should be reported as timed out")
+def verify_file_timed_out(grep_results):
+    """Verify that only the slow file was cut short."""
+    names = [os.path.basename(path) for path in grep_results["timed_out_files"]]
+    assert names == ["slow.txt"], f"Unexpected timed out files: {names}"
+
+
+@then("the pattern should be flagged as exponential")
+def verify_pattern_flagged(grep_results):
+    """Verify that the static check recognises nested repeats."""
+    assert has_nested_repeat(grep_results["grep"].pattern)
+    assert not has_nested_repeat(MCPGrep("a+b+").pattern)
+
+
+@then("the remaining matches should stop at the truncation")
+def verify_matches_stop_at_truncation(grep_results):
+    """Verify that only matches read before the truncation were produced."""
+    assert grep_results["results"][0]["match"]["line_num"] == 1
+    assert 0 < grep_results["match_count"] < 50, \
+        f"Expected the search to stop early, got {grep_results['match_count']} matches"
+
+
+@then(parsers.parse('I should receive 2 context groups with lines "{first}" and "{second}"'))
+def verify_context_groups(first, second, grep_results):
+    """Verify that each line appears once, in hunks split where context does not touch."""
+    numbers = [[line["line_num"] for line in group["lines"]] for group in grep_results["groups"]]
+    expected = [[int(num) for num in first.split(",")], [int(num) for num in second.split(",")]]
+    assert numbers == expected, f"Unexpected groups: {numbers}"
+
+
+@then("the hunks should match the merged results")
+def verify_hunks_match_merged_results(grep_results):
+    """Verify that hunks built from the lines equal those merged from results."""
+    assert grep_results["groups"] == grep_results["merged_groups"]
+
+
+@then("the match lines should be 1, 3 and 7")
+def verify_group_match_lines(grep_results):
+    """Verify that match lines, and only those, carry spans."""
+    matched = [
+        line["line_num"] for group in grep_results["groups"] for line in group["lines"] if "matches" in line
+    ]
+    assert matched == [1, 3, 7], f"Unexpected match lines: {matched}"
+
+
+@then(parsers.parse("every page should hold at most {count:d} result"))
+def verify_page_sizes(count, grep_results):
+    """Verify that no page exceeded the page size."""
+    assert all(len(page) <= count for page in grep_results["pages"]), \
+        f"Page sizes: {[len(page) for page in grep_results['pages']]}"
+
+
+@then(parsers.parse('the response should report {count:d} matches and show the first {shown:d}'))
+def verify_truncated_response(count, shown, grep_results):
+    """Verify the truncation message and the number of results shown."""
+    text = grep_results["response"]["content"][0]["text"]
+    message, results_json = text.split("\n\n", 1)
+    assert message == f"Found {count} matches, showing first {shown}.", f"Unexpected message: {message}"
+    assert len(json.loads(results_json)) == shown
+
+
+@then(parsers.parse("the grep output should report {count:d} matches and show {shown:d} lines"))
+def verify_truncated_grep_output(count, shown, grep_results):
+    """Verify the truncation message and the number of grep-style lines shown."""
+    text = grep_results["response"]["content"][0]["text"]
+    message, output = text.split("\n\n", 1)
+    assert message == f"Found {count} matches, showing first {shown}.", f"Unexpected message: {message}"
+    assert len(output.split("\n")) == shown
+
+
+@then(parsers.parse("the search should allocate less than {megabytes:d} MB at its peak"))
+def verify_peak_allocation(megabytes, grep_results):
+    """Verify that lines past the display limit were not held in memory."""
+    peak = grep_results["peak_bytes"]
+    assert peak < megabytes * 1_000_000, f"Peak allocation was {peak / 1_000_000:.1f} MB"
+
+
+@then(parsers.parse('the grep output should be "{expected}"'))
+def verify_grep_output(expected, grep_results):
+    """Verify the grep-style output line by line."""
+    lines = grep_results["outputs"]["grep"].split("\n")
+    assert lines == expected.split("|"), f"Unexpected output: {lines}"
+
+
+@then(parsers.parse('the columnar output should name the file once with lines "{line_nums}"'))
+def verify_columnar_output(line_nums, grep_results):
+    """Verify the columnar output's file table and line columns."""
+    table = json.loads(grep_results["outputs"]["columnar"])
+    assert table["files"] == ["f"]
+    assert table["line_nums"] == [[int(num) for num in line_nums.split(",")]]
+    assert [spans is not None for spans in table["matches"][0]] == [True, False, True, False, False, True]
+
+
+@then("the json output should not be indented")
+def verify_json_output_compact(grep_results):
+    """Verify that the verbose format is still the result dicts, without whitespace."""
+    text = grep_results["outputs"]["json"]
+    assert "\n" not in text and ", " not in text
+    assert json.loads(text)[0]["match"]["line"] == "apple"
+
+
+@then(parsers.parse('the file modes should report "{counts}", "{with_matches}" and "{without_match}"'))
+def verify_file_modes(counts, with_matches, without_match, grep_results):
+    """Verify each file mode's listing, and that both engines agree."""
+    expected = {"count": counts, "files_with_matches": with_matches, "files_without_match": without_match}
+    for (engine, mode), lines in grep_results["file_modes"].items():
+        assert lines == expected[mode].split(","), f"Unexpected {mode} output from {engine}: {lines}"
+
+
+@then("the event loop should keep running during the call")
+def verify_event_loop_not_blocked(grep_results):
+    """Verify that other tasks ran while the search was in progress."""
+    assert grep_results["ticks_during_call"] > 0, "The search blocked the event loop"
+    assert "secret" in grep_results["response"]["content"][0]["text"]
+
+
+@then("the cancelled call should not be cached")
+def verify_cancelled_call_not_cached(grep_results):
+    """Verify that cancelling returned at once without caching a response."""
+    assert grep_results["cancelled"]
+    assert grep_results["cached_after_cancel"] == 0
+
+
+@then(parsers.parse("each scan mode should yield {count:d} match before stopping"))
+def verify_stopped_counts(count, grep_results):
+    """Verify no scan mode yields more lines once the stop event is set."""
+    for mode, found in grep_results["stopped_counts"].items():
+        assert found == count, f"{mode} yielded {found} matches after the stop, expected {count}"
+
+
+@then(parsers.parse("each worker pool should yield {count:d} matches"))
+def verify_pool_counts(count, grep_results):
+    """Verify each executor yields the expected number of matches."""
+    for executor, found in grep_results["pool_counts"].items():
+        assert found == count, f"The {executor} pool yielded {found} matches, expected {count}"
+
+
+@then(parsers.parse('the search should raise "{message}"'))
+def verify_search_error(message, grep_results):
+    """Verify the search raised with the expected message."""
+    assert grep_results.get("error") == message, f"Expected error {message!r}, got {grep_results.get('error')!r}"
+
+
+@then(parsers.parse('the response should be an error mentioning "{message}"'))
+def verify_error_response(message, grep_results):
+    """Verify the tool call failed with the expected message."""
+    response = grep_results["response"]
+    assert response["isError"], f"Expected an error, got {response['content'][0]['text'][:80]}"
+    assert message in response["content"][0]["text"]
+
+
+@then("the worker process should have been stopped")
+def verify_worker_stopped(grep_results):
+    """Verify the budgeted search killed its worker process."""
+    assert grep_results["searches"], "The search never started"
+    for search in grep_results["searches"]:
+        assert search._worker is None, "The worker process was left running"
+
+
+@then("the results should match the python engine")
+def verify_results_match_python_engine(grep_results):
+    """Verify every system engine run found the same lines as Python's engine."""
+    for results in grep_results["engine_results"]:
+        assert results == grep_results["python_results"], "System engine results differ from Python's"
+
+
+@then("every call should be rejected naming the conflicting option")
+def verify_ignored_options_rejected(grep_results):
+    """Verify that each combination is an error that names the option."""
+    for option, response in grep_results["rejected"].items():
+        text = response["content"][0]["text"]
+        assert response["isError"], f"{option} was not rejected: {text[:80]}"
+        assert option in text, f"Unexpected error for {option}: {text}"
+
+
+@then("the first call should find matches and the repeated calls should be errors")
+def verify_invalid_calls_not_cached(grep_results):
+    """Verify the cached response was not served to the invalid calls."""
+    assert not grep_results["response"]["isError"]
+    assert "No matches found" not in grep_results["response"]["content"][0]["text"]
+    for response in grep_results["repeated_responses"]:
+        assert response["isError"], f"Expected an error, got {response['content'][0]['text'][:80]}"
+
+
+@then("the results should match the default scan mode")
+def verify_results_match_default_scan_mode(grep_results):
+    """Verify that an alternate scan mode produced identical results."""
+    assert grep_results["results"] == grep_results["default_results"], \
+        "Scan mode results differ from the default scan mode"
+
+
 # Alternative step definition for two-text results with exact wording match
 @then('the results should contain "apple123" and "apple789"')
 def verify_results_contain_apple_results(grep_results):
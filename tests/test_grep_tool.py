@@ -65,4 +65,260 @@ def test_multiple_file_pattern_support():
 @scenario(FEATURE_FILE, 'Variable context line control')
 def test_variable_context_line_control():
     """Test variable context line control."""
-    pass
\ No newline at end of file
+    pass
+
+@scenario(FEATURE_FILE, 'Streaming scan with context')
+def test_streaming_scan_with_context():
+    """Test streaming scan with context."""
+    pass
+
+@scenario(FEATURE_FILE, 'Whole-buffer scan')
+def test_whole_buffer_scan():
+    """Test whole-buffer scan."""
+    pass
+
+
+@scenario(FEATURE_FILE, 'Memory-mapped scan')
+def test_memory_mapped_scan():
+    """Test memory-mapped scan."""
+    pass
+
+
+@scenario(FEATURE_FILE, 'Memory-mapped scan of non-ASCII text')
+def test_memory_mapped_scan_of_non_ascii_text():
+    """Test memory-mapped scan of non-ASCII text."""
+    pass
+
+
+@scenario(FEATURE_FILE, 'Multiple fixed-string patterns')
+def test_multiple_fixed_string_patterns():
+    """Test multiple fixed-string patterns."""
+    pass
+
+
+@scenario(FEATURE_FILE, 'Multiple regex patterns keep their own groups and flags')
+def test_multiple_regex_patterns_keep_their_own_groups_and_flags():
+    """Test multiple regex patterns keep their own groups and flags."""
+    pass
+
+
+@scenario(FEATURE_FILE, 'Regular expression with a required literal')
+def test_regular_expression_with_a_required_literal():
+    """Test regular expression with a required literal."""
+    pass
+
+
+@scenario(FEATURE_FILE, 'Case-insensitive fixed-string search')
+def test_case_insensitive_fixed_string_search():
+    """Test case-insensitive fixed-string search."""
+    pass
+
+
+@scenario(FEATURE_FILE, 'Case-insensitive fixed-string search of text with special case folds')
+def test_case_insensitive_fixed_string_search_of_text_with_special_case_folds():
+    """Test case-insensitive fixed-string search of text with special case folds."""
+    pass
+
+
+@scenario(FEATURE_FILE, 'Parallel recursive directory search')
+def test_parallel_recursive_directory_search():
+    """Test parallel recursive directory search."""
+    pass
+
+
+@scenario(FEATURE_FILE, 'Process pool recursive directory search')
+def test_process_pool_recursive_directory_search():
+    """Test process pool recursive directory search."""
+    pass
+
+
+@scenario(FEATURE_FILE, 'System grep engine')
+def test_system_grep_engine():
+    """Test system grep engine."""
+    pass
+
+
+@scenario(FEATURE_FILE, "System grep engine runs patterns with Python's meaning")
+def test_system_grep_engine_runs_patterns_with_pythons_meaning():
+    """Test system grep engine runs patterns with Python's meaning."""
+    pass
+
+
+@scenario(FEATURE_FILE, "System grep engine reports the binary's errors")
+def test_system_grep_engine_reports_the_binarys_errors():
+    """Test system grep engine reports the binary's errors."""
+    pass
+
+
+@scenario(FEATURE_FILE, 'Recursive search with a file pattern')
+def test_recursive_search_with_a_file_pattern():
+    """Test recursive search with a file pattern."""
+    pass
+
+
+@scenario(FEATURE_FILE, 'Recursive search honours ignore files')
+def test_recursive_search_honours_ignore_files():
+    """Test recursive search honours ignore files."""
+    pass
+
+
+@scenario(FEATURE_FILE, 'Recursive search with include and exclude globs')
+def test_recursive_search_with_include_and_exclude_globs():
+    """Test recursive search with include and exclude globs."""
+    pass
+
+
+@scenario(FEATURE_FILE, 'Recursive search by file type')
+def test_recursive_search_by_file_type():
+    """Test recursive search by file type."""
+    pass
+
+
+@scenario(FEATURE_FILE, 'Repeated recursive search reuses directory listings')
+def test_repeated_recursive_search_reuses_directory_listings():
+    """Test repeated recursive search reuses directory listings."""
+    pass
+
+
+@scenario(FEATURE_FILE, 'Indexed recursive search')
+def test_indexed_recursive_search():
+    """Test indexed recursive search."""
+    pass
+
+
+@scenario(FEATURE_FILE, 'Watched search sees new files without rescanning')
+def test_watched_search_sees_new_files_without_rescanning():
+    """Test watched search sees new files without rescanning."""
+    pass
+
+
+@scenario(FEATURE_FILE, 'Repeated grep tool call is served from the result cache')
+def test_repeated_grep_tool_call_is_served_from_the_result_cache():
+    """Test repeated grep tool call is served from the result cache."""
+    pass
+
+
+@scenario(FEATURE_FILE, 'Cached responses are not served to calls that fail validation')
+def test_cached_responses_are_not_served_to_calls_that_fail_validation():
+    """Test cached responses are not served to calls that fail validation."""
+    pass
+
+
+@scenario(FEATURE_FILE, 'Per-file time budget skips a file that backtracks catastrophically')
+def test_per_file_time_budget_skips_a_file_that_backtracks_catastrophically():
+    """Test per-file time budget skips a file that backtracks catastrophically."""
+    pass
+
+
+@scenario(FEATURE_FILE, 'Context search yields matches while the file is being read')
+def test_context_search_yields_matches_while_the_file_is_being_read():
+    """Test context search yields matches while the file is being read."""
+    pass
+
+
+@scenario(FEATURE_FILE, 'Overlapping context is merged into groups')
+def test_overlapping_context_is_merged_into_groups():
+    """Test overlapping context is merged into groups."""
+    pass
+
+
+@scenario(FEATURE_FILE, 'Paged search resumes where the previous page stopped')
+def test_paged_search_resumes_where_the_previous_page_stopped():
+    """Test paged search resumes where the previous page stopped."""
+    pass
+
+
+@scenario(FEATURE_FILE, 'Matches past the display limit are counted but not kept')
+def test_matches_past_the_display_limit_are_counted_but_not_kept():
+    """Test matches past the display limit are counted but not kept."""
+    pass
+
+
+@scenario(FEATURE_FILE, 'Results are encoded in the requested output format')
+def test_results_are_encoded_in_the_requested_output_format():
+    """Test results are encoded in the requested output format."""
+    pass
+
+
+@scenario(FEATURE_FILE, 'Count and file listing modes summarize each file')
+def test_count_and_file_listing_modes_summarize_each_file():
+    """Test count and file listing modes summarize each file."""
+    pass
+
+
+@scenario(FEATURE_FILE, 'A search stopped partway through a file reads no further lines')
+def test_a_search_stopped_partway_through_a_file_reads_no_further_lines():
+    """Test a search stopped partway through a file reads no further lines."""
+    pass
+
+
+@scenario(FEATURE_FILE, 'Worker pools collect no more results once the search is stopped')
+def test_worker_pools_collect_no_more_results_once_the_search_is_stopped():
+    """Test worker pools collect no more results once the search is stopped."""
+    pass
+
+
+@scenario(FEATURE_FILE, 'Async grep tool runs off the event loop and stops when cancelled')
+def test_async_grep_tool_runs_off_the_event_loop_and_stops_when_cancelled():
+    """Test async grep tool runs off the event loop and stops when cancelled."""
+    pass
+
+
+@scenario(FEATURE_FILE, 'Per-file time budget keeps the matches found before the file timed out')
+def test_per_file_time_budget_keeps_the_matches_found_before_the_file_timed_out():
+    """Test per-file time budget keeps the matches found before the file timed out."""
+    pass
+
+
+@scenario(FEATURE_FILE, 'Process pool search past files without matches')
+def test_process_pool_search_past_files_without_matches():
+    """Test process pool search past files without matches."""
+    pass
+
+
+@scenario(FEATURE_FILE, 'Hunks are built from the lines as they are read')
+def test_hunks_are_built_from_the_lines_as_they_are_read():
+    """Test hunks are built from the lines as they are read."""
+    pass
+
+
+@scenario(FEATURE_FILE, 'Options a paged or budgeted search cannot honour are rejected')
+def test_options_a_paged_or_budgeted_search_cannot_honour_are_rejected():
+    """Test options a paged or budgeted search cannot honour are rejected."""
+    pass
+
+
+@scenario(FEATURE_FILE, 'Grep-style output keeps memory bounded past the display limit')
+def test_grep_style_output_keeps_memory_bounded_past_the_display_limit():
+    """Test grep-style output keeps memory bounded past the display limit."""
+    pass
+
+
+@scenario(FEATURE_FILE, 'Indexed search honours an inline case-insensitive flag')
+def test_indexed_search_honours_an_inline_case_insensitive_flag():
+    """Test indexed search honours an inline case-insensitive flag."""
+    pass
+
+
+@scenario(FEATURE_FILE, 'Case-insensitive fixed-string patterns match like a case-insensitive regex')
+def test_case_insensitive_fixed_string_patterns_match_like_a_case_insensitive_regex():
+    """Test case-insensitive fixed-string patterns match like a case-insensitive regex."""
+    pass
+
+
+@scenario(FEATURE_FILE, 'System grep engine reads CRLF line ends like Python')
+def test_system_grep_engine_reads_crlf_line_ends_like_python():
+    """Test system grep engine reads CRLF line ends like Python."""
+    pass
+
+
+@scenario(FEATURE_FILE, 'Budgeted search stops its worker when the search fails')
+def test_budgeted_search_stops_its_worker_when_the_search_fails():
+    """Test budgeted search stops its worker when the search fails."""
+    pass
+
+
+@scenario(FEATURE_FILE, 'Directory listing cache bound comes from the environment')
+def test_directory_listing_cache_bound_comes_from_the_environment():
+    """Test directory listing cache bound comes from the environment."""
+    pass